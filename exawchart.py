@@ -57,12 +57,11 @@ import exawchart_io
 import exawchart_cs
 import exawchart_mp
 import exawchart_inc
+import exawchart_corr
+import exawparse_io
 
 # import constants and common functions from exawutil
-from exawutil import DATE_FMT_INPUT, DEFAULT_HARD_DISKS, DEFAULT_FLASH_DISKS, DEFAULT_MAX_BUCKETS, get_hostname, get_hostname_from_filename, validate_disk_list, validate_disk, ReportContext
-
-# change json to only dump 6 decimal points for float
-json.encoder.FLOAT_REPR = lambda o: format(o, '.6f')
+from exawutil import DATE_FMT_INPUT, DEFAULT_HARD_DISKS, DEFAULT_FLASH_DISKS, DEFAULT_MAX_BUCKETS, BUCKET_ALIGN_START, BUCKET_ALIGNMENTS, InvalidBucketAlignment, REDUCE_AVG, REDUCE_MODES, InvalidReduceMode, SERIES_FORMAT_JSON, SERIES_FORMATS, InvalidSeriesFormat, COMPRESS_NONE, COMPRESSIONS, InvalidCompression, ASSET_CDN_HOSTS, InvalidAssetDir, MANIFEST_FILE, DEFAULT_HEATMAP_HOSTS, RANK_IOPS, RANK_METRICS, RANK_UTIL_PERCENTILE, InvalidRankMetric, CLOCK_SKEW_NONE, CLOCK_SKEW_MODES, MAX_CLOCK_SKEW, InvalidClockSkewMode, DEFAULT_CORRELATION_WINDOW, VIEWER_TEMPLATE, get_hostname, get_hostname_from_filename, validate_disk_list, validate_disk, ReportContext
 
 # template for index.html
 HTML_INDEX_TEMPLATE = '''
@@ -117,14 +116,10 @@ def _process_summary_pages(report_context):
     reportContextJson = json.dumps(report_context_obj)
 
     try:
-      template_file = open(os.path.join(report_context.template_dir,
-                                        'cell_summary_template.html'),'r')
-      template = template_file.read()
-      template_file.close()
-
-      (filename, title) = report_context.write_html_file(host + '.html',
-                                                         'Summary',
-                                                         template % vars());
+      (filename, title) = report_context.write_template_file(host + '.html',
+                                                             'Summary',
+                                                             'cell_summary_template.html',
+                                                             vars())
       report_context.add_html_file(host, 'summary', (filename, title), 0)
     except Exception as e:
       report_context.log_msg('error', 'Unable to read template file: %s (%s)' %
@@ -167,6 +162,91 @@ def usage():
   print '    "' + ftext + '"'
   print '  -o|--outdir: directory to put datafiles and png files'
   print '                         DEFAULT: current directory'
+  print '  -a|--align: bucket alignment, one of: ' + ', '.join(BUCKET_ALIGNMENTS)
+  print '              start: buckets start at the report start time'
+  print '              epoch|midnight: buckets are aligned to multiples of the'
+  print '                bucket interval, so overlapping reports share buckets'
+  print '                         DEFAULT: ' + BUCKET_ALIGN_START
+  print '  -r|--reduce: value charted for each bucket, one of: ' + ', '.join(REDUCE_MODES)
+  print '              avg: average of the samples in the bucket'
+  print '              max: maximum of the samples in the bucket'
+  print '              minmax: minimum or maximum, whichever is further from'
+  print '                the average'
+  print '              lttb: minimum, average or maximum, using'
+  print '                largest-triangle-three-buckets'
+  print '              max, minmax and lttb preserve short peaks'
+  print '                         DEFAULT: ' + REDUCE_AVG
+  print '  -s|--series_format: format of chart data in the html pages, one of: ' + ', '.join(SERIES_FORMATS)
+  print '              json: json arrays'
+  print '              binary: base64 encoded float32 arrays, which are'
+  print '                smaller and faster to load for large reports'
+  print '                         DEFAULT: ' + SERIES_FORMAT_JSON
+  print '  -j|--jobs: number of processes used to generate the html pages'
+  print '             for multiple hosts'
+  print '                         DEFAULT: 1'
+  print '  --parse_jobs: number of processes used to parse the files of'
+  print '             multiple hosts, each host is parsed by one process'
+  print '                         DEFAULT: 1'
+  print '  --max_memory: memory (in MB) for the parsed data of each stat type,'
+  print '             the rest is spilled to a temporary file; 0 for no limit'
+  print '             (shared with the --parse_jobs processes)'
+  print '                         DEFAULT: 0'
+  print '  -c|--compress: compression of the html files, one of: ' + ', '.join(COMPRESSIONS)
+  print '              gzip: also write a .gz of each html file'
+  print '              tar: write a single .tar.gz with all html files,'
+  print '                instead of the output directory'
+  print '                         DEFAULT: ' + COMPRESS_NONE
+  print '  -d|--offline_assets: directory with a local copy of the javascript and'
+  print '              css libraries, laid out as <host>/<path> of their URLs'
+  print '              (e.g. from wget -x), for hosts: ' + ', '.join(ASSET_CDN_HOSTS)
+  print '              This is copied into the output directory (named with'
+  print '              a hash of its contents) and used by all pages, with'
+  print '              the chart script they share, so they can be viewed'
+  print '              without internet access'
+  print '                         DEFAULT: use the libraries from the internet'
+  print '  --detail_chunks: write the IOStat Detail data of each disk to a'
+  print '              separate file, which is only loaded when the disk is'
+  print '              selected, so the page loads quickly with many disks'
+  print '  --single_page: write a single page viewer as index.html instead of'
+  print '              the menu and chart pages.  It loads the libraries once,'
+  print '              and the data of each page (written as <page>.js) when'
+  print '              first selected, and keeps it, so switching back to a'
+  print '              page does not load it again'
+  print '  --fleet: number of hosts parsed at a time, for reports of many'
+  print '              hosts; memory use depends on this rather than on the'
+  print '              number of hosts (the multi-cell series are spilled to'
+  print '              temporary files)'
+  print '                         DEFAULT: all hosts at once'
+  print '  --heatmap_hosts: minimum number of hosts for the multi-cell heatmap'
+  print '              page (a row per host, a column per bucket), which is'
+  print '              easier to read than the multi-cell charts with many'
+  print '              hosts; 0 for no heatmap page'
+  print '                         DEFAULT: %d' % DEFAULT_HEATMAP_HOSTS
+  print '  --top_hosts: number of hosts whose series are included in the'
+  print '              multi-cell pages, ranked by --rank_by; the series of'
+  print '              the other hosts are loaded when selected'
+  print '                         DEFAULT: 0 (all hosts)'
+  print '  --rank_by: metric to rank the hosts by for --top_hosts, one of: ' + ', '.join(RANK_METRICS)
+  print '              await: peak wait time'
+  print '              util: %dth percentile of utilization' % RANK_UTIL_PERCENTILE
+  print '              iops: total IOPS'
+  print '                         DEFAULT: ' + RANK_IOPS
+  print '  --clock_skew: clock skew handling for 3 or more hosts, one of: ' + ', '.join(CLOCK_SKEW_MODES)
+  print '              detect: estimate the clock offset of each host (up to'
+  print '                %d seconds) from the correlation of its iostat IOPS' % MAX_CLOCK_SKEW
+  print '                with the other hosts, and report it as a finding;'
+  print '                this reads the iostat files an extra time'
+  print '              align: also shift the samples of each host by its'
+  print '                offset, so events are in the same bucket on all hosts'
+  print '                         DEFAULT: ' + CLOCK_SKEW_NONE
+  print '  --correlation_window: number of buckets of the rolling correlation'
+  print '              on the correlation page, which is created if there'
+  print '              are database nodes (mpstat) and cells (cellsrvstat)'
+  print '                         DEFAULT: %d' % DEFAULT_CORRELATION_WINDOW
+  print '  --incremental: write the report to a fixed directory (without the'
+  print '              _<n> suffix), and only generate the pages whose input'
+  print '              files, options or templates changed since the previous'
+  print '              run, as recorded in ' + MANIFEST_FILE
   print
   print 'NOTE: '
   print '  -p and -l only have to be specified if not using default values '
@@ -183,11 +263,18 @@ def main():
   # process arguments
   try:
     opts, args = getopt.getopt(sys.argv[1:],
-                               'p:l:z:f:t:o:x:m:g:h',
+                               'p:l:z:f:t:o:x:a:r:s:j:c:d:m:g:h',
                                ['physical=', 'flash=', 'zfile=',
                                 'from=', 'to=',
                                 'outdir=', 'name=',
-                                'max_buckets=',
+                                'max_buckets=', 'align=', 'reduce=',
+                                'series_format=', 'jobs=', 'parse_jobs=',
+                                'max_memory=',
+                                'compress=',
+                                'offline_assets=', 'detail_chunks',
+                                'incremental', 'single_page', 'fleet=',
+                                'heatmap_hosts=', 'top_hosts=', 'rank_by=',
+                                'clock_skew=', 'correlation_window=',
                                 'mask=', 'log=',
                                 'help'] )
   except getopt.GetoptError as err:
@@ -206,6 +293,23 @@ def main():
     start_time = datetime.utcfromtimestamp(0)
     end_time   = datetime.utcfromtimestamp(0)
     max_buckets = DEFAULT_MAX_BUCKETS
+    bucket_alignment = BUCKET_ALIGN_START
+    reduce_mode = REDUCE_AVG
+    series_format = SERIES_FORMAT_JSON
+    jobs = 1
+    parse_jobs = 1
+    max_memory = 0
+    compress = COMPRESS_NONE
+    offline_assets = None
+    detail_chunks = False
+    incremental = False
+    single_page = False
+    fleet = 0
+    heatmap_hosts = DEFAULT_HEATMAP_HOSTS
+    top_hosts = 0
+    rank_by = RANK_IOPS
+    clock_skew = CLOCK_SKEW_NONE
+    correlation_window = DEFAULT_CORRELATION_WINDOW
     date_mask = DATE_FMT_INPUT
     for o, a in opts:
       if o in ('-z', '--zfile'):
@@ -237,6 +341,40 @@ def main():
       # max buckets for testing
       elif o in ('-x', '--max_buckets'):
         max_buckets = int(a)
+      elif o in ('-a', '--align'):
+        bucket_alignment = a.lower()
+      elif o in ('-r', '--reduce'):
+        reduce_mode = a.lower()
+      elif o in ('-s', '--series_format'):
+        series_format = a.lower()
+      elif o in ('-j', '--jobs'):
+        jobs = int(a)
+      elif o == '--parse_jobs':
+        parse_jobs = int(a)
+      elif o == '--max_memory':
+        max_memory = int(a)
+      elif o in ('-c', '--compress'):
+        compress = a.lower()
+      elif o in ('-d', '--offline_assets'):
+        offline_assets = a
+      elif o == '--detail_chunks':
+        detail_chunks = True
+      elif o == '--incremental':
+        incremental = True
+      elif o == '--single_page':
+        single_page = True
+      elif o == '--fleet':
+        fleet = int(a)
+      elif o == '--heatmap_hosts':
+        heatmap_hosts = int(a)
+      elif o == '--top_hosts':
+        top_hosts = int(a)
+      elif o == '--rank_by':
+        rank_by = a.lower()
+      elif o == '--clock_skew':
+        clock_skew = a.lower()
+      elif o == '--correlation_window':
+        correlation_window = int(a)
       # undocumented date mask
       elif o in ('-m', '--mask'):
         date_mask = a
@@ -276,11 +414,49 @@ def main():
     report_context.set_report_context(start_time = start_time,
                                       end_time = end_time,
                                       max_buckets = max_buckets,
-                                      outdir = outdir)
+                                      outdir = outdir,
+                                      bucket_alignment = bucket_alignment,
+                                      reduce_mode = reduce_mode,
+                                      series_format = series_format,
+                                      jobs = jobs,
+                                      parse_jobs = parse_jobs,
+                                      max_memory = max_memory,
+                                      compress = compress,
+                                      offline_assets = offline_assets,
+                                      detail_chunks = detail_chunks,
+                                      single_page = single_page,
+                                      incremental = incremental,
+                                      fleet = fleet,
+                                      heatmap_hosts = heatmap_hosts,
+                                      top_hosts = top_hosts,
+                                      rank_by = rank_by,
+                                      clock_skew = clock_skew,
+                                      correlation_window = correlation_window)
 
   except ValueError as err:
     report_context.log_msg('error','Invalid time: %s - %s (%s): %s' % (user_start_time, user_end_time, date_mask,str(err)),2)
 
+  except InvalidBucketAlignment as err:
+    report_context.log_msg('error','Invalid bucket alignment: %s (expecting one of: %s)' % (bucket_alignment, ', '.join(BUCKET_ALIGNMENTS)),2)
+
+  except InvalidReduceMode as err:
+    report_context.log_msg('error','Invalid reduce mode: %s (expecting one of: %s)' % (reduce_mode, ', '.join(REDUCE_MODES)),2)
+
+  except InvalidSeriesFormat as err:
+    report_context.log_msg('error','Invalid series format: %s (expecting one of: %s)' % (series_format, ', '.join(SERIES_FORMATS)),2)
+
+  except InvalidCompression as err:
+    report_context.log_msg('error','Invalid compression: %s (expecting one of: %s)' % (compress, ', '.join(COMPRESSIONS)),2)
+
+  except InvalidRankMetric as err:
+    report_context.log_msg('error','Invalid rank metric: %s (expecting one of: %s)' % (rank_by, ', '.join(RANK_METRICS)),2)
+
+  except InvalidClockSkewMode as err:
+    report_context.log_msg('error','Invalid clock skew mode: %s (expecting one of: %s)' % (clock_skew, ', '.join(CLOCK_SKEW_MODES)),2)
+
+  except InvalidAssetDir as err:
+    report_context.log_msg('error','Invalid offline assets directory: %s' % offline_assets,2)
+
   except Exception as err:
     report_context.log_msg('error', 'Unable to set report context (%s)' % str(err))
 
@@ -289,8 +465,15 @@ def main():
     # as we call different functions to print charts, each one will add
     # to the html files that it generates to report_context.html_files
 
-    # generate iostat charts
     iostat_files = [ s for s in filelist if 'Iostat' in s ]
+
+    # estimate the clock offsets before parsing, so the samples of all
+    # stat types can be aligned
+    if report_context.clock_skew != CLOCK_SKEW_NONE and len(iostat_files) > 0:
+      report_context.set_clock_offsets(
+        exawparse_io.estimate_clock_offsets(sorted(iostat_files), report_context))
+
+    # generate iostat charts
     if len(iostat_files) > 0:
       # fortify: create a new list
       flash_disks_list = []
@@ -322,6 +505,11 @@ def main():
       # report_context.log_msg('info', 'Files for cellsrvstat: %s' % cs_files)
       exawchart_cs.print_charts(sorted(cs_files),
                                 report_context)
+
+    # correlation of database node and cell metrics, from the series
+    # kept by the parsers
+    if report_context.multihost:
+      exawchart_corr.print_charts(filelist, report_context)
       
     # now get incidents, but only if we are running on the host which
     # matches the filenames we have processed.
@@ -369,26 +557,40 @@ def main():
       hname = report_context.hostnames.keys()[0]
       menu_suffix = hname + '_menu.html'
 
-    try:
-      template_file = open(os.path.join(report_context.template_dir,
-                                        'menu_template.html'),'r')
-      template = template_file.read()
-      template_file.close()
-      
-      (menu_file,menu_title) = report_context.write_html_file(
-                                 menu_suffix,
-                                 'ExaWatcher Charts Menu',
-                                 template % vars())
-    except:
-      report_context.log_msg('error','Unable to read template file: %s' %
-                             os.path.join(report_context.template_dir,
-                                          'menu_template'))
-      
-    # finally create index page (main) page
+    if single_page:
+      # one page holding the menu, the markup of each type of page and the
+      # code, the data of the pages is loaded into it (see exawchart.js)
+      firstPageJson = json.dumps(first_chart)
+      try:
+        pageTemplates = report_context.get_page_templates()
+        report_context.write_template_file('index.html',
+                                           'ExaWatcher Charts Main',
+                                           VIEWER_TEMPLATE,
+                                           vars())
+      except:
+        report_context.log_msg('error','Unable to read template file: %s' %
+                               os.path.join(report_context.template_dir,
+                                            VIEWER_TEMPLATE))
     else:
-      report_context.write_html_file('index.html',
-                                     'ExaWatcher Charts Main',
-                                     HTML_INDEX_TEMPLATE % vars())
+      try:
+        (menu_file,menu_title) = report_context.write_template_file(
+                                   menu_suffix,
+                                   'ExaWatcher Charts Menu',
+                                   'menu_template.html',
+                                   vars())
+      except:
+        report_context.log_msg('error','Unable to read template file: %s' %
+                               os.path.join(report_context.template_dir,
+                                            'menu_template'))
+        
+      # finally create index page (main) page
+      else:
+        report_context.write_html_file('index.html',
+                                       'ExaWatcher Charts Main',
+                                       HTML_INDEX_TEMPLATE % vars())
+
+    # and finish the output, e.g. close the report bundle
+    report_context.close_output()
 
 #
 #------------------------------------------------------------
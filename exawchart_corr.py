@@ -0,0 +1,173 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2016, Oracle and/or its affiliates. All rights reserved.
+#
+#     NAME
+#       exawchart_corr.py
+#
+#     DESCRIPTION
+#       Creates the correlation page, with the metrics of the database
+#       nodes (mpstat) against the metrics of the cells (iostat and
+#       cellsrvstat) on the same bucket axis
+#
+
+#------------------------------------------------------------
+# This module creates the html page with the correlation of database node
+# and cell metrics.  The print_charts() routine is called by exawchart.py
+# after the iostat, mpstat and cellsrvstat charts, as it uses the series
+# that the parsers keep for each host (StatFileSummary.series), so it
+# also works in fleet mode, when the buckets of the hosts are not kept.
+#
+# Hosts with cellsrvstat data are cells, the other hosts with mpstat data
+# are database nodes.  Each metric is averaged over the database nodes
+# or cells, and the page shows the pearson correlation coefficient of
+# each pair of a database node and cell metric, overall and over a
+# rolling window of report_context.correlation_window buckets.
+#------------------------------------------------------------
+
+import os
+import json
+
+from exawutil import JSON_DATE_FMT, get_correlations, iter_series_json
+
+# templates of the page; a change in these regenerates the page with
+# incremental output
+TEMPLATES = [ 'multicell_correlation_template.html' ]
+
+# metrics of the database nodes and of the cells, as (stattype, name of
+# the series, label)
+DB_METRICS = [ ('mpstat', 'cpu_busy', '%busy'),
+               ('mpstat', 'cpu_wio',  '%wio') ]
+CELL_METRICS = [ ('iostat',      'flash_await', 'flash await (ms)'),
+                 ('iostat',      'flash_iops',  'flash IOPS'),
+                 ('cellsrvstat', 'fc_rhit',     'flash cache read hits/s'),
+                 ('cellsrvstat', 'fc_rmiss',    'flash cache read misses/s') ]
+
+#------------------------------------------------------------
+def _get_average_series(report_context, hostnames, stattype, name):
+  '''
+    returns the average of the series name of the stattype of hostnames,
+    indexed by bucket id, None for buckets without data
+  '''
+  totals = None
+  counts = None
+  for host in hostnames:
+    series = getattr(report_context.hostnames[host], stattype).series
+    if name not in series:
+      continue
+    if totals == None:
+      totals = [ 0.0 ] * len(series[name])
+      counts = [ 0 ] * len(series[name])
+    for (i, value) in enumerate(series[name]):
+      if value != None:
+        totals[i] += value
+        counts[i] += 1
+  if totals == None:
+    return None
+  return [ total / count if count > 0 else None
+           for (total, count) in zip(totals, counts) ]
+
+#------------------------------------------------------------
+def _chart_correlation(report_context, db_nodes, cells):
+  '''
+    writes the correlation page, and returns the (filename,title) tuple
+    PARAMETERS:
+      db_nodes: sorted list of database nodes
+      cells   : sorted list of cells
+  '''
+  metrics = []
+  for (hostnames, side, side_metrics) in [ (db_nodes, 'DB nodes', DB_METRICS),
+                                           (cells, 'cells', CELL_METRICS) ]:
+    for (stattype, name, label) in side_metrics:
+      items = _get_average_series(report_context, hostnames, stattype, name)
+      if items == None or items.count(None) == len(items):
+        continue
+      metrics.append({ 'id': name,
+                       'name': '%s %s' % (side, label),
+                       'side': side,
+                       'items': items })
+
+  db_metrics = [ metric for metric in metrics if metric['side'] == 'DB nodes' ]
+  cell_metrics = [ metric for metric in metrics if metric['side'] == 'cells' ]
+  if len(db_metrics) == 0 or len(cell_metrics) == 0:
+    report_context.log_msg('info', 'No correlation page, no database node or cell metrics')
+    return None
+
+  pairs = []
+  selector = []
+  for x in db_metrics:
+    for y in cell_metrics:
+      (correlation, rolling) = get_correlations(x['items'], y['items'],
+                                                report_context.correlation_window)
+      pair_id = x['id'] + '-' + y['id']
+      label = '%s / %s' % (x['name'], y['name'])
+      if correlation != None:
+        label += ' (r = %.2f)' % correlation
+      pairs.append({ 'id': pair_id,
+                     'x': x['id'],
+                     'y': y['id'],
+                     'r': correlation,
+                     'items': rolling })
+      selector.append({ 'value': pair_id, 'label': label })
+
+  # all buckets of the report
+  xAxis = [ report_context.bucket_id_to_timestamp(i).strftime(JSON_DATE_FMT)
+            for i in range(len(metrics[0]['items'])) ]
+
+  # dump json data
+  xAxisJson = json.dumps(xAxis)
+  selectorJson = json.dumps(selector)
+  hostsJson = json.dumps({ 'db': [ host.split('.',1)[0] for host in db_nodes ],
+                           'cell': [ host.split('.',1)[0] for host in cells ] })
+  seriesJson = iter_series_json({ 'metrics': metrics, 'pairs': pairs },
+                                series_format = report_context.series_format)
+  correlationWindow = report_context.correlation_window
+
+  # dump out report context
+  report_context_obj = report_context.get_json_object()
+  reportContextJson = json.dumps(report_context_obj)
+
+  try:
+    (filename,title) = report_context.write_template_file(
+                                      'correlation.html',
+                                      'Correlation',
+                                      'multicell_correlation_template.html',
+                                      vars())
+    return (filename, title)
+
+  except:
+    report_context.log_msg('error','Unable to read template file: %s' %
+                           os.path.join(report_context.template_dir,
+                                        'multicell_correlation_template.html'))
+
+#------------------------------------------------------------
+def print_charts(filelist, report_context):
+  '''
+    main driver, called from exawchart.py after the iostat, mpstat and
+    cellsrvstat charts.  Creates the correlation page (unless unchanged
+    since the previous incremental run) if there are database nodes and
+    cells, and registers it with the multicell pages
+    PARAMETERS:
+      filelist: all files processed, for the fingerprint of the page
+  '''
+  cells = sorted([ host for host in report_context.hostnames
+                   if host != '' and len(report_context.hostnames[host].cellsrvstat.series) > 0 ])
+  db_nodes = sorted([ host for host in report_context.hostnames
+                      if host != '' and host not in cells and len(report_context.hostnames[host].mpstat.series) > 0 ])
+  if len(cells) == 0 or len(db_nodes) == 0:
+    report_context.log_msg('info', 'No correlation page, needs mpstat of database nodes and cellsrvstat of cells')
+    return
+
+  # the page is listed with the multicell pages, after the iostat pages
+  fingerprint = report_context.get_fingerprint(filelist)
+  file_tuples = report_context.get_current_pages('', 'mpstat', fingerprint,
+                                                 TEMPLATES)
+  if file_tuples == None:
+    file_tuples = []
+    file_tuple = _chart_correlation(report_context, db_nodes, cells)
+    if file_tuple != None:
+      file_tuples.append(file_tuple)
+    report_context.record_pages('', 'mpstat', fingerprint, TEMPLATES,
+                                file_tuples)
+  for file_tuple in file_tuples:
+    report_context.add_html_file('', 'mpstat', file_tuple)
@@ -54,15 +54,16 @@ import exawparse_cs
 from exawparse_cs import METRIC_METADATA, METRIC_TYPE, METRIC_LIST, METRIC_DELTA, KEY, DISP_UNIT, CHART_GROUP, CHART_GROUP_IDS
 
 # import constants and common functions frome exawutil
-from exawutil import DATE_FMT_INPUT, VALUE, CNT, DEFAULT_MAX_BUCKETS, TITLE, JSON_DATE_FMT, add_start_end_times, ReportContext
-
-# change json to only dump 6 decimal points for float
-json.encoder.FLOAT_REPR = lambda o: format(o, '.6f')
+from exawutil import DATE_FMT_INPUT, VALUE, CNT, STDDEV, CV, DEFAULT_MAX_BUCKETS, TITLE, JSON_DATE_FMT, add_start_end_times, iter_series_json, map_hosts, shard_by_host, ReportContext
 
 #------------------------------------------------------------
 # globals - this is either set by caller, or created if called using main()
 _my_report_context = None
 
+# templates of the pages for each host; a change in these regenerates
+# the pages with incremental output
+HOST_TEMPLATES = [ 'cellsrv_template.html' ]
+
 #------------------------------------------------------------
 def _build_chart_map():
   '''
@@ -179,7 +180,7 @@ def _print_cellsrv_charts(buckets,
       host_metadata: metadata about host, including name, processed_files,
                metric_keys
       report_context: ReportContext object         
-
+    Returns the (filename, title) tuple of the HTML file generated
   '''
 
   # extract hostname
@@ -270,7 +271,8 @@ def _print_cellsrv_charts(buckets,
   # convert to Json
   xAxisJson = json.dumps(xAxis)
 
-  seriesDataJson = json.dumps(series_data)
+  seriesDataJson = iter_series_json(series_data,
+                                    series_format = report_context.series_format)
 
   # note: chartMetadata also determines the charts that will be displayed
   chartMetadataJson = json.dumps(chart_metadata)
@@ -290,18 +292,14 @@ def _print_cellsrv_charts(buckets,
   reportContextJson = json.dumps(report_context_obj)
 
   # generate the html file, substituting placeholders in CELLSRV_TEMPLATE,
-  # and add the (filename,title) tuple to report context.
+  # and return the (filename,title) tuple
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'cellsrv_template.html'), 'r')
-    template = template_file.read()
-    template_file.close()
-  
-    (filename, title) =  report_context.write_html_file(
+    (filename, title) =  report_context.write_template_file(
                                          hostname + '_cellsrv.html',
                                          'CellSrvStat',
-                                         template % vars())
-    report_context.add_html_file(hostname, 'cellsrvstat', (filename,title) )
+                                         'cellsrv_template.html',
+                                         vars())
+    return (filename, title)
   except:
     report_context.log_msg('error','Unable to read template file: %s' %
                            os.path.join(report_context.template_dir,
@@ -324,21 +322,71 @@ def print_charts(filelist,
   global _my_report_context
   _my_report_context = report_context
 
-  # first parse the files
-  exawparse_cs.parse_input_files(filelist, _my_report_context)
+  # in fleet mode, the hosts are parsed and charted in shards, so memory
+  # use depends on the shard size rather than on the number of hosts
+  if report_context.fleet > 0:
+    shards = shard_by_host(filelist, report_context.fleet)
+    if len(shards) > 1:
+      report_context.set_multihost(True)
+  else:
+    shards = [ filelist ]
+
+  for shard in shards:
+    # first parse the files
+    if report_context.fleet > 0:
+      exawparse_cs.clear_parsed_data()
+      exawparse_cs.parse_input_files(shard, _my_report_context,
+                                     max_hosts = report_context.fleet)
+    else:
+      exawparse_cs.parse_input_files(shard, _my_report_context)
+
+    cellsrvstat_metadata = exawparse_cs.hostnames
+
+    # generate the html file only if we processed files
+    if len(cellsrvstat_metadata) > 0:
+      # TODO: multi-cell processing here, once we decide which stats to
+      # include for multicells
 
-  cellsrvstat_metadata = exawparse_cs.hostnames
+      # and then get info per cell, possibly in parallel, and register
+      # the files in the same order as if done serially
+      hostnames = sorted(cellsrvstat_metadata)
+      host_files = map_hosts(_print_host_charts, hostnames, report_context.jobs)
+      for (hostname, file_tuple) in zip(hostnames, host_files):
+        if file_tuple != None:
+          report_context.record_pages(hostname, 'cellsrvstat',
+                                      _get_host_fingerprint(hostname),
+                                      HOST_TEMPLATES, [ file_tuple ])
+          report_context.add_html_file(hostname, 'cellsrvstat', file_tuple)
 
-  # generate the html file only if we processed files
-  if len(cellsrvstat_metadata) > 0:
-    # TODO: multi-cell processing here, once we decide which stats to
-    # include for multicells
+  if report_context.fleet > 0:
+    exawparse_cs.clear_parsed_data()
+
+#------------------------------------------------------------
+def _get_host_fingerprint(hostname):
+  '''
+    returns fingerprint of the input data of the page for hostname
+  '''
+  return _my_report_context.get_fingerprint(
+           exawparse_cs.hostnames[hostname].processed_files)
+
+#------------------------------------------------------------
+def _print_host_charts(hostname):
+  '''
+    creates the cellsrvstat html page for hostname, and returns the
+    (filename, title) tuple generated.
+    This may run in a worker process (see map_hosts), so it gets the
+    report context and parsed data from the module globals
+  '''
+  # reuse the page of the previous incremental run, if unchanged
+  file_tuples = _my_report_context.get_current_pages(
+                  hostname, 'cellsrvstat', _get_host_fingerprint(hostname),
+                  HOST_TEMPLATES)
+  if file_tuples != None:
+    return file_tuples[0]
 
-    # and then get info per cell
-    for hostname in cellsrvstat_metadata:
-      _print_cellsrv_charts(exawparse_cs.buckets,
-                           cellsrvstat_metadata[hostname],
-                           report_context)
+  return _print_cellsrv_charts(exawparse_cs.buckets,
+                               exawparse_cs.hostnames[hostname],
+                               _my_report_context)
 
 #------------------------------------------------------------
 def process_host_cellsrvstat_summary(report_context, host):
@@ -353,6 +401,7 @@ def process_host_cellsrvstat_summary(report_context, host):
   #
   cs_summary = report_context.hostnames[host].cellsrvstat.summary_stats
   chart_groups = { 'a01': [], 'a03': [], 'a07': [], 'a08': [], 'a09': [] }
+  variability = {}  # keyed by metric key
   for g in METRIC_METADATA:
     gkey = METRIC_METADATA[g][KEY]
     # try to at least have reproducible order of metrics within each group
@@ -367,6 +416,11 @@ def process_host_cellsrvstat_summary(report_context, host):
             title = METRIC_METADATA[g][METRIC_LIST][m][TITLE]
           chart_groups[chart].append( { KEY: key, TITLE: title,
                                         VALUE: cs_summary[key][VALUE] } )
+          # also include variability of the metrics displayed
+          if STDDEV in cs_summary[key]:
+            variability[key] = { TITLE: title,
+                                 STDDEV: cs_summary[key][STDDEV][VALUE],
+                                 CV: cs_summary[key][CV][VALUE] }
 
   # now convert the information into a form consumable by the charts
   series = {}
@@ -386,6 +440,7 @@ def process_host_cellsrvstat_summary(report_context, host):
 
   return {'groups': ['avg'],
           'seriesData': series,
+          'variability': variability,
           'findings'  : report_context.hostnames[host].cellsrvstat.findings,
           'htmlFiles' : report_context.hostnames[host].cellsrvstat.html_files}
   
@@ -339,15 +339,11 @@ def _print_incidents_chart(alert_list,
   # generate HTML file, substituting placeholders in INCIDENT_TEMPLATE,
   # and add (filename,title) tuple to report_context
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'inc_template.html'), 'r')
-    template = template_file.read()
-    template_file.close()
-    
-    (filename, title) = report_context.write_html_file(
+    (filename, title) = report_context.write_template_file(
                                         hostname + '_inc.html',
                                         'Alert History',
-                                        template % vars())
+                                        'inc_template.html',
+                                        vars())
 
     report_context.add_html_file(hostname, 'alerts', (filename,title))
   except:
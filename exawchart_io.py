@@ -41,6 +41,7 @@
 # then this also generates multi-cell charts for
 # . IOStat Summary
 # . CPU Utilization
+# . Heatmap (a row per cell), with at least heatmap_hosts cells
 #
 # The html files uses the JET CDN in order to display the charts.
 #
@@ -64,10 +65,32 @@ import exawparse_io
 import json
   
 # import constants and common functions from exawutil
-from exawutil import DATE_FMT_INPUT, CPU, FLASH, DISK, CNT, USR, NICE, SYS, WIO, STL, IDL, BUSY, RPS, WPS, RSECPS, WSECPS, AVGRQSZ, AVGQUSZ, AWAIT, SVCTM, UTIL, RMBPS, WMBPS, IOPS, MBPS, SUMMARY, AVG, DEFAULT_FLASH_DISKS, DEFAULT_HARD_DISKS, DEFAULT_MAX_BUCKETS, JSON_DATE_FMT, validate_disk_list,validate_disk, add_empty_point, add_start_end_times, ReportContext
+from exawutil import DATE_FMT_INPUT, CPU, FLASH, DISK, CLUSTER, CNT, USR, NICE, SYS, WIO, STL, IDL, BUSY, RPS, WPS, RSECPS, WSECPS, AVGRQSZ, AVGQUSZ, AWAIT, SVCTM, UTIL, RMBPS, WMBPS, IOPS, MBPS, SUMMARY, AVG, STDDEV, CV, DEFAULT_FLASH_DISKS, DEFAULT_HARD_DISKS, DEFAULT_MAX_BUCKETS, JSON_DATE_FMT, SERIES_PRECISION, SERIES_PRECISION_PCT, validate_disk_list,validate_disk, add_empty_point, add_start_end_times, SERIES_PRECISION_DEFAULT, RANK_AWAIT, RANK_UTIL, RANK_IOPS, RANK_UTIL_PERCENTILE, init_variance, update_variance, get_stddev, get_cv, series_to_json, iter_series_json, quantize_matrix, map_hosts, shard_by_host, SeriesSpill, ReportContext
 
-# change json to only dump 6 decimal points for float
-json.encoder.FLOAT_REPR = lambda o: format(o, '.6f')
+#------------------------------------------------------------
+# globals - this is either set by caller, or created if called using main()
+_my_report_context = None
+_my_flash_disks_user = None
+_my_hard_disks_user = None
+
+# templates of the pages for each host, and for multiple hosts; a change
+# in these regenerates the pages with incremental output
+HOST_TEMPLATES = [ 'iosummary_template.html',
+                   'iodetail_template.html',
+                   'cpu_template.html' ]
+MULTICELL_TEMPLATES = [ 'multicell_iosummary_template.html',
+                        'multicell_cpu_template.html',
+                        'multicell_heatmap_template.html' ]
+
+# charts of the multicell IO summary page, the series for each chart is
+# a host
+MULTICELL_STATS = [ IOPS, MBPS, SVCTM, AWAIT, UTIL ]
+# series of each host spilled in fleet mode, for the multicell pages
+FLEET_SERIES_KEYS = [ (disktype, stat) for disktype in [ FLASH, DISK ]
+                                       for stat in MULTICELL_STATS ] + [ (CPU, BUSY) ]
+# charts of the multicell heatmap page, one row per host in each chart
+HEATMAP_SERIES_KEYS = [ (disktype, stat) for disktype in [ FLASH, DISK ]
+                                         for stat in [ IOPS, MBPS, AWAIT, UTIL ] ] + [ (CPU, BUSY) ]
 
 #------------------------------------------------------------
 def _get_label(stat_name):
@@ -101,6 +124,8 @@ def _get_label(stat_name):
     label = '%sys'
   elif stat_name == WIO:
     label = '%wio'
+  elif stat_name == BUSY:
+    label = '%busy'
     
   return label
 
@@ -116,7 +141,7 @@ def _print_cpu_chart(report_context,
       buckets        : parsed results of cpu data, in buckets
       host_metadata  : HostMetadata object that has the information for
                        the host, including name and processed files
-    The HTML file generated will be added to report_context.html_files
+    Returns the (filename, title) tuple of the HTML file generated
   '''
   # get hostname
   hostname = host_metadata.name
@@ -173,7 +198,8 @@ def _print_cpu_chart(report_context,
                'lineWidth': 1,
                'color': '#0094E7',
                'items': data[WIO] } ]
-  seriesJson = json.dumps(series)  
+  seriesJson = iter_series_json(series, SERIES_PRECISION_PCT,
+                                report_context.series_format)
 
   # also get the report context, which is also used by the JET charts
   # to display additional information, e.g. host, start/end times, etc.
@@ -183,18 +209,14 @@ def _print_cpu_chart(report_context,
   reportContextJson = json.dumps(report_context_obj)
 
   # write the html file (substituting placeholders in CPU_TEMPLATE),
-  # and add the (filename,title) tuple into report_context
+  # and return the (filename,title) tuple
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'cpu_template.html'), 'r')
-    template = template_file.read()
-    template_file.close()
-    
-    (filename,title) = report_context.write_html_file(
+    (filename,title) = report_context.write_template_file(
                                        hostname + '_cpu.html',
                                        'CPU Utilization',
-                                       template % vars() )
-    report_context.add_html_file( hostname, 'iostat', (filename,title) )
+                                       'cpu_template.html',
+                                       vars())
+    return (filename, title)
   except Exception as e:
     report_context.log_msg('error','Unable to read template file: %s (%s)' %
                            (os.path.join(report_context.template_dir,
@@ -213,6 +235,7 @@ def _print_summary_chart(report_context,
       buckets        : parsed result of iostat data, in buckets
       host_metadata  : HostMetadata object that has the information for
                        the host, and flash/hard disk list
+    Returns the (filename, title) tuple of the HTML file generated
   '''
   # get hostname
   hostname = host_metadata.name
@@ -335,7 +358,8 @@ def _print_summary_chart(report_context,
         series_data[statgroup][chart_type].append(series_item)
 
   # convert to json
-  seriesJson = json.dumps(series_data)
+  seriesJson = iter_series_json(series_data, SERIES_PRECISION,
+                                report_context.series_format)
 
   # also dump out max capacity for the cell
   capacity = None
@@ -359,17 +383,14 @@ def _print_summary_chart(report_context,
   diskTypesJson = json.dumps(disktypes)
   
   # write the html file (substituting placeholders in SUMMARY_TEMPLATE),
-  # and add the (filename, title) tuple into report_context.
+  # and return the (filename, title) tuple
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'iosummary_template.html'), 'r')
-    template = template_file.read()
-    template_file.close()
-    (filename,title) = report_context.write_html_file(
+    (filename,title) = report_context.write_template_file(
                                        hostname + '_iosummary.html',
                                        'IOStat Summary',
-                                       template % vars())
-    report_context.add_html_file( hostname, 'iostat', (filename,title) )    
+                                       'iosummary_template.html',
+                                       vars())
+    return (filename, title)
 
   except:
     report_context.log_msg('error','Unable to read template file: %s' %
@@ -389,7 +410,7 @@ def _print_detail_charts(report_context,
                the chart; this is created by exawparse_io.parse_input_files
       host_metadata: HostMetadata object which includes hostname, list of
                      flash/hard disks and processed files
-
+    Returns the (filename, title) tuple of the HTML file generated
   '''
   # we want to group this based on how we will be using it in the chart
   # i.e. we have an xAxis for the timestamps
@@ -541,9 +562,19 @@ def _print_detail_charts(report_context,
   # per chart (so clean separation of model:view).  However, that means
   # more javascript code, and since we're inlining the javascript code
   # in the html, we want to minimize that code ...
+  #
+  # With detail_chunks, only the avg series items are in the page, and
+  # the items of each disk are written to a separate file, which the page
+  # loads when the disk is selected:
+  # device_data = { FLASH: { <disk>: { IOPS: [ items ], ... } ... } ... }
+  # device_chunks = { FLASH: { <disk>: <filename> ... } ... }
   series_data = {}
+  device_data = {}
+  device_chunks = {}
   for disktype in [ FLASH, DISK ]:
     series_data[disktype] = {}
+    device_data[disktype] = {}
+    device_chunks[disktype] = {}
     for chart_type in stats:
       series_data[disktype][chart_type] = []
       # include avg bucket as a series
@@ -555,14 +586,34 @@ def _print_detail_charts(report_context,
           series_item['items'] = data[disktype][chart_type][disk]
         else:
           series_item['items'] = None
+        if report_context.detail_chunks and disk != 'avg' and series_item['items'] != None:
+          if disk not in device_data[disktype]:
+            device_data[disktype][disk] = {}
+            device_chunks[disktype][disk] = '%s_iodetail_%s_%s.js' % (hostname, disktype, disk)
+          device_data[disktype][disk][chart_type] = series_item['items']
+          series_item['items'] = None
         series_data[disktype][chart_type].append(series_item)
 
-  seriesJson = json.dumps(series_data)
+  seriesJson = iter_series_json(series_data, SERIES_PRECISION,
+                                report_context.series_format)
+
+  # write out the chunks, these are scripts (rather than json) so they
+  # can be loaded when viewing the page from the filesystem
+  for disktype in device_chunks:
+    for disk in device_chunks[disktype]:
+      report_context.write_side_file(
+        device_chunks[disktype][disk],
+        'exawchartAddChunk(%s, %s);\n' % (json.dumps(device_chunks[disktype][disk]),
+                                          series_to_json(device_data[disktype][disk],
+                                                         SERIES_PRECISION,
+                                                         report_context.series_format)))
+  deviceChunksJson = json.dumps(device_chunks)
 
   # create data arrays with min/max information bound to items for
   # the reference object; note the rest of the reference object is
   # defined in js code, as that has mostly UI information
-  seriesLoHiJson = json.dumps(lohi)
+  seriesLoHiJson = iter_series_json(lohi, SERIES_PRECISION,
+                                    report_context.series_format)
 
   # also dump out list of disks, to populate the disk selector in the UI
   disk_selector = { FLASH: [], DISK: [] }
@@ -590,18 +641,14 @@ def _print_detail_charts(report_context,
   diskTypesJson = json.dumps(disktypes)
   
   # write out html file, substituting placeholders in DETAIL_TEMPLATE,
-  # add the (filename,title) tuple to report context
+  # and return the (filename,title) tuple
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'iodetail_template.html'), 'r')
-    template = template_file.read()
-    template_file.close()
-
-    (filename,title) =  report_context.write_html_file(
+    (filename,title) =  report_context.write_template_file(
                                         hostname + '_iodetail.html',
                                         'IOStat Detail',
-                                        template % vars())
-    report_context.add_html_file( hostname, 'iostat', (filename, title) )
+                                        'iodetail_template.html',
+                                        vars())
+    return (filename, title)
     
   except:
     report_context.log_msg('error', 'Unable to read template file: %s' %
@@ -613,7 +660,8 @@ def _print_detail_charts(report_context,
 #------------------------------------------------------------
 def _chart_multicell_summary(report_context,
                              buckets,
-                             iostat_metadata):
+                             iostat_metadata,
+                             inline_hosts = None):
 
   '''
     This creates the multicell IO summary page
@@ -622,6 +670,9 @@ def _chart_multicell_summary(report_context,
                        bucket interval, num_buckets
       buckets        : parsed result of iostat data, in buckets
       iostat_metadata: HostMetadataIostat object from parsing iostat
+      inline_hosts   : hosts whose series are in the page, the others
+                       are written to a separate file (loaded when the
+                       host is selected); None for all hosts
   '''
   # Required data structures for summary chart
   # data = { FLASH: { IOPS: { host1: [], ... hostn: [] },
@@ -646,7 +697,7 @@ def _chart_multicell_summary(report_context,
       disktypes.append(DISK)
 
   # charts we will display, the series for each chart is a host
-  stats = [ IOPS, MBPS, SVCTM, AWAIT, UTIL ]
+  stats = MULTICELL_STATS
 
   # initialize structures
   xAxis = [] 
@@ -688,8 +739,22 @@ def _chart_multicell_summary(report_context,
                       xAxis,
                       data)
   
+  # aggregate the hosts into the cluster series
+  cluster = _init_cluster(len(xAxis))
+  for host in hostnames:
+    host_series = {}
+    for disktype in disktypes:
+      for stat in stats:
+        host_series[(disktype, stat)] = data[disktype][stat][host]
+    _add_cluster_host(cluster, host_series, disktypes)
+  _process_cluster_rules(report_context, cluster, disktypes)
+
   # now build series Items for easy binding
+  # the items of the hosts that are not inline are written to a separate
+  # file for each host:
+  # host_data = { host: { FLASH: { IOPS: { 'items': [] }, ... } ... } ... }
   series_data = {}
+  host_data = {}
   for disktype in [ FLASH, DISK ]:
     series_data[disktype] = {}
     for chart_type in stats:
@@ -703,19 +768,66 @@ def _chart_multicell_summary(report_context,
           series_item['items'] = data[disktype][chart_type][host]
         else:
           series_item['items'] = None
+        if inline_hosts != None and host not in inline_hosts:
+          host_data.setdefault(host, {}).setdefault(disktype, {})[chart_type] = { 'items': series_item['items'] }
+          series_item['items'] = None
         series_data[disktype][chart_type].append(series_item)  
+      series_data[disktype][chart_type].append(
+        _get_cluster_item(_get_cluster_series(cluster, disktype, chart_type)))
+
+  host_chunks = {}
+  for host in host_data:
+    host_chunks[host] = _write_host_chunk(report_context,
+                                          'iosummary_%s.js' % host,
+                                          host,
+                                          host_data[host],
+                                          SERIES_PRECISION)
+
+  return _write_multicell_summary(report_context,
+                                  hostnames,
+                                  disktypes,
+                                  xAxis,
+                                  iter_series_json(series_data,
+                                                   SERIES_PRECISION,
+                                                   report_context.series_format),
+                                  host_chunks)
 
+#------------------------------------------------------------
+def _write_multicell_summary(report_context,
+                             hostnames,
+                             disktypes,
+                             xAxis,
+                             seriesJson,
+                             host_chunks):
+  '''
+    writes the multicell IO summary page, and returns the (filename,title)
+    tuple
+    PARAMETERS:
+      hostnames : sorted list of hosts
+      disktypes : disk types across all hosts
+      xAxis     : list of timestamps
+      seriesJson: json (or iterator over the json chunks) of the series,
+                  including the cluster series
+      host_chunks: files with the series of the hosts that are not in
+                  seriesJson, keyed by host
+  '''
   # dump out data for populating the selector with the hostnames
   selector = []
   for host in hostnames:
     host_short = host.split('.',1)[0]
     selector.append( {'value': host, 'label': host_short } )
+  selector.append( {'value': CLUSTER, 'label': CLUSTER } )
     
   # now dump json structures
   xAxisJson = json.dumps(xAxis)
-  seriesJson = json.dumps(series_data)
   selectorJson = json.dumps(selector)
 
+  # findings for the cluster aggregate
+  report_context.add_hostinfo('')
+  findingsJson = json.dumps(report_context.hostnames[''].iostat.findings)
+
+  hostChunksJson = json.dumps(host_chunks)
+
   # dump out report context information, that will be displayed in the
   # html page
   report_context_obj = report_context.get_json_object()
@@ -725,20 +837,14 @@ def _chart_multicell_summary(report_context,
   diskTypesJson = json.dumps(disktypes)
 
   # write out html file, substituting placeholders in
-  # MULTICELL_SUMMARY_TEMPLATE, and add the (filename,title) tuple to
-  # report_context
+  # MULTICELL_SUMMARY_TEMPLATE, and return the (filename,title) tuple
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'multicell_iosummary_template.html'),
-                         'r')
-    template = template_file.read()
-    template_file.close()
-
-    (filename,title) = report_context.write_html_file(
+    (filename,title) = report_context.write_template_file(
                                        'iosummary.html',
                                        'IO Summary',
-                                       template  % vars())
-    report_context.add_html_file('', 'iostat', (filename, title) )
+                                       'multicell_iosummary_template.html',
+                                       vars())
+    return (filename, title)
 
   except:
     report_context.log_msg('error','Unable to read template file: %s' %
@@ -749,7 +855,8 @@ def _chart_multicell_summary(report_context,
 #------------------------------------------------------------
 def _chart_multicell_cpu(report_context,
                          buckets,
-                         iostat_metadata):
+                         iostat_metadata,
+                         inline_hosts = None):
   '''
     This creates the multicell cpu page, which just displays % busy
     PARAMETERS:
@@ -757,6 +864,8 @@ def _chart_multicell_cpu(report_context,
                        bucket interval, num_buckets
       buckets        : parsed result of iostat data, in buckets
       iostat_metadata: HostMetadataIostat object from parsing iostat
+      inline_hosts   : hosts whose series are in the page, None for all
+                       hosts (see _chart_multicell_summary)
   '''
   # Required data structure::
   # . each series is a hostname
@@ -798,46 +907,372 @@ def _chart_multicell_cpu(report_context,
 
   # create series items for easy binding in javascript
   seriesData = []
+  host_chunks = {}
   for host in sorted(data):
-    seriesData.append( { 'id': host,
-                         'name': host.split('.',1)[0],
-                         'lineWidth': 1,
-                         'items': data[host] } )
+    series_item = { 'id': host,
+                    'name': host.split('.',1)[0],
+                    'lineWidth': 1,
+                    'items': data[host] }
+    if inline_hosts != None and host not in inline_hosts:
+      host_chunks[host] = _write_host_chunk(report_context,
+                                            'cpu_%s.js' % host,
+                                            host,
+                                            { 'items': data[host] },
+                                            SERIES_PRECISION_PCT)
+      series_item['items'] = None
+    seriesData.append(series_item)
+
+  return _write_multicell_cpu(report_context,
+                              sorted(iostat_metadata),
+                              xAxis,
+                              iter_series_json(seriesData,
+                                               SERIES_PRECISION_PCT,
+                                               report_context.series_format),
+                              host_chunks)
 
+#------------------------------------------------------------
+def _write_multicell_cpu(report_context,
+                         hostnames,
+                         xAxis,
+                         seriesJson,
+                         host_chunks):
+  '''
+    writes the multicell cpu page, and returns the (filename,title) tuple
+    PARAMETERS:
+      hostnames : sorted list of hosts
+      xAxis     : list of timestamps
+      seriesJson: json (or iterator over the json chunks) of the series
+      host_chunks: files with the series of the hosts that are not in
+                  seriesJson, keyed by host
+  '''
   # create selector for hostnames
   selector = []
-  for host in sorted(iostat_metadata):
+  for host in hostnames:
     host_short = host.split('.',1)[0]
     selector.append( {'value': host, 'label': host_short } )
 
   # dump json data
   xAxisJson = json.dumps(xAxis)
-  seriesJson = json.dumps(seriesData)
   selectorJson = json.dumps(selector)
+  hostChunksJson = json.dumps(host_chunks)
 
   # dump out report context
   report_context_obj = report_context.get_json_object()
   reportContextJson = json.dumps(report_context_obj)
 
   # write out html file, substituting placeholders in MULTICELL_CPU_TEMPLATE,
-  # and add the (filename,title) tuple to report_context
+  # and return the (filename,title) tuple
   try:
-    template_file = open(os.path.join(report_context.template_dir,
-                                      'multicell_cpu_template.html'), 'r')
-    template = template_file.read()
-    template_file.close()
-    
-    (filename,title) = report_context.write_html_file(
+    (filename,title) = report_context.write_template_file(
                                       'cpu.html',
                                       'CPU Utilization',
-                                      template % vars())
-    report_context.add_html_file('', 'iostat', (filename, title) )
+                                      'multicell_cpu_template.html',
+                                      vars())
+    return (filename, title)
 
   except:
     report_context.log_msg('error','Unable to read template file: %s' %
                            os.path.join(report_context.template_dir,
                                         'multicell_cpu_template.html'))  
 
+#------------------------------------------------------------
+def _init_cluster(length):
+  '''
+    returns the accumulators of the cluster aggregate (all hosts) for the
+    multicell IO summary, with length datapoints, see _add_cluster_host()
+  '''
+  cluster = {}
+  for disktype in [ FLASH, DISK ]:
+    cluster[disktype] = {}
+    for key in [ CNT ] + MULTICELL_STATS:
+      cluster[disktype][key] = [ 0 ] * length
+  return cluster
+
+#------------------------------------------------------------
+def _add_cluster_host(cluster, series, disktypes):
+  '''
+    adds the multicell series of a host to the cluster aggregate, which
+    is the sum of IOPS and MB/s, the IOPS weighted mean of the service
+    and wait times, and the maximum utilization across hosts
+    PARAMETERS:
+      series   : series of the host keyed by (disktype, stat), indexed
+                 like the accumulators, with None (or NaN) for missing
+                 datapoints, e.g. from _get_multicell_series()
+      disktypes: disk types in series
+  '''
+  for disktype in disktypes:
+    acc = cluster[disktype]
+    iops = series[(disktype, IOPS)]
+    for i in xrange(len(acc[CNT])):
+      # NaN is the only value not equal to itself
+      if iops[i] is None or iops[i] != iops[i]:
+        continue
+      acc[CNT][i] += 1
+      acc[IOPS][i] += iops[i]
+      for stat in [ MBPS, SVCTM, AWAIT, UTIL ]:
+        value = series[(disktype, stat)][i]
+        if value is None or value != value:
+          continue
+        if stat == MBPS:
+          acc[stat][i] += value
+        elif stat == UTIL:
+          acc[stat][i] = max(acc[stat][i], value)
+        else:
+          acc[stat][i] += value * iops[i]
+
+#------------------------------------------------------------
+def _get_cluster_series(cluster, disktype, stat):
+  '''
+    returns the datapoints of the cluster aggregate for disktype and stat,
+    with None where no host has data
+  '''
+  acc = cluster[disktype]
+  items = []
+  for i in xrange(len(acc[CNT])):
+    if acc[CNT][i] == 0:
+      items.append(None)
+    elif stat in [ SVCTM, AWAIT ]:
+      # no IOs, so no time spent
+      if acc[IOPS][i] > 0:
+        items.append(float(acc[stat][i]) / acc[IOPS][i])
+      else:
+        items.append(0.0)
+    else:
+      items.append(acc[stat][i])
+  return items
+
+#------------------------------------------------------------
+def _get_cluster_item(items):
+  '''
+    returns the series item of the cluster aggregate, which is not
+    stacked with the hosts when the IOPs and MB/s are aggregated
+  '''
+  return { 'id': CLUSTER,
+           'name': CLUSTER,
+           'lineWidth': 2,
+           'stackCategory': CLUSTER,
+           'items': items }
+
+#------------------------------------------------------------
+def _process_cluster_rules(report_context, cluster, disktypes):
+  '''
+    summarizes the cluster aggregate over the report interval, like the
+    summary of each host (averages over the buckets, IOPS weighted
+    service/wait times, and the variation of IOPS), and processes the
+    rules for it (see exawparse_io.process_cluster_rules)
+  '''
+  cluster_summary = {}
+  for disktype in disktypes:
+    acc = cluster[disktype]
+    totals = {}
+    for stat in MULTICELL_STATS:
+      totals[stat] = 0.0
+    iops_var = init_variance()
+    count = 0
+    for i in xrange(len(acc[CNT])):
+      if acc[CNT][i] == 0:
+        continue
+      count += 1
+      for stat in MULTICELL_STATS:
+        totals[stat] += acc[stat][i]
+      update_variance(iops_var, acc[IOPS][i])
+    if count == 0:
+      continue
+
+    summary = { IOPS: totals[IOPS] / count,
+                MBPS: totals[MBPS] / count,
+                SVCTM: 0.0,
+                AWAIT: 0.0,
+                # summary is a percentage
+                UTIL: 100 * totals[UTIL] / count,
+                STDDEV: { IOPS: get_stddev(iops_var) },
+                CV: { IOPS: get_cv(iops_var) } }
+    if totals[IOPS] > 0:
+      summary[SVCTM] = totals[SVCTM] / totals[IOPS]
+      summary[AWAIT] = totals[AWAIT] / totals[IOPS]
+    cluster_summary[disktype] = { SUMMARY: summary }
+
+  exawparse_io.process_cluster_rules(report_context, cluster_summary)
+
+#------------------------------------------------------------
+def _get_rank_values(series):
+  '''
+    returns the values to rank a host by (keyed by RANK_METRICS) from its
+    multicell series (see _get_multicell_series), computed in one pass
+    over the buckets: peak wait time, RANK_UTIL_PERCENTILE percentile of
+    utilization and total IOPS, for flash and hard disks together
+  '''
+  peak_await = 0.0
+  total_iops = 0.0
+  utils = []
+  for i in xrange(len(series[(FLASH, IOPS)])):
+    util = None
+    for disktype in [ FLASH, DISK ]:
+      # NaN is the only value not equal to itself
+      value = series[(disktype, AWAIT)][i]
+      if value is not None and value == value:
+        peak_await = max(peak_await, value)
+      value = series[(disktype, IOPS)][i]
+      if value is not None and value == value:
+        total_iops += value
+      value = series[(disktype, UTIL)][i]
+      if value is not None and value == value:
+        util = max(util, value)
+    if util is not None:
+      utils.append(util)
+
+  util_percentile = 0.0
+  if len(utils) > 0:
+    utils.sort()
+    pos = int(math.ceil(len(utils) * RANK_UTIL_PERCENTILE / 100.0)) - 1
+    util_percentile = utils[max(0, pos)]
+  return { RANK_AWAIT: peak_await,
+           RANK_UTIL: util_percentile,
+           RANK_IOPS: total_iops }
+
+#------------------------------------------------------------
+def _get_inline_hosts(report_context, rank_values):
+  '''
+    returns the hosts whose series are in the multicell pages: the top
+    report_context.top_hosts hosts ranked by report_context.rank_by, or
+    None for all hosts
+    PARAMETERS:
+      rank_values: values from _get_rank_values() keyed by host
+  '''
+  if report_context.top_hosts == 0 or len(rank_values) <= report_context.top_hosts:
+    return None
+  ranked = sorted(rank_values,
+                  key = lambda host: (-rank_values[host][report_context.rank_by], host))
+  report_context.log_msg('info', 'Top hosts by %s: %s' %
+                         (report_context.rank_by,
+                          ', '.join(ranked[:report_context.top_hosts])))
+  return set(ranked[:report_context.top_hosts])
+
+#------------------------------------------------------------
+def _write_host_chunk(report_context, filename, hostname, host_data,
+                      precision):
+  '''
+    writes the series of hostname that are not in a multicell page to
+    filename, a script that the page loads when the host is selected, and
+    returns filename.  This is a script (rather than json) so it can be
+    loaded when viewing the page from the filesystem, it passes the
+    series to exawchartAddChunk (see exawchart.js) with its filename
+  '''
+  report_context.write_side_file(
+    filename,
+    'exawchartAddChunk(%s, %s);\n' % (json.dumps(filename),
+                                      series_to_json(host_data,
+                                                     precision,
+                                                     report_context.series_format)))
+  return filename
+
+#------------------------------------------------------------
+def _has_heatmap(report_context, num_hosts):
+  '''
+    returns True if the multicell pages include the heatmap page, for a
+    report with num_hosts hosts
+  '''
+  return (report_context.heatmap_hosts > 0 and
+          num_hosts >= report_context.heatmap_hosts)
+
+#------------------------------------------------------------
+def _chart_multicell_heatmap(report_context,
+                             buckets,
+                             iostat_metadata):
+  '''
+    This creates the multicell heatmap page, with a row per host and a
+    column per bucket, for the IO summary and cpu charts
+    PARAMETERS:
+      report_context : ReportContext to process, includes time range,
+                       bucket interval, num_buckets
+      buckets        : parsed result of iostat data, in buckets
+      iostat_metadata: HostMetadataIostat object from parsing iostat
+  '''
+  # check which disk types we have across all hosts
+  disktypes = []
+  for host in iostat_metadata:
+    if FLASH not in disktypes and len(iostat_metadata[host].flash_disks) > 0:
+      disktypes.append(FLASH)
+    if DISK not in disktypes and len(iostat_metadata[host].hard_disks) > 0:
+      disktypes.append(DISK)
+
+  # same datapoints as the multicell IO summary and cpu pages
+  num_series = max(buckets) + 1
+  series = {}
+  for host in iostat_metadata:
+    series[host] = _get_multicell_series(buckets, host,
+                                         lambda: [ None ] * num_series)
+
+  return _write_multicell_heatmap(
+           report_context,
+           sorted(iostat_metadata),
+           disktypes,
+           _get_multicell_xaxis(report_context, buckets),
+           lambda host, key: _get_multicell_items(report_context,
+                                                  series[host][key],
+                                                  buckets))
+
+#------------------------------------------------------------
+def _write_multicell_heatmap(report_context,
+                             hostnames,
+                             disktypes,
+                             xAxis,
+                             get_items):
+  '''
+    writes the multicell heatmap page, and returns the (filename,title)
+    tuple.  Each chart is one matrix (a row per host, a column per
+    bucket) quantized to one byte per value (see quantize_matrix), so the
+    page grows with hosts x buckets bytes rather than with a json series
+    per host
+    PARAMETERS:
+      hostnames : sorted list of hosts
+      disktypes : disk types across all hosts
+      xAxis     : list of timestamps
+      get_items : function (host, key) returning the datapoints of host
+                  for the key in HEATMAP_SERIES_KEYS, over xAxis
+  '''
+  # one chart at a time, so only one matrix is in memory
+  heatmaps = []
+  for (disktype, stat) in HEATMAP_SERIES_KEYS:
+    if disktype != CPU and disktype not in disktypes:
+      continue
+    heatmap = quantize_matrix([ get_items(host, (disktype, stat))
+                                for host in hostnames ])
+    heatmap['id'] = disktype + '_' + stat
+    heatmap['label'] = disktype + ' ' + _get_label(stat)
+    # chart displays percentage
+    heatmap['pct'] = stat in [ UTIL, BUSY ]
+    heatmaps.append(heatmap)
+
+  # hostnames are the rows of each chart
+  hosts = []
+  for host in hostnames:
+    hosts.append( {'value': host, 'label': host.split('.',1)[0] } )
+
+  # dump json structures
+  xAxisJson = json.dumps(xAxis)
+  hostsJson = json.dumps(hosts)
+  heatmapsJson = json.dumps(heatmaps)
+
+  # dump out report context
+  report_context_obj = report_context.get_json_object()
+  reportContextJson = json.dumps(report_context_obj)
+
+  # write out html file, substituting placeholders in
+  # MULTICELL_HEATMAP_TEMPLATE, and return the (filename,title) tuple
+  try:
+    (filename,title) = report_context.write_template_file(
+                                      'heatmap.html',
+                                      'Heatmap',
+                                      'multicell_heatmap_template.html',
+                                      vars())
+    return (filename, title)
+
+  except:
+    report_context.log_msg('error','Unable to read template file: %s' %
+                           os.path.join(report_context.template_dir,
+                                        'multicell_heatmap_template.html'))
+
 #------------------------------------------------------------
 def print_charts(filelist,
                  flash_disks_user,
@@ -850,6 +1285,16 @@ def print_charts(filelist,
     python modules (e.g. exawchart.py - wrapper for generating all charts)
   '''
 
+  global _my_report_context, _my_flash_disks_user, _my_hard_disks_user
+  _my_report_context = report_context
+  _my_flash_disks_user = flash_disks_user
+  _my_hard_disks_user = hard_disks_user
+
+  # in fleet mode, the hosts are parsed and charted in shards
+  if report_context.fleet > 0:
+    _print_fleet_charts(filelist, report_context)
+    return
+
   #first parse the files
   exawparse_io.parse_input_files(filelist,
                                  report_context,
@@ -864,28 +1309,388 @@ def print_charts(filelist,
 
     # first get multihost summary, if we have data from multiple hosts
     if report_context.multihost:
-        
-      _chart_multicell_summary(report_context,
-                               exawparse_io.buckets,
-                               iostat_metadata)
-      _chart_multicell_cpu(report_context,
-                           exawparse_io.buckets,
-                           iostat_metadata)
+      # rank the hosts, if only the top hosts are in the pages
+      inline_hosts = None
+      if report_context.top_hosts > 0:
+        num_series = max(exawparse_io.buckets) + 1
+        rank_values = {}
+        for host in iostat_metadata:
+          rank_values[host] = _get_rank_values(
+                                _get_multicell_series(exawparse_io.buckets,
+                                                      host,
+                                                      lambda: [ None ] * num_series))
+        inline_hosts = _get_inline_hosts(report_context, rank_values)
+
+      chart_multicells = [ lambda: _chart_multicell_summary(report_context,
+                                                            exawparse_io.buckets,
+                                                            iostat_metadata,
+                                                            inline_hosts),
+                           lambda: _chart_multicell_cpu(report_context,
+                                                        exawparse_io.buckets,
+                                                        iostat_metadata,
+                                                        inline_hosts) ]
+      if _has_heatmap(report_context, len(iostat_metadata)):
+        chart_multicells.append(
+          lambda: _chart_multicell_heatmap(report_context,
+                                           exawparse_io.buckets,
+                                           iostat_metadata))
+      _print_multicell_charts(
+        report_context,
+        sum([ iostat_metadata[hostname].processed_files
+              for hostname in iostat_metadata ], []),
+        chart_multicells)
        
     # and then get chart for each host
-    for hostname in exawparse_io.hostnames:
-      _print_summary_chart(report_context,
-                           exawparse_io.buckets,
-                           iostat_metadata[hostname])
+    _print_hosts_charts(report_context, sorted(exawparse_io.hostnames))
+
+#------------------------------------------------------------
+def _print_multicell_charts(report_context, processed_files, chart_multicells):
+  '''
+    creates the multicell pages (unless unchanged since the previous
+    incremental run) and registers the files
+    PARAMETERS:
+      processed_files : files processed for all hosts
+      chart_multicells: functions (without arguments) each creating a
+                        page, and returning its (filename,title) tuple
+  '''
+  fingerprint = report_context.get_fingerprint(processed_files,
+                                               _my_flash_disks_user,
+                                               _my_hard_disks_user)
+  file_tuples = report_context.get_current_pages('', 'iostat',
+                                                 fingerprint,
+                                                 MULTICELL_TEMPLATES)
+  if file_tuples == None:
+    file_tuples = []
+    for chart_multicell in chart_multicells:
+      file_tuple = chart_multicell()
+      if file_tuple != None:
+        file_tuples.append(file_tuple)
+    report_context.record_pages('', 'iostat', fingerprint,
+                                MULTICELL_TEMPLATES, file_tuples,
+                                report_context.take_side_files())
+  for file_tuple in file_tuples:
+    report_context.add_html_file('', 'iostat', file_tuple )
+
+#------------------------------------------------------------
+def _print_hosts_charts(report_context, hostnames):
+  '''
+    creates the pages for each of the (parsed) hostnames, possibly in
+    parallel, and registers the files in the same order as if done serially
+  '''
+  host_files = map_hosts(_print_host_charts, hostnames, report_context.jobs)
+  for (hostname, (file_tuples, side_files)) in zip(hostnames, host_files):
+    report_context.record_pages(hostname, 'iostat',
+                                _get_host_fingerprint(hostname),
+                                HOST_TEMPLATES, file_tuples, side_files)
+    for file_tuple in file_tuples:
+      report_context.add_html_file( hostname, 'iostat', file_tuple )
+
+#------------------------------------------------------------
+def _print_fleet_charts(filelist, report_context):
+  '''
+    fleet mode of print_charts(): parses and charts the hosts in shards of
+    report_context.fleet hosts, and spills the series of each host for
+    the multicell pages, which are created from the spill (one host at
+    a time) once all hosts are processed.  So memory use depends on the
+    shard size rather than on the number of hosts
+  '''
+  last_bucket_id = report_context.get_bucket_id(report_context.report_end_time)
+  spill = SeriesSpill(FLEET_SERIES_KEYS, last_bucket_id + 1)
+  # cluster aggregate, indexed by bucket id
+  cluster = _init_cluster(last_bucket_id + 1)
+  # values to rank the hosts by, keyed by hostname
+  rank_values = {}
+  # across all hosts: buckets with data, disk types and processed files
+  bucket_ids = set()
+  disktypes = []
+  processed_files = []
+  try:
+    shards = shard_by_host(filelist, report_context.fleet)
+    if len(shards) > 1:
+      report_context.set_multihost(True)
+    for shard in shards:
+      exawparse_io.clear_parsed_data()
+      exawparse_io.parse_input_files(shard,
+                                     report_context,
+                                     flash_disks_user = _my_flash_disks_user,
+                                     hard_disks_user  = _my_hard_disks_user,
+                                     max_hosts = report_context.fleet)
+      hostnames = sorted(exawparse_io.hostnames)
+      _print_hosts_charts(report_context, hostnames)
+
+      for hostname in hostnames:
+        host_metadata = exawparse_io.hostnames[hostname]
+        host_series = _get_multicell_series(exawparse_io.buckets,
+                                            hostname,
+                                            spill.new_series)
+        spill.add_host(hostname, host_series)
+        _add_cluster_host(cluster, host_series, [ FLASH, DISK ])
+        rank_values[hostname] = _get_rank_values(host_series)
+        processed_files.extend(host_metadata.processed_files)
+        if FLASH not in disktypes and len(host_metadata.flash_disks) > 0:
+          disktypes.append(FLASH)
+        if DISK not in disktypes and len(host_metadata.hard_disks) > 0:
+          disktypes.append(DISK)
+      bucket_ids.update(exawparse_io.buckets)
+    exawparse_io.clear_parsed_data()
+
+    # multicell pages, if we have data from multiple hosts
+    if len(spill.hostnames()) > 1 and len(bucket_ids) > 0:
+      report_context.set_multihost(True)
+      inline_hosts = _get_inline_hosts(report_context, rank_values)
+      chart_multicells = [ lambda: _chart_fleet_summary(report_context, spill,
+                                                        cluster, bucket_ids,
+                                                        disktypes,
+                                                        inline_hosts),
+                           lambda: _chart_fleet_cpu(report_context, spill,
+                                                    bucket_ids,
+                                                    inline_hosts) ]
+      if _has_heatmap(report_context, len(spill.hostnames())):
+        chart_multicells.append(
+          lambda: _chart_fleet_heatmap(report_context, spill, bucket_ids,
+                                       disktypes))
+      _print_multicell_charts(report_context,
+                              processed_files,
+                              chart_multicells)
+  finally:
+    spill.close()
+
+#------------------------------------------------------------
+def _get_multicell_series(buckets, hostname, new_series):
+  '''
+    returns the series of hostname for the multicell pages, keyed by
+    FLEET_SERIES_KEYS, with the same values as _chart_multicell_summary()
+    and _chart_multicell_cpu() use from the buckets
+    PARAMETERS:
+      new_series: function (without arguments) returning an empty series,
+                  indexed by bucket id
+  '''
+  series = {}
+  for key in FLEET_SERIES_KEYS:
+    series[key] = new_series()
+  for (i, bucket) in buckets.iteritems():
+    if hostname not in bucket:
+      continue
+    for disktype in [ FLASH, DISK ]:
+      if disktype in bucket[hostname] and SUMMARY in bucket[hostname][disktype]:
+        summary_bucket = bucket[hostname][disktype][SUMMARY]
+        for stat in MULTICELL_STATS:
+          if summary_bucket[stat] == None:
+            continue
+          if stat == UTIL:
+            series[(disktype, stat)][i] = summary_bucket[stat]/100
+          else:
+            series[(disktype, stat)][i] = summary_bucket[stat]
+    if CPU in bucket[hostname]:
+      series[(CPU, BUSY)][i] = bucket[hostname][CPU][BUSY]/100
+  return series
+
+#------------------------------------------------------------
+def _get_multicell_items(report_context, series, bucket_ids):
+  '''
+    returns the items (datapoints) of series (from _get_multicell_series),
+    over the same buckets as _chart_multicell_summary(), i.e. from the
+    first to the last bucket with data, and the start/end points if
+    required (see add_start_end_times)
+  '''
+  items = series[min(bucket_ids):max(bucket_ids) + 1]
+  if 0 not in bucket_ids:
+    items.insert(0, None)
+  if report_context.get_bucket_id(report_context.report_end_time) not in bucket_ids:
+    items.append(None)
+  return items
 
+#------------------------------------------------------------
+def _get_multicell_xaxis(report_context, bucket_ids):
+  '''
+    returns the x-axis of the multicell pages for the buckets with data
+  '''
+  xAxis = []
+  for i in range(min(bucket_ids), max(bucket_ids) + 1):
+    xAxis.append(report_context.bucket_id_to_timestamp(i).strftime(JSON_DATE_FMT))
+  add_start_end_times(report_context,
+                      bucket_ids,
+                      xAxis,
+                      {})
+  return xAxis
 
-      _print_detail_charts(report_context,
-                           exawparse_io.buckets,
-                           iostat_metadata[hostname])
+#------------------------------------------------------------
+def _chart_fleet_summary(report_context, spill, cluster, bucket_ids,
+                         disktypes, inline_hosts):
+  '''
+    creates the multicell IO summary page in fleet mode, from the spill
+    and the cluster aggregate
+  '''
+  hostnames = spill.hostnames()
+  _process_cluster_rules(report_context, cluster, disktypes)
 
-      _print_cpu_chart(report_context,
-                       exawparse_io.buckets,
-                       iostat_metadata[hostname])
+  # series of the hosts that are not inline, one host at a time
+  host_chunks = {}
+  for host in hostnames:
+    if inline_hosts == None or host in inline_hosts:
+      continue
+    host_data = {}
+    for disktype in [ FLASH, DISK ]:
+      host_data[disktype] = {}
+      for stat in MULTICELL_STATS:
+        host_data[disktype][stat] = { 'items': [] }
+        if disktype in disktypes:
+          host_data[disktype][stat]['items'] = _get_multicell_items(
+                                                 report_context,
+                                                 spill.get_series(host, (disktype, stat)),
+                                                 bucket_ids)
+    host_chunks[host] = _write_host_chunk(report_context,
+                                          'iosummary_%s.js' % host,
+                                          host,
+                                          host_data,
+                                          SERIES_PRECISION)
+
+  # same series as _chart_multicell_summary(), but created as the page
+  # is written, one host at a time
+  def iter_series():
+    sep = '{'
+    for disktype in [ FLASH, DISK ]:
+      yield sep + json.dumps(disktype) + ':'
+      sep = ','
+      stat_sep = '{'
+      for stat in MULTICELL_STATS:
+        yield stat_sep + json.dumps(stat) + ':'
+        stat_sep = ','
+        host_sep = '['
+        for host in hostnames:
+          yield host_sep
+          host_sep = ','
+          series_item = { 'id': host,
+                          'name': host.split('.',1)[0],
+                          'lineWidth': 1,
+                          'items': [] }
+          if host in host_chunks:
+            series_item['items'] = None
+          elif disktype in disktypes:
+            series_item['items'] = _get_multicell_items(
+                                    report_context,
+                                    spill.get_series(host, (disktype, stat)),
+                                    bucket_ids)
+          yield series_to_json(series_item,
+                               SERIES_PRECISION.get(stat,
+                                                    SERIES_PRECISION_DEFAULT),
+                               report_context.series_format)
+        yield host_sep
+        yield series_to_json(_get_cluster_item(_get_multicell_items(
+                               report_context,
+                               _get_cluster_series(cluster, disktype, stat),
+                               bucket_ids)),
+                             SERIES_PRECISION.get(stat,
+                                                  SERIES_PRECISION_DEFAULT),
+                             report_context.series_format)
+        yield ']'
+      yield '}'
+    yield '}'
+
+  return _write_multicell_summary(report_context,
+                                  hostnames,
+                                  disktypes,
+                                  _get_multicell_xaxis(report_context, bucket_ids),
+                                  iter_series(),
+                                  host_chunks)
+
+#------------------------------------------------------------
+def _chart_fleet_cpu(report_context, spill, bucket_ids, inline_hosts):
+  '''
+    creates the multicell cpu page in fleet mode, from the spill
+  '''
+  hostnames = spill.hostnames()
+
+  # series of the hosts that are not inline, one host at a time
+  host_chunks = {}
+  for host in hostnames:
+    if inline_hosts == None or host in inline_hosts:
+      continue
+    host_chunks[host] = _write_host_chunk(
+                          report_context,
+                          'cpu_%s.js' % host,
+                          host,
+                          { 'items': _get_multicell_items(report_context,
+                                                          spill.get_series(host, (CPU, BUSY)),
+                                                          bucket_ids) },
+                          SERIES_PRECISION_PCT)
+
+  # same series as _chart_multicell_cpu(), but created as the page is
+  # written, one host at a time
+  def iter_series():
+    sep = '['
+    for host in hostnames:
+      yield sep
+      sep = ','
+      series_item = { 'id': host,
+                      'name': host.split('.',1)[0],
+                      'lineWidth': 1,
+                      'items': None }
+      if host not in host_chunks:
+        series_item['items'] = _get_multicell_items(
+                                 report_context,
+                                 spill.get_series(host, (CPU, BUSY)),
+                                 bucket_ids)
+      yield series_to_json(series_item,
+                           SERIES_PRECISION_PCT,
+                           report_context.series_format)
+    yield '[]' if sep == '[' else ']'
+
+  return _write_multicell_cpu(report_context,
+                              hostnames,
+                              _get_multicell_xaxis(report_context, bucket_ids),
+                              iter_series(),
+                              host_chunks)
+
+#------------------------------------------------------------
+def _chart_fleet_heatmap(report_context, spill, bucket_ids, disktypes):
+  '''
+    creates the multicell heatmap page in fleet mode, from the spill
+  '''
+  return _write_multicell_heatmap(
+           report_context,
+           spill.hostnames(),
+           disktypes,
+           _get_multicell_xaxis(report_context, bucket_ids),
+           lambda host, key: _get_multicell_items(report_context,
+                                                  spill.get_series(host, key),
+                                                  bucket_ids))
+
+#------------------------------------------------------------
+def _get_host_fingerprint(hostname):
+  '''
+    returns fingerprint of the input data of the pages for hostname
+  '''
+  return _my_report_context.get_fingerprint(
+           exawparse_io.hostnames[hostname].processed_files,
+           _my_flash_disks_user, _my_hard_disks_user)
+
+#------------------------------------------------------------
+def _print_host_charts(hostname):
+  '''
+    creates the summary, detail and cpu html pages for hostname, and
+    returns (file_tuples, side_files): the list of (filename, title)
+    tuples generated, and the files the pages load (see take_side_files).
+    This may run in a worker process (see map_hosts), so it gets the
+    report context and parsed data from the module globals
+  '''
+  # reuse the pages of the previous incremental run, if unchanged
+  file_tuples = _my_report_context.get_current_pages(
+                  hostname, 'iostat', _get_host_fingerprint(hostname),
+                  HOST_TEMPLATES)
+  if file_tuples != None:
+    return (file_tuples, [])
+
+  file_tuples = []
+  for print_chart in [ _print_summary_chart,
+                       _print_detail_charts,
+                       _print_cpu_chart ]:
+    file_tuple = print_chart(_my_report_context,
+                             exawparse_io.buckets,
+                             exawparse_io.hostnames[hostname])
+    if file_tuple != None:
+      file_tuples.append(file_tuple)
+  return (file_tuples, _my_report_context.take_side_files())
 
 #------------------------------------------------------------
 def process_host_iostat_summary(report_context, host):
@@ -899,6 +1704,10 @@ def process_host_iostat_summary(report_context, host):
   # initialize return objects
   series = {}
   findings = []
+  # stddev and cv (of per-sample totals across all disks) per disktype
+  # variability = { STDDEV: { IOPS: [ flash val, disk val ] ... },
+  #                 CV:     { IOPS: [ flash val, disk val ] ... } }
+  variability = { STDDEV: {}, CV: {} }
   
   # format we want for the bar charts will be
   # series = { iops: [{ name: r/s, items: [ flash val, disk val ] },
@@ -915,7 +1724,7 @@ def process_host_iostat_summary(report_context, host):
     for stat in [ RPS, WPS, RMBPS, WMBPS, SVCTM, AWAIT, UTIL ]:
       if stat not in data:
         data[stat] = []
-      for disktype in iostat_summary:
+      for disktype in sorted(iostat_summary):
         if SUMMARY in iostat_summary[disktype]:
           summary_item = iostat_summary[disktype][SUMMARY]
 
@@ -942,9 +1751,19 @@ def process_host_iostat_summary(report_context, host):
 
     series[UTIL]  = [ { 'name': '%util',        'items': data[UTIL] } ]
 
+    for vtype in [ STDDEV, CV ]:
+      for stat in [ IOPS, MBPS, AWAIT, UTIL ]:
+        variability[vtype][stat] = []
+        for disktype in disktypes:
+          summary_item = iostat_summary[disktype][SUMMARY]
+          if vtype in summary_item:
+            variability[vtype][stat].append(summary_item[vtype][stat])
+          else:
+            variability[vtype][stat].append(None)
 
   return { 'groups' : disktypes,
            'seriesData': series,
+           'variability': variability,
            'findings'  : findings,
            'htmlFiles' : report_context.hostnames[host].iostat.html_files} 
 
@@ -23,12 +23,17 @@ import json
 from datetime import datetime, timedelta
 from glob import glob
 
-from exawutil import USR, NICE, SYS, WIO, STL, IDL, BUSY, DATE_FMT_INPUT, JSON_DATE_FMT, DEFAULT_MAX_BUCKETS, add_empty_point, add_start_end_times, ReportContext, HostMetadata
+from exawutil import USR, NICE, SYS, WIO, STL, IDL, BUSY, STDDEV, CV, DATE_FMT_INPUT, JSON_DATE_FMT, DEFAULT_MAX_BUCKETS, SERIES_PRECISION_PCT, add_empty_point, add_start_end_times, iter_series_json, map_hosts, shard_by_host, ReportContext, HostMetadata
 
 from exawparse_mp import IRQ, SOFT, GUEST
 
-# change json to only dump 6 decimal points for float
-json.encoder.FLOAT_REPR = lambda o: format(o, '.6f')
+#------------------------------------------------------------
+# globals - this is either set by caller, or created if called using main()
+_my_report_context = None
+
+# templates of the pages for each host; a change in these regenerates
+# the pages with incremental output
+HOST_TEMPLATES = [ 'mpstat_template.html' ]
 
 #------------------------------------------------------------    
 def _get_stat_label(stat):
@@ -236,52 +241,105 @@ def print_charts(filelist, report_context):
     (e.g. exawchart.py - wrapper for generating all charts)
   '''
   
-  # first parse the files
-  exawparse_mp.parse_input_files(filelist, report_context)
+  global _my_report_context
+  _my_report_context = report_context
+
+  # in fleet mode, the hosts are parsed and charted in shards, so memory
+  # use depends on the shard size rather than on the number of hosts
+  if report_context.fleet > 0:
+    shards = shard_by_host(filelist, report_context.fleet)
+    if len(shards) > 1:
+      report_context.set_multihost(True)
+  else:
+    shards = [ filelist ]
+
+  for shard in shards:
+    # first parse the files
+    if report_context.fleet > 0:
+      exawparse_mp.clear_parsed_data()
+      exawparse_mp.parse_input_files(shard, report_context,
+                                     max_hosts = report_context.fleet)
+    else:
+      exawparse_mp.parse_input_files(shard, report_context)
+
+    # print charts if we processed something, possibly in parallel, and
+    # register the files in the same order as if done serially
+    hostnames = sorted(exawparse_mp.hostnames)
+    host_files = map_hosts(_print_host_charts, hostnames, report_context.jobs)
+    for (hostname, file_tuple) in zip(hostnames, host_files):
+      if file_tuple != None:
+        report_context.record_pages(hostname, 'mpstat',
+                                    _get_host_fingerprint(hostname),
+                                    HOST_TEMPLATES, [ file_tuple ])
+        report_context.add_html_file(hostname, 'mpstat', file_tuple)
+
+  if report_context.fleet > 0:
+    exawparse_mp.clear_parsed_data()
+
+#------------------------------------------------------------
+def _get_host_fingerprint(hostname):
+  '''
+    returns fingerprint of the input data of the page for hostname
+  '''
+  return _my_report_context.get_fingerprint(
+           exawparse_mp.hostnames[hostname].processed_files)
+
+#------------------------------------------------------------
+def _print_host_charts(hostname):
+  '''
+    creates the mpstat html page for hostname, and returns the
+    (filename, title) tuple generated.
+    This may run in a worker process (see map_hosts), so it gets the
+    report context and parsed data from the module globals
+  '''
+  # reuse the page of the previous incremental run, if unchanged
+  file_tuples = _my_report_context.get_current_pages(
+                  hostname, 'mpstat', _get_host_fingerprint(hostname),
+                  HOST_TEMPLATES)
+  if file_tuples != None:
+    return file_tuples[0]
+
+  report_context = _my_report_context
 
   # get metadata with host information
   metadata = exawparse_mp.hostnames
+
+  # get chart with timeseries data, average across all cpus
+  (xAxis, series, cpu_list) = _print_all_chart(report_context,
+                                               exawparse_mp.buckets,
+                                               metadata[hostname])
   
-  # print charts if we processed something
-  for hostname in metadata:
-    # get chart with timeseries data, average across all cpus
-    (xAxis, series, cpu_list) = _print_all_chart(report_context,
-                                                 exawparse_mp.buckets,
-                                                 metadata[hostname])
-    
-    # get chart with average usage per cpu, no time series
-    (cpuIds, cpuIdsSeries) = _print_cpu_id_chart(report_context,
-                                                 report_context.hostnames[hostname].mpstat.summary_stats,
-                                                 metadata[hostname])    
-    # convert to JSON
-    xAxisJson = json.dumps(xAxis)
-    seriesJson = json.dumps(series)
-    cpuListJson = json.dumps(cpu_list)
-    cpuIdsJson = json.dumps(cpuIds)
-    cpuSeriesJson = json.dumps(cpuIdsSeries)
-
-    # get report context
-    report_context_obj = report_context.get_json_object()
-    report_context_obj['host'] = hostname
-    report_context_obj['processedFiles'] = metadata[hostname].processed_files
-    reportContextJson = json.dumps(report_context_obj)
-
-    # now write out html file
-    try:
-      template_file = open(os.path.join(report_context.template_dir,
-                                        'mpstat_template.html'), 'r')
-      template = template_file.read()
-      template_file.close()
-
-      (filename, title) = report_context.write_html_file(
-                            hostname + '_mp.html',
-                            'CPU Detail',
-                            template % vars())
-      report_context.add_html_file(hostname, 'mpstat', (filename, title))
-    except Exception as e:
-      report_context.log_msg('error','Unable to read template file: %s (%s)' %
-                             (os.path.join(report_context.template_dir,
-                                          'mpstat_template.html'), str(e)))
+  # get chart with average usage per cpu, no time series
+  (cpuIds, cpuIdsSeries) = _print_cpu_id_chart(report_context,
+                                               report_context.hostnames[hostname].mpstat.summary_stats,
+                                               metadata[hostname])    
+  # convert to JSON
+  xAxisJson = json.dumps(xAxis)
+  seriesJson = iter_series_json(series, SERIES_PRECISION_PCT,
+                                report_context.series_format)
+  cpuListJson = json.dumps(cpu_list)
+  cpuIdsJson = json.dumps(cpuIds)
+  cpuSeriesJson = iter_series_json(cpuIdsSeries, SERIES_PRECISION_PCT,
+                                   report_context.series_format)
+
+  # get report context
+  report_context_obj = report_context.get_json_object()
+  report_context_obj['host'] = hostname
+  report_context_obj['processedFiles'] = metadata[hostname].processed_files
+  reportContextJson = json.dumps(report_context_obj)
+
+  # now write out html file, and return the (filename, title) tuple
+  try:
+    (filename, title) = report_context.write_template_file(
+                          hostname + '_mp.html',
+                          'CPU Detail',
+                          'mpstat_template.html',
+                          vars())
+    return (filename, title)
+  except Exception as e:
+    report_context.log_msg('error','Unable to read template file: %s (%s)' %
+                           (os.path.join(report_context.template_dir,
+                                        'mpstat_template.html'), str(e)))
 
 
 #------------------------------------------------------------
@@ -294,6 +352,8 @@ def process_host_mpstat_summary(report_context,host):
   '''
   series_data = []
   findings = []
+  # variability of cpu busy for all cpus
+  variability = {}
   if host in report_context.hostnames and 'all' in report_context.hostnames[host].mpstat.summary_stats:
     mpstat_summary = report_context.hostnames[host].mpstat.summary_stats['all']
     findings = report_context.hostnames[host].mpstat.findings
@@ -306,11 +366,16 @@ def process_host_mpstat_summary(report_context,host):
           series_item['color'] = _get_stat_color(stat)
         series_data.append(series_item)
 
+    for vtype in [ STDDEV, CV ]:
+      if vtype in mpstat_summary:
+        variability[vtype] = { BUSY: mpstat_summary[vtype][BUSY] }
+
     # also display findings
     report_context.log_msg('debug','mpstat findings: %s' % report_context.hostnames[host].mpstat.findings)
 
   return  { 'groups': [ 'avg' ],
             'seriesData': series_data,
+            'variability': variability,
             'findings': findings,
             'htmlFiles' : report_context.hostnames[host].mpstat.html_files} 
 
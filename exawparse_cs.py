@@ -24,7 +24,7 @@
 import sys
 
 from datetime import datetime,timedelta
-from exawutil import DEFAULT_MAX_BUCKETS, TIMESTAMP, VALUE, CNT, TITLE, EXAWATCHER_STARTING_TIME_POSITION, EXAWATCHER_SAMPLE_INTERVAL_POSITION, EXAWATCHER_ARCHIVE_COUNT_POSITION, EXAWATCHER_MODULE_POSITION, EXAWATCHER_COLLECTION_COMMAND_POSITION, EXAWATCHER_MISC_INFO_POSITION, EXAWATCHER_HEADER_LINES, DATE_FMT_INPUT, FILE_UNKNOWN, file_type, open_file, get_file_end_time, get_hostname_from_filename, UnrecognizedFile, DuplicateFile, NoDataInFile, HostNameMismatch, ReportContext, HostMetadata
+from exawutil import DEFAULT_MAX_BUCKETS, TIMESTAMP, VALUE, CNT, WEIGHT, VAR, MAX, REDUCE_AVG, TITLE, EXAWATCHER_STARTING_TIME_POSITION, EXAWATCHER_SAMPLE_INTERVAL_POSITION, EXAWATCHER_ARCHIVE_COUNT_POSITION, EXAWATCHER_MODULE_POSITION, EXAWATCHER_COLLECTION_COMMAND_POSITION, EXAWATCHER_MISC_INFO_POSITION, EXAWATCHER_HEADER_LINES, DATE_FMT_INPUT, FILE_UNKNOWN, file_type, open_file, init_variance, update_variance, finalize_variance, init_extremes, update_extremes, reduce_series, get_file_end_time, get_hostname_from_filename, parse_by_host, use_bucket_store, BucketStore, MappedTextFile, UnrecognizedFile, DuplicateFile, MaxHostsExceeded, NoDataInFile, HostNameMismatch, ReportContext, HostMetadata
 
 import exawrules
 
@@ -51,8 +51,18 @@ import exawrules
 # read, while COUNT has the number of samples.  We convert METRIC_DELTA
 # into per second rates (using the interval seen in the cellsrvstat file)
 # and any unit conversions (KB to GB) specified in METRIC_METADATA
+# Each sample is weighted by the interval, and WEIGHT has the sum of the
+# intervals (see exawparse_io)
 #
-# On the second pass, we calculate the averages for the bucket
+# Each metric also has VAR: { VALUE: <accumulator> } with the running
+# (Welford) mean/variance of the values
+#
+# On the second pass, we calculate the averages for the bucket, and
+# replace VAR with STDDEV and CV (see finalize_variance)
+#
+# If the reduce_mode is not avg, each metric in a bucket also has MIN/MAX
+# (see update_extremes), and after the second pass the averages are
+# replaced with the values to chart (see reduce_series)
 #
 # note that a (<group_key>_<metric_key>) is a generated key which we
 # use to flatten out the structure.
@@ -100,6 +110,10 @@ _my_report_context = None
 
 EXAWATCHER_CELLSRVSTAT_MODULE_NAME = 'CellSrvStatExaWatcher'
 
+# series of each host for the correlation page, the keys of the metrics
+# in the buckets (see generate_key)
+CORRELATION_SERIES = [ 'fc_rhit', 'fc_rmiss' ]
+
 #------------------------------------------------------------
 # Constants
 # Groups in the cellsrvstat file
@@ -614,7 +628,8 @@ def _update_bucket(bucket,
       current_value: current value column from the file
       check_zero   : metrics to keep track if 0 for this host
       exa_interval : interval used in the cellsrvstat file,
-                     to compute per second rates if needed
+                     to compute per second rates if needed, and to
+                     weight the sample
       summary_stats: running total for entire interval
   '''
   metric_metadata = METRIC_METADATA[group_name][METRIC_LIST][metric_name]
@@ -649,15 +664,23 @@ def _update_bucket(bucket,
 
   # now add the value to the bucket, initializing bucket if needed
   if key not in bucket:
-    bucket[key] = { VALUE: 0, CNT: 0 }
-  bucket[key][VALUE] += v;
+    bucket[key] = { VALUE: 0, CNT: 0, WEIGHT: 0, VAR: { VALUE: init_variance() } }
+    if _my_report_context.reduce_mode != REDUCE_AVG:
+      init_extremes(bucket[key])
+  bucket[key][VALUE] += v*exa_interval;
   bucket[key][CNT] += 1
+  bucket[key][WEIGHT] += exa_interval
+  update_variance(bucket[key][VAR][VALUE], v, exa_interval)
+  if MAX in bucket[key]:
+    update_extremes(bucket[key], VALUE, v)
 
   # and add to summary too
   if key not in summary_stats:
-    summary_stats[key] = { VALUE: 0, CNT: 0 }
-  summary_stats[key][VALUE] += v;
+    summary_stats[key] = { VALUE: 0, CNT: 0, WEIGHT: 0, VAR: { VALUE: init_variance() } }
+  summary_stats[key][VALUE] += v*exa_interval;
   summary_stats[key][CNT] += 1;
+  summary_stats[key][WEIGHT] += exa_interval
+  update_variance(summary_stats[key][VAR][VALUE], v, exa_interval)
 
 
 #------------------------------------------------------------
@@ -667,6 +690,25 @@ def generate_key(gkey,mkey):
   '''
   return gkey + '_' + mkey
 
+#------------------------------------------------------------
+def _set_correlation_series(report_context):
+  '''
+    sets the CORRELATION_SERIES of each host just parsed, for the
+    correlation page (see StatFileSummary.series)
+  '''
+  num_series = report_context.get_bucket_id(report_context.report_end_time) + 1
+  for host in hostnames:
+    series = {}
+    for name in CORRELATION_SERIES:
+      series[name] = [ None ] * num_series
+    for (i, bucket) in buckets.iteritems():
+      if host not in bucket:
+        continue
+      for name in CORRELATION_SERIES:
+        if name in bucket[host]:
+          series[name][i] = bucket[host][name][VALUE]
+    report_context.hostnames[host].cellsrvstat.series = series
+
 #------------------------------------------------------------
 def _process_rules(report_context):
 
@@ -695,7 +737,8 @@ def _process_rules(report_context):
     ]
 
 
-  for host in sorted(report_context.hostnames):
+  # only the hosts just parsed, other hosts may be from another shard
+  for host in sorted(hostnames):
     # ignore multi-cell information
     if host == '':
       continue
@@ -710,18 +753,85 @@ def _process_rules(report_context):
 
       rule['callback'](report_context.hostnames[host].cellsrvstat, info)
 
+    # gaps and duplicates are common to all stat types, based on the
+    # host metadata
+    exawrules.rule_gaps_01(report_context.hostnames[host].cellsrvstat,
+                           ( hostnames[host], ))
+    exawrules.rule_dup_samples_01(report_context.hostnames[host].cellsrvstat,
+                                  ( hostnames[host], ))
+
     report_context.log_msg('debug','cellsrvstat findings: %s' % str(report_context.hostnames[host].cellsrvstat.findings))
 #------------------------------------------------------------
-def parse_input_files(filelist, report_context):
+def clear_parsed_data():
+  '''
+    clears the buckets and host metadata set by parse_input_files(), e.g.
+    before parsing the next shard of hosts in fleet mode
+  '''
+  global buckets
+  global hostnames
+  if isinstance(buckets, BucketStore):
+    buckets.close()
+  buckets = {}
+  hostnames = {}
 
+#------------------------------------------------------------
+def _parse_host_files(hostname, files, host_buckets):
+  '''
+    parses the files of hostname into host_buckets in a worker process
+    (see parse_by_host() in exawutil), and returns the host metadata and
+    cellsrvstat summary of the host
+  '''
+  global buckets
+  clear_parsed_data()
+  buckets = host_buckets
+  _parse_files(files, _my_report_context)
+  if hostname not in hostnames:
+    return (None, None)
+  return (hostnames[hostname],
+          _my_report_context.hostnames[hostname].cellsrvstat)
+
+#------------------------------------------------------------
+def _register_host(hostname, host_metadata, host_summary):
+  '''
+    adds the host metadata and cellsrvstat summary of hostname, parsed by a
+    worker process
+  '''
+  hostnames[hostname] = host_metadata
+  _my_report_context.add_hostinfo(hostname)
+  _my_report_context.hostnames[hostname].cellsrvstat = host_summary
+
+#------------------------------------------------------------
+def parse_input_files(filelist, report_context, max_hosts = None):
   '''
     This is the main routine in this module, which parses the files
-    and populates the buckets
+    and populates the buckets, see _parse_files() for the parameters
+    (filelist, report_context, max_hosts)
+
+    With report_context.parse_jobs > 1, the files of each host are
+    parsed by a worker process, see parse_by_host() in exawutil
+  '''
+  global buckets
+  global _my_report_context
+
+  _my_report_context = report_context
+  buckets = use_bucket_store(buckets, report_context)
+  parse_by_host(filelist, report_context, buckets,
+                lambda files, max_hosts: _parse_files(files, report_context, max_hosts),
+                _parse_host_files, _register_host, max_hosts)
+
+#------------------------------------------------------------
+def _parse_files(filelist, report_context, max_hosts = None):
+
+  '''
+    parses the files and populates the buckets, see
+    parse_input_files()
 
     PARAMETERS:
       filelist  : list of files to process, can be bz2, gz or text
       report_context: report context with start/end times and bucket
                       information
+      max_hosts: maximum number of hosts (optional); files of any other
+                  hosts are ignored.  Used in fleet mode to bound memory
     DESCRIPTION:
       This will set the following global variables
         buckets - dictionary object keyed by bucket_id with datapoints
@@ -736,10 +846,13 @@ def parse_input_files(filelist, report_context):
     any module - i.e. using gnuplot or google charts, can simply
     plot the data without having to calculate averages)
 
-    We also maintain a list of processed_start_times - this is based on the
+    We also maintain a set of processed_start_times - this is based on the
     'Starting Time' string at the start of the exawatcher cellsrvstat file.
     If we see the same 'Starting Time' (for same host) we skip the file
     and move onto the next file
+    Files may still overlap, so we also skip samples with a timestamp we
+    have already processed for the host (see
+    HostMetadata.is_duplicate_sample)
 
   '''
   global buckets
@@ -750,8 +863,8 @@ def parse_input_files(filelist, report_context):
   state = None
   metrics = {}
 
-  # list of file start times we have processed, based on header in file
-  processed_start_times = []
+  # set of file start times we have processed, based on header in file
+  processed_start_times = set()
 
   # go through list of files
   for fname in (filelist):
@@ -764,6 +877,8 @@ def parse_input_files(filelist, report_context):
         raise UnrecognizedFile(fname + '(' + ftype + ')')
 
       hostname = get_hostname_from_filename(fname)
+      if max_hosts != None and hostname not in hostnames and len(hostnames) >= max_hosts:
+        raise MaxHostsExceeded(fname)
 
       # first check file header to ensure this is ExaWatcher cellsrvstat file
       header = [next(input_file) for x in xrange(EXAWATCHER_HEADER_LINES)]
@@ -794,6 +909,8 @@ def parse_input_files(filelist, report_context):
       _my_report_context.log_msg('warning', 'Unrecognized file: %s' % (e.value))
     except DuplicateFile as e:
       _my_report_context.log_msg('warning', 'Ignoring duplicate file: %s' % (e.value))
+    except MaxHostsExceeded as e:
+      _my_report_context.log_msg('error', 'Maximum number of hosts (%d) exceeded, ignoring file: %s' % (max_hosts, e.value))
     except NoDataInFile as e:
       _my_report_context.log_msg('warning', 'No data within report interval in file: %s' % (e.value))
     except IOError as e:
@@ -813,7 +930,7 @@ def parse_input_files(filelist, report_context):
       _my_report_context.add_hostinfo(hostname)
       
       # otherwise include in list and continue processing
-      processed_start_times.append( (hostname,header[EXAWATCHER_STARTING_TIME_POSITION]) )
+      processed_start_times.add( (hostname,header[EXAWATCHER_STARTING_TIME_POSITION]) )
       hostnames[hostname].processed_files.append(fname)
 
       # get exawatcher interval for this file, to compute per second rates
@@ -837,11 +954,17 @@ def parse_input_files(filelist, report_context):
           # contruct the timestamp
           line = line.replace(GROUP_TS,'').strip()
           # note: we expect format to be "Day Mon DD hh:mi:ss YYYY"
-          sample_time = datetime.strptime(line,'%a %b %d %H:%M:%S %Y')
+          sample_time = _my_report_context.get_host_time(hostname,
+                          datetime.strptime(line,'%a %b %d %H:%M:%S %Y'))
 
           # for samples in our desired range, get the bucket_id
           if sample_time >= _my_report_context.report_start_time and sample_time <= report_context.report_end_time:
+            # ignore samples we already have from an overlapping file
+            if hostnames[hostname].is_duplicate_sample(sample_time, _my_report_context):
+              bucket_id = -1
+            else:
               bucket_id = _my_report_context.get_bucket_id(sample_time)
+              hostnames[hostname].check_gap(sample_time, exa_interval)
               # add the timestamp of the bucket, not the sample time
               # as many samples can fall into a bucket
               if bucket_id not in buckets:
@@ -849,6 +972,10 @@ def parse_input_files(filelist, report_context):
           else:
             bucket_id = -1
 
+          # the rest of a sample we ignore can be skipped at once
+          if bucket_id == -1 and isinstance(input_file, MappedTextFile):
+            input_file.skip_to(GROUP_TS)
+
         # if we recognize this group - get the metric metadata
         elif line in METRIC_METADATA:
           # fortify get key from our list, rather than from line
@@ -895,17 +1022,36 @@ def parse_input_files(filelist, report_context):
           hostnames[host].metric_keys.append(key)
         data_bucket = buckets[i][host][key]
         v = data_bucket[VALUE]
-        cnt = data_bucket[CNT]
-        if cnt != 0:
-          data_bucket[VALUE] = v/cnt
+        weight = data_bucket[WEIGHT]
+        if weight != 0:
+          data_bucket[VALUE] = v/weight
+        finalize_variance(data_bucket)
+
+  # replace averages with the values to chart for the reduce_mode
+  if _my_report_context.reduce_mode != REDUCE_AVG:
+    # series keyed by (host, key), list of (bucket_id, data_bucket)
+    series = {}
+    for i in sorted(buckets):
+      for host in buckets[i]:
+        for key in buckets[i][host]:
+          series.setdefault((host, key), []).append((i, buckets[i][host][key]))
+    for key in series:
+      reduce_series(_my_report_context.reduce_mode, series[key], [ VALUE ])
+    # store the reduced stats, as the buckets may have been spilled
+    # since (see BucketStore)
+    for ((host, key), points) in series.iteritems():
+      for (i, data_bucket) in points:
+        buckets[i][host][key] = data_bucket
 
   # also maintain summary stats
-  for host in _my_report_context.hostnames:
+  for host in hostnames:
     cs_summary = _my_report_context.hostnames[host].cellsrvstat.summary_stats
     for key in cs_summary:
-      if cs_summary[key][CNT] != 0:
-        cs_summary[key][VALUE] = cs_summary[key][VALUE]/cs_summary[key][CNT]
+      if cs_summary[key][WEIGHT] != 0:
+        cs_summary[key][VALUE] = cs_summary[key][VALUE]/cs_summary[key][WEIGHT]
+      finalize_variance(cs_summary[key])
 
+  _set_correlation_series(_my_report_context)
   _process_rules(_my_report_context)
 
 #------------------------------------------------------------
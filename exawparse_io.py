@@ -35,12 +35,15 @@ import errno
 from datetime import datetime, timedelta
 import distutils.spawn
 from operator import itemgetter
+from itertools import izip
+from array import array
+from math import sqrt
 from subprocess import Popen, PIPE
 from lxml import etree
 
  
 # import constants and common functions from exaioutil
-from exawutil import DATE_FMT_INPUT, TIMESTAMP, CPU, FLASH, DISK, CNT, USR, NICE, SYS, WIO, STL, IDL, BUSY, RPS, WPS, RSECPS, WSECPS, AVGRQSZ, AVGQUSZ, AWAIT, SVCTM, UTIL, RMBPS, WMBPS, IOPS, MBPS, SUMMARY, DEFAULT_FLASH_DISKS, DEFAULT_HARD_DISKS, EXAWATCHER_STARTING_TIME_POSITION, EXAWATCHER_SAMPLE_INTERVAL_POSITION, EXAWATCHER_ARCHIVE_COUNT_POSITION, EXAWATCHER_MODULE_POSITION, EXAWATCHER_COLLECTION_COMMAND_POSITION, EXAWATCHER_MISC_INFO_POSITION, EXAWATCHER_HEADER_LINES, FILE_UNKNOWN, FINDING_TYPE_INFO, file_type, open_file, get_file_end_time, get_hostname, get_hostname_from_filename, validate_disk, UnrecognizedFile, DuplicateFile, NoDataInFile, HostNameMismatch, ReportContext,HostMetadata
+from exawutil import DATE_FMT_INPUT, TIMESTAMP, CPU, FLASH, DISK, CNT, WEIGHT, USR, NICE, SYS, WIO, STL, IDL, BUSY, RPS, WPS, RSECPS, WSECPS, AVGRQSZ, AVGQUSZ, AWAIT, SVCTM, UTIL, RMBPS, WMBPS, IOPS, MBPS, SUMMARY, VAR, MAX, REDUCE_AVG, CLOCK_SKEW_ALIGN, MAX_CLOCK_SKEW, MIN_CLOCK_SKEW_CORRELATION, DEFAULT_FLASH_DISKS, DEFAULT_HARD_DISKS, EXAWATCHER_STARTING_TIME_POSITION, EXAWATCHER_SAMPLE_INTERVAL_POSITION, EXAWATCHER_ARCHIVE_COUNT_POSITION, EXAWATCHER_MODULE_POSITION, EXAWATCHER_COLLECTION_COMMAND_POSITION, EXAWATCHER_MISC_INFO_POSITION, EXAWATCHER_HEADER_LINES, FILE_UNKNOWN, FINDING_TYPE_INFO, file_type, open_file, get_sample_interval, init_variance, update_variance, finalize_variance, init_extremes, update_extremes, reduce_series, estimate_lag, timedelta_get_seconds, get_file_end_time, get_hostname, get_hostname_from_filename, group_by_host, parse_by_host, use_bucket_store, BucketStore, MappedTextFile, SeriesSpill, validate_disk, UnrecognizedFile, DuplicateFile, MaxHostsExceeded, NoDataInFile, HostNameMismatch, ReportContext, HostMetadata
 
 import exawrules
 
@@ -68,7 +71,8 @@ import exawrules
 # . bucket:
 #     <bucket_id>: { <hostname>: {
 #                      CPU: { USR: <x>, NICE: <x>, SYS: <x>, WIO: <x>,
-#                             IDL: <x>, STL: <x>, CNT: <x> }
+#                             IDL: <x>, STL: <x>, CNT: <x>,
+#                             WEIGHT: <x> }
 #                      FLASH: { <device>: {RPS: <x>,
 #                                          WPS: <x>,
 #                                          RSECPS: <x>,
@@ -78,7 +82,8 @@ import exawrules
 #                                          AWAIT:  <x>,
 #                                          SVCTM:  <x>,
 #                                          UTIL:  <x>,
-#                                          CNT:  <x>}
+#                                          CNT:  <x>,
+#                                          WEIGHT: <x>}
 #                               ... # multiple devices
 #                      DISK: { <device>: {RPS: <x>,
 #                                         WPS: <x>,
@@ -89,15 +94,28 @@ import exawrules
 #                                         AWAIT:  <x>,
 #                                         SVCTM:  <x>,
 #                                         UTIL:  <x>,
-#                                         CNT:  <x>}
+#                                         CNT:  <x>,
+#                                         WEIGHT: <x>}
 #                               ... # multiple devices
 #                               }
 #                   }
 # At first pass, the stats for CPU, FLASH and DISK contain SUMs for
 # all the lines read, while CNT has the number of samples.
+# Each sample is weighted by the sample interval of its file (from the
+# ExaWatcher header), and WEIGHT has the sum of the sample intervals,
+# so files collected with different intervals are averaged correctly.
+# CPU and each device also have VAR, with running (Welford) mean/variance
+# accumulators for BUSY (CPU) and IOPS, MBPS, AWAIT, UTIL (devices).
 #
 # On the second pass, we calculate the averages and store that in the
-# bucket.
+# bucket, and VAR is replaced by STDDEV and CV (see finalize_variance)
+#
+# If the report context has a reduce_mode other than avg, CPU and each
+# device in a bucket also have MIN/MAX with the extremes of the samples
+# (see update_extremes); the extremes for SUMMARY are based on the totals
+# of each sample (kept in HostMetadataIostat.extremes while parsing).
+# After the second pass, we replace the averages in the buckets with the
+# values to chart (see reduce_series)
 #
 # We already separate out FLASH and DISKS within each bucket, as
 # the disks could potentially change.  This also makes it easier to
@@ -115,7 +133,9 @@ import exawrules
 # we also have an overall summary structure, which has the same
 # structure as a bucket.  This is used for calculating the average
 # over the entire time frame which we can then display in a summary
-# page
+# page.  The SUMMARY for FLASH/DISK in the summary structure also has
+# STDDEV and CV, computed from the per-sample totals across all
+# flash/hard disks (kept in HostMetadataIostat.variance while parsing)
 #
 # In order to support multiple hosts, we maintain the following per host
 # . list of flash/hard disks, this is later used by the consumer of the
@@ -140,6 +160,14 @@ class HostMetadataIostat(HostMetadata):
                           # note: format should be
                           # { FLASH: { IOPS: value, MBPS: value },
                           #   DISK:  { IOPS: value, MBPS: value } }
+    # variance accumulators of per-sample totals for all flash/hard disks
+    # { FLASH: { IOPS: acc, MBPS: acc, AWAIT: acc, UTIL: acc }, DISK: ... }
+    self.variance = {}
+    # extremes of per-sample totals for all flash/hard disks per bucket,
+    # only if the reduce_mode is not avg
+    # { bucket_id: { FLASH: { MIN: { IOPS: value ...}, MAX: { ... } },
+    #                DISK: ... } }
+    self.extremes = {}
 
   def __str__(self):
     str = super(HostMetadataIostat,self).__str__()
@@ -174,6 +202,23 @@ _my_report_context = None
 
 EXAWATCHER_IOSTAT_MODULE_NAME = 'IostatExaWatcher' # module we expect to parse
 
+# start of the lines that may have the time of a sample (Time: or a
+# date, see _parse_files), to skip to with MappedTextFile.skip_to()
+_SAMPLE_TIME_MARKER = re.compile(r'^(?:\s*Time:|\d{2}/\d{2}/\d{2})', re.M)
+
+# stats in the buckets that are charted, and may need to be reduced
+REDUCE_CPU_STATS = [ USR, SYS, WIO, IDL, BUSY ]
+REDUCE_DISK_STATS = [ RPS, WPS, IOPS, RMBPS, WMBPS, MBPS, AWAIT, SVCTM, UTIL ]
+
+# datapoints (of all hosts) read at a time for the median of the IOPS
+# signals of the hosts, see estimate_clock_offsets()
+CLOCK_SKEW_BLOCK_SIZE = 1 << 20
+
+# series of each host for the correlation page, keyed by name, each one
+# mapping to the (disktype, stat) of the summary of all disks
+CORRELATION_SERIES = { 'flash_await': (FLASH, AWAIT),
+                       'flash_iops' : (FLASH, IOPS) }
+
 # for determining max capacity, can only run on the actual host
 CELLCLI='cellcli'
 COMMAND_CELLCLI="-xml -e list cell attributes maxpdiops,maxpdmbps,maxfdiops,maxfdmbps"
@@ -256,25 +301,37 @@ def _get_exawatcher_disk_list(line):
   return (flash_list, disk_list)
 
 #------------------------------------------------------------
-def _init_cpustat():
+def _init_cpustat(extremes = False):
   '''
     initialize object for cpu statistics
+    extremes: keep track of MIN/MAX of the samples
   '''
-  cpu = { USR: 0, NICE: 0, SYS: 0, WIO: 0, STL: 0, IDL: 0, CNT: 0 }
+  cpu = { USR: 0, NICE: 0, SYS: 0, WIO: 0, STL: 0, IDL: 0, CNT: 0,
+          WEIGHT: 0, VAR: { BUSY: init_variance() } }
+  if extremes:
+    init_extremes(cpu)
   return cpu
 
 #------------------------------------------------------------
-def _update_cpustat(bucket, usr, nice, sys, wio, steal, idle):
-  bucket[USR]  += float(usr)
-  bucket[NICE] += float(nice)
-  bucket[SYS]  += float(sys)
-  bucket[WIO]  += float(wio)
-  bucket[STL]  += float(steal)
-  bucket[IDL]  += float(idle)
+def _update_cpustat(bucket, usr, nice, sys, wio, steal, idle, weight):
+  bucket[USR]  += float(usr)*weight
+  bucket[NICE] += float(nice)*weight
+  bucket[SYS]  += float(sys)*weight
+  bucket[WIO]  += float(wio)*weight
+  bucket[STL]  += float(steal)*weight
+  bucket[IDL]  += float(idle)*weight
   bucket[CNT]  += 1
+  bucket[WEIGHT] += weight
+  update_variance(bucket[VAR][BUSY], 100 - float(idle), weight)
+  if MAX in bucket:
+    update_extremes(bucket, USR, float(usr))
+    update_extremes(bucket, SYS, float(sys))
+    update_extremes(bucket, WIO, float(wio))
+    update_extremes(bucket, IDL, float(idle))
+    update_extremes(bucket, BUSY, 100 - float(idle))
   
 #------------------------------------------------------------
-def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary):
+def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary, weight):
   '''
     parses the cpu line from iostat and populates the appropriate
     the bucket_id in buckets[hostname]
@@ -285,6 +342,7 @@ def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary):
       hostname : hostname that these stats belong to
       stat_pos : dictionary object indicating position of the stats
       summary  : for calculating average over entire time period
+      weight   : sample interval, to weight the sample
   '''
 
   if bucket_id not in buckets or hostname not in buckets[bucket_id]:
@@ -304,47 +362,129 @@ def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary):
   bucket = buckets[bucket_id][hostname]
 
   if CPU not in bucket:
-    bucket[CPU] = _init_cpustat()
+    bucket[CPU] = _init_cpustat(_my_report_context.reduce_mode != REDUCE_AVG)
   if CPU not in summary:
     summary[CPU] = _init_cpustat()
 
   # now update stats; we keep incrementing and will get average
   # at the end
-  _update_cpustat(bucket[CPU], usr, nice, sys, wio, steal, idle)
-  _update_cpustat(summary[CPU], usr, nice, sys, wio, steal, idle)
+  _update_cpustat(bucket[CPU], usr, nice, sys, wio, steal, idle, weight)
+  _update_cpustat(summary[CPU], usr, nice, sys, wio, steal, idle, weight)
 
 #------------------------------------------------------------
-def _init_diskstat():
+def _init_diskstat(variance = True, extremes = False):
   '''
     initializes the dictionary object for a disk
+    variance: include the VAR accumulators
+    extremes: keep track of MIN/MAX of the samples
   '''
   device =  { RPS: 0, WPS: 0,
               RMBPS: 0, WMBPS: 0,
               AVGRQSZ: 0, AVGQUSZ: 0,
               AWAIT: 0, SVCTM: 0,
-              UTIL: 0, CNT: 0 }
+              UTIL: 0, CNT: 0, WEIGHT: 0 }
+  if variance:
+    device[VAR] = _init_disk_variance()
+  if extremes:
+    init_extremes(device)
   return device
 
+#------------------------------------------------------------
+def _init_disk_variance():
+  '''
+    initializes the variance accumulators for a disk (or all disks)
+  '''
+  return { IOPS: init_variance(), MBPS: init_variance(),
+           AWAIT: init_variance(), UTIL: init_variance() }
+
 #---------------------------------------------------------------------
-def _update_diskstat(disk, rps, wps, rsecps, wsecps,
-                    avgrqsz, avgqusz, await, svctm, util):
-  '''
-    updates the stats for the given disk
-  '''
-  disk[RPS]     += float(rps)
-  disk[WPS]     += float(wps)
-  disk[RMBPS]   += float(rsecps)*512/1048576  # convert to MBPS
-  disk[WMBPS]   += float(wsecps)*512/1048576 # convert to MBPS
-  disk[AVGRQSZ] += float(avgrqsz)
-  disk[AVGQUSZ] += float(avgqusz)
-  disk[AWAIT]   += float(await)
-  disk[SVCTM]   += float(svctm)
-  disk[UTIL]    += float(util)
+def _update_diskstat(disk, rps, wps, rmbps, wmbps,
+                    avgrqsz, avgqusz, await, svctm, util, weight):
+  '''
+    updates the stats for the given disk, weighted by the sample interval
+  '''
+  disk[RPS]     += rps*weight
+  disk[WPS]     += wps*weight
+  disk[RMBPS]   += rmbps*weight
+  disk[WMBPS]   += wmbps*weight
+  disk[AVGRQSZ] += avgrqsz*weight
+  disk[AVGQUSZ] += avgqusz*weight
+  disk[AWAIT]   += await*weight
+  disk[SVCTM]   += svctm*weight
+  disk[UTIL]    += util*weight
   disk[CNT]     += 1
+  disk[WEIGHT]  += weight
+  update_variance(disk[VAR][IOPS], rps + wps, weight)
+  update_variance(disk[VAR][MBPS], rmbps + wmbps, weight)
+  update_variance(disk[VAR][AWAIT], await, weight)
+  update_variance(disk[VAR][UTIL], util, weight)
+  if MAX in disk:
+    _update_disk_extremes(disk, rps, wps, rmbps, wmbps, await, svctm, util)
+
+#------------------------------------------------------------
+def _update_disk_extremes(disk, rps, wps, rmbps, wmbps, await, svctm, util):
+  '''
+    updates MIN/MAX of the charted stats for a disk (or all disks)
+  '''
+  update_extremes(disk, RPS, rps)
+  update_extremes(disk, WPS, wps)
+  update_extremes(disk, IOPS, rps + wps)
+  update_extremes(disk, RMBPS, rmbps)
+  update_extremes(disk, WMBPS, wmbps)
+  update_extremes(disk, MBPS, rmbps + wmbps)
+  update_extremes(disk, AWAIT, await)
+  update_extremes(disk, SVCTM, svctm)
+  update_extremes(disk, UTIL, util)
+
+#------------------------------------------------------------
+def _init_sample_total():
+  '''
+    initializes the totals for all flash/hard disks in one sample
+  '''
+  return { RPS: 0, WPS: 0, IOPS: 0,
+           RMBPS: 0, WMBPS: 0, MBPS: 0,
+           AWAIT: 0, SVCTM: 0, UTIL: 0, CNT: 0 }
+
+#------------------------------------------------------------
+def _flush_sample_totals(sample_totals, host_metadata, bucket_id, weight):
+  '''
+    adds the totals for the current sample (across all flash/hard disks)
+    to the variance accumulators for FLASH/DISK, and resets the totals.
+    This is called whenever we see a new sample and at the end of a file
+    PARAMETERS:
+      sample_totals: totals keyed by FLASH/DISK, see _init_sample_total()
+      host_metadata: HostMetadataIostat for the host
+      bucket_id    : bucket_id of the sample
+      weight       : sample interval, to weight the sample
+  '''
+  variance = host_metadata.variance
+  for disktype in sample_totals:
+    total = sample_totals[disktype]
+    if total[CNT] == 0:
+      continue
+    if _my_report_context.reduce_mode != REDUCE_AVG:
+      if bucket_id not in host_metadata.extremes:
+        host_metadata.extremes[bucket_id] = {}
+      if disktype not in host_metadata.extremes[bucket_id]:
+        host_metadata.extremes[bucket_id][disktype] = init_extremes({})
+      _update_disk_extremes(host_metadata.extremes[bucket_id][disktype],
+                            total[RPS], total[WPS],
+                            total[RMBPS], total[WMBPS],
+                            total[AWAIT]/total[CNT],
+                            total[SVCTM]/total[CNT],
+                            total[UTIL]/total[CNT])
+    if disktype not in variance:
+      variance[disktype] = _init_disk_variance()
+    # aggregate for IOPS and MBPS, average for the others, as in SUMMARY
+    update_variance(variance[disktype][IOPS], total[IOPS], weight)
+    update_variance(variance[disktype][MBPS], total[MBPS], weight)
+    update_variance(variance[disktype][AWAIT], total[AWAIT]/total[CNT], weight)
+    update_variance(variance[disktype][UTIL], total[UTIL]/total[CNT], weight)
+    sample_totals[disktype] = _init_sample_total()
 
 #------------------------------------------------------------
 def _parse_disk(tokens, bucket_id, is_flash, is_disk, hostname, stat_pos,
-                summary):
+                summary, sample_totals, weight):
   '''
     parses the line from iostat that has the device statistics
     and updates the buckets[bucket_id] for the device
@@ -358,6 +498,8 @@ def _parse_disk(tokens, bucket_id, is_flash, is_disk, hostname, stat_pos,
                  we need this since we can sometimes have a different
                  set of stats based on iostat command
       summary  : for calculating overall average for the entire period
+      sample_totals: totals for FLASH/DISK in the current sample
+      weight   : sample interval, to weight the sample
   '''
 
   if bucket_id not in buckets or hostname not in buckets[bucket_id]:
@@ -372,15 +514,15 @@ def _parse_disk(tokens, bucket_id, is_flash, is_disk, hostname, stat_pos,
   # may have different formats, so we figure out position based on what
   # we parsed in 'Device:' line, assume device is always first position though
   device = tokens[0]
-  rps = tokens[stat_pos[RPS]]
-  wps = tokens[stat_pos[WPS]]
-  rsecps = tokens[stat_pos[RSECPS]]
-  wsecps = tokens[stat_pos[WSECPS]]
-  avgrqsz = tokens[stat_pos[AVGRQSZ]]
-  avgqusz = tokens[stat_pos[AVGQUSZ]]
-  await = tokens[stat_pos[AWAIT]]
-  svctm = tokens[stat_pos[SVCTM]]
-  util = tokens[stat_pos[UTIL]]
+  rps = float(tokens[stat_pos[RPS]])
+  wps = float(tokens[stat_pos[WPS]])
+  rmbps = float(tokens[stat_pos[RSECPS]])*512/1048576  # convert to MBPS
+  wmbps = float(tokens[stat_pos[WSECPS]])*512/1048576  # convert to MBPS
+  avgrqsz = float(tokens[stat_pos[AVGRQSZ]])
+  avgqusz = float(tokens[stat_pos[AVGQUSZ]])
+  await = float(tokens[stat_pos[AWAIT]])
+  svctm = float(tokens[stat_pos[SVCTM]])
+  util = float(tokens[stat_pos[UTIL]])
   
 
   bucket = buckets[bucket_id][hostname]
@@ -402,21 +544,36 @@ def _parse_disk(tokens, bucket_id, is_flash, is_disk, hostname, stat_pos,
     bucket_diskgroup = bucket[DISK]
 
   if device not in bucket_diskgroup:
-    bucket_diskgroup[device] = _init_diskstat()
+    bucket_diskgroup[device] = _init_diskstat(extremes = _my_report_context.reduce_mode != REDUCE_AVG)
 
   if device not in summary[disk_type]:
     summary[disk_type][device] = _init_diskstat()
     
   _update_diskstat(bucket_diskgroup[device],
-                   rps, wps, rsecps, wsecps,
+                   rps, wps, rmbps, wmbps,
                    avgrqsz, avgqusz,
-                   await, svctm, util)
+                   await, svctm, util, weight)
 
   # also update summary bucket with running total
   _update_diskstat(summary[disk_type][device],
-                   rps, wps, rsecps, wsecps,
+                   rps, wps, rmbps, wmbps,
                    avgrqsz, avgqusz,
-                   await, svctm, util)
+                   await, svctm, util, weight)
+
+  # and the totals for this sample, for variance across all disks
+  if disk_type not in sample_totals:
+    sample_totals[disk_type] = _init_sample_total()
+  total = sample_totals[disk_type]
+  total[RPS]   += rps
+  total[WPS]   += wps
+  total[IOPS]  += rps + wps
+  total[RMBPS] += rmbps
+  total[WMBPS] += wmbps
+  total[MBPS]  += rmbps + wmbps
+  total[AWAIT] += await
+  total[SVCTM] += svctm
+  total[UTIL]  += util
+  total[CNT]   += 1
 
 #------------------------------------------------------------
 def _compute_cpu_bucket(cpu):
@@ -426,13 +583,16 @@ def _compute_cpu_bucket(cpu):
       cpu - bucket[host][CPU] object from buckets
   '''
 
-  if cpu[CNT] > 1:
-    cpu[USR] = cpu[USR]/cpu[CNT]
-    cpu[SYS] = cpu[SYS]/cpu[CNT]
-    cpu[WIO] = cpu[WIO]/cpu[CNT]
-    cpu[IDL] = cpu[IDL]/cpu[CNT]
+  if cpu[WEIGHT] > 0:
+    cpu[USR] = cpu[USR]/cpu[WEIGHT]
+    cpu[NICE] = cpu[NICE]/cpu[WEIGHT]
+    cpu[SYS] = cpu[SYS]/cpu[WEIGHT]
+    cpu[WIO] = cpu[WIO]/cpu[WEIGHT]
+    cpu[STL] = cpu[STL]/cpu[WEIGHT]
+    cpu[IDL] = cpu[IDL]/cpu[WEIGHT]
   # always compute cpu busy, regardless of number of entries in bucket  
   cpu[BUSY] = 100 - cpu[IDL]
+  finalize_variance(cpu)
 
 #------------------------------------------------------------
 def _compute_disk_bucket(disklist):
@@ -444,7 +604,7 @@ def _compute_disk_bucket(disklist):
      PARAMETERS
        disklist - bucket[host][FLASH/DISK] dictionary object from buckets
   '''
-  total = _init_diskstat()
+  total = _init_diskstat(variance = False)
   # initialize derived stats
   total[IOPS] = 0
   total[MBPS] = 0
@@ -452,14 +612,16 @@ def _compute_disk_bucket(disklist):
   # set up summary
   for disk in disklist:
     # TODO: do we need to check for divide-by-zero? shouldn't really happen
-    cnt = disklist[disk][CNT]
-    total[CNT] += cnt
+    # stats are weighted by sample interval, so we divide by the weight
+    weight = disklist[disk][WEIGHT]
+    total[CNT] += disklist[disk][CNT]
+    total[WEIGHT] += weight
     # per disk stats
-    rrq_ps = disklist[disk][RPS]/cnt
-    wrq_ps = disklist[disk][WPS]/cnt
+    rrq_ps = disklist[disk][RPS]/weight
+    wrq_ps = disklist[disk][WPS]/weight
     iorq_ps = rrq_ps + wrq_ps
-    rmb_ps = disklist[disk][RMBPS]/cnt
-    wmb_ps = disklist[disk][WMBPS]/cnt
+    rmb_ps = disklist[disk][RMBPS]/weight
+    wmb_ps = disklist[disk][WMBPS]/weight
     iomb_ps = rmb_ps + wmb_ps
 
     # compute aggregate for total bucket
@@ -483,18 +645,76 @@ def _compute_disk_bucket(disklist):
     disklist[disk][RMBPS] = rmb_ps
     disklist[disk][WMBPS] = wmb_ps
     disklist[disk][MBPS] = iomb_ps
-    disklist[disk][AWAIT] = disklist[disk][AWAIT]/cnt
-    disklist[disk][SVCTM] = disklist[disk][SVCTM]/cnt
-    disklist[disk][UTIL] = disklist[disk][UTIL]/cnt
+    disklist[disk][AWAIT] = disklist[disk][AWAIT]/weight
+    disklist[disk][SVCTM] = disklist[disk][SVCTM]/weight
+    disklist[disk][UTIL] = disklist[disk][UTIL]/weight
+    finalize_variance(disklist[disk])
 
   # now finalize the total/summary bucket - we want averages for
   # the following 3 stats, but keep aggregates for IOPS and MBPS
-  total[AWAIT] = total[AWAIT]/total[CNT]
-  total[SVCTM] = total[SVCTM]/total[CNT]
-  total[UTIL]  = total[UTIL]/total[CNT]
+  total[AWAIT] = total[AWAIT]/total[WEIGHT]
+  total[SVCTM] = total[SVCTM]/total[WEIGHT]
+  total[UTIL]  = total[UTIL]/total[WEIGHT]
 
   disklist[SUMMARY] = total
 
+#------------------------------------------------------------
+def _reduce_buckets(report_context):
+  '''
+    replaces the averages in the buckets with the value to chart based
+    on the reduce_mode, for each series (i.e. cpu, device and
+    SUMMARY of each host)
+  '''
+  # series keyed by (host, CPU) or (host, disktype, device)
+  # each is a list of (bucket_id, stat) in bucket_id order
+  series = {}
+  for i in sorted(buckets):
+    for host in buckets[i]:
+      bucket = buckets[i][host]
+      if CPU in bucket:
+        series.setdefault((host, CPU), []).append((i, bucket[CPU]))
+      for disktype in [ FLASH, DISK ]:
+        if disktype in bucket:
+          for disk in bucket[disktype]:
+            series.setdefault((host, disktype, disk), []).append((i, bucket[disktype][disk]))
+
+  for key in series:
+    if key[1] == CPU:
+      reduce_series(report_context.reduce_mode, series[key], REDUCE_CPU_STATS)
+    else:
+      reduce_series(report_context.reduce_mode, series[key], REDUCE_DISK_STATS)
+
+  # store the reduced stats, as the buckets may have been spilled since
+  # (see BucketStore)
+  for key in series:
+    for (i, stat) in series[key]:
+      if key[1] == CPU:
+        buckets[i][key[0]][CPU] = stat
+      else:
+        buckets[i][key[0]][key[1]][key[2]] = stat
+
+  for host in hostnames:
+    hostnames[host].extremes = {}
+
+#------------------------------------------------------------
+def _set_correlation_series(report_context):
+  '''
+    sets the CORRELATION_SERIES of each host just parsed, for the
+    correlation page (see StatFileSummary.series)
+  '''
+  num_series = report_context.get_bucket_id(report_context.report_end_time) + 1
+  for host in hostnames:
+    series = {}
+    for name in CORRELATION_SERIES:
+      series[name] = [ None ] * num_series
+    for (i, bucket) in buckets.iteritems():
+      if host not in bucket:
+        continue
+      for (name, (disktype, stat)) in CORRELATION_SERIES.iteritems():
+        if disktype in bucket[host] and SUMMARY in bucket[host][disktype]:
+          series[name][i] = bucket[host][disktype][SUMMARY][stat]
+    report_context.hostnames[host].iostat.series = series
+
 #------------------------------------------------------------
 def _get_max_capacity(report_context,hostname):
   # get max capacity using cellcli
@@ -559,11 +779,15 @@ def _process_rules(report_context):
                    exawrules.rule_iostat_02_high_util ,
                    exawrules.rule_iostat_03_max_iops ,
                    exawrules.rule_iostat_04_max_mbps ,
-                   exawrules.rule_iostat_05_individual_disks ]
+                   exawrules.rule_iostat_05_individual_disks ,
+                   exawrules.rule_iostat_06_bursty ,
+                   exawrules.rule_gaps_01 ,
+                   exawrules.rule_dup_samples_01 ]
                      
   current_hostname = get_hostname()
 
-  for host in report_context.hostnames:
+  # only the hosts just parsed, other hosts may be from another shard
+  for host in hostnames:
     # ignore multi-cell information
     if host == '':
       continue
@@ -580,19 +804,334 @@ def _process_rules(report_context):
       info = ( hostnames[host] , )
       rule(report_context.hostnames[host].iostat, info)
 
+    if host in report_context.clock_offsets:
+      exawrules.rule_clock_skew_01(report_context.hostnames[host].iostat,
+                                   (report_context.clock_offsets[host],
+                                    report_context.clock_skew == CLOCK_SKEW_ALIGN))
+
     report_context.log_msg('debug','%s iostat findings: %s' % (host,
                                                                report_context.hostnames[host].iostat.findings))
     
+#------------------------------------------------------------
+def process_cluster_rules(report_context, cluster_summary):
+  '''
+    processes the rules that apply to the cluster aggregate of all hosts
+    (see exawchart_io), whose findings are the findings of the multicell
+    pages (hostname '')
+    PARAMETERS:
+      cluster_summary: summary of the cluster aggregate, with the same
+                       structure as the summary_stats of a host
+  '''
+  # only the rules that do not need the host metadata
+  RULES_IOSTAT_CLUSTER = [ exawrules.rule_iostat_01_high_await ,
+                           exawrules.rule_iostat_02_high_util ,
+                           exawrules.rule_iostat_06_bursty ]
+
+  report_context.add_hostinfo('')
+  cluster_stat = report_context.hostnames[''].iostat
+  cluster_stat.summary_stats = cluster_summary
+  for rule in RULES_IOSTAT_CLUSTER:
+    rule(cluster_stat)
+
+  report_context.log_msg('debug','cluster iostat findings: %s' %
+                         cluster_stat.findings)
+
+#------------------------------------------------------------
+def _get_iostat_header(fname, report_context):
+  '''
+    returns (start_time, end_time, sample_interval) from the ExaWatcher
+    header of the iostat file fname, None if it is not an iostat file
+  '''
+  ftype = file_type(fname, report_context)
+  input_file = open_file(fname, ftype)
+  if ftype == FILE_UNKNOWN or input_file == None:
+    return None
+  try:
+    header = [next(input_file) for x in xrange(EXAWATCHER_HEADER_LINES)]
+  finally:
+    input_file.close()
+  if EXAWATCHER_IOSTAT_MODULE_NAME not in header[EXAWATCHER_MODULE_POSITION]:
+    return None
+  (file_start_date_str,file_start_time_str) = header[EXAWATCHER_STARTING_TIME_POSITION].strip().split()[-2:]
+  file_start_time = datetime.strptime(file_start_date_str + ' ' +
+                                      file_start_time_str,
+                                      DATE_FMT_INPUT)
+  return (file_start_time,
+          get_file_end_time(file_start_time,
+                            header[EXAWATCHER_SAMPLE_INTERVAL_POSITION],
+                            header[EXAWATCHER_ARCHIVE_COUNT_POSITION]),
+          get_sample_interval(header[EXAWATCHER_SAMPLE_INTERVAL_POSITION]))
+
+#------------------------------------------------------------
+def _iter_iops_samples(fname, report_context):
+  '''
+    yields (offset, iops) for each sample in the iostat file fname: the
+    sample time in seconds from the report start time, and the total
+    IOPS (r/s + w/s of all devices)
+  '''
+  ftype = file_type(fname, report_context)
+  input_file = open_file(fname, ftype)
+  if ftype == FILE_UNKNOWN or input_file == None:
+    return
+  try:
+    header = [next(input_file) for x in xrange(EXAWATCHER_HEADER_LINES)]
+    if EXAWATCHER_IOSTAT_MODULE_NAME not in header[EXAWATCHER_MODULE_POSITION]:
+      return
+    (file_start_date_str,file_start_time_str) = header[EXAWATCHER_STARTING_TIME_POSITION].strip().split()[-2:]
+    file_start_time = datetime.strptime(file_start_date_str + ' ' +
+                                        file_start_time_str,
+                                        DATE_FMT_INPUT)
+    offset = None
+    iops = 0.0
+    rps_pos = None
+    for line in input_file:
+      line = line.rstrip()
+      tokens = line.split()
+      if len(tokens) == 0:
+        continue
+      if tokens[0] == 'Time:' or re.match('\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}',line) or re.match('\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}',line):
+        if offset != None:
+          yield (offset, iops)
+        sample_time = _parse_time_format(line, file_start_date_str, file_start_time)
+        offset = timedelta_get_seconds(sample_time - report_context.report_start_time)
+        iops = 0.0
+      elif tokens[0] == 'Device:':
+        rps_pos = tokens.index('r/s')
+        wps_pos = tokens.index('w/s')
+      # device lines, the cpu line starts with a number
+      elif offset != None and rps_pos != None and tokens[0] != 'avg-cpu:' and not tokens[0][0].isdigit() and len(tokens) > max(rps_pos, wps_pos):
+        iops += float(tokens[rps_pos]) + float(tokens[wps_pos])
+    if offset != None:
+      yield (offset, iops)
+  finally:
+    input_file.close()
+
+#------------------------------------------------------------
+def _get_iops_signal(files, headers, report_context, series, first, step):
+  '''
+    sets series (an array of NaN) to the total IOPS of the iostat files
+    of a host every step seconds, from first seconds after the report
+    start time, interpolated between the samples, and normalized to a
+    mean of 0 and standard deviation of 1.  The datapoints without
+    samples (e.g. more than two sample intervals apart) are 0.
+    Returns False if the host has no IOPS that change
+    PARAMETERS:
+      files  : iostat files of the host, in time order
+      headers: (start_time, end_time, sample_interval) of each file,
+               keyed by filename
+  '''
+  length = len(series)
+  previous = None
+  for fname in files:
+    sample_interval = headers[fname][2]
+    try:
+      for (offset, iops) in _iter_iops_samples(fname, report_context):
+        if previous != None and offset > previous[0] and offset - previous[0] <= 2*sample_interval:
+          # datapoints from the previous sample up to this one
+          (prev_offset, prev_iops) = previous
+          slope = (iops - prev_iops) / (offset - prev_offset)
+          for pos in xrange(max(0, -((first - prev_offset) // step)),
+                            min(length, -((first - offset) // step))):
+            series[pos] = prev_iops + slope*(first + pos*step - prev_offset)
+        if previous == None or offset > previous[0]:
+          previous = (offset, iops)
+    except Exception as e:
+      report_context.log_msg('warning', 'Unable to read file for clock skew: %s: %s' % (fname, str(e)))
+  # and the datapoint of the last sample
+  if previous != None and (previous[0] - first) % step == 0 and 0 <= (previous[0] - first) / step < length:
+    series[(previous[0] - first) / step] = previous[1]
+
+  count = 0
+  total = 0.0
+  for value in series:
+    # NaN is the only value not equal to itself
+    if value == value:
+      count += 1
+      total += value
+  if count < 2:
+    return False
+  mean = total / count
+  variance = 0.0
+  for value in series:
+    if value == value:
+      variance += (value - mean)**2
+  stddev = sqrt(variance / count)
+  if stddev == 0:
+    return False
+  for pos in xrange(length):
+    value = series[pos]
+    series[pos] = (value - mean) / stddev if value == value else 0.0
+  return True
+
+#------------------------------------------------------------
+def _get_median_signal(spill, hostnames, length):
+  '''
+    returns an array('d') with the median of the signals of hostnames
+    (spilled as IOPS) at each datapoint.  The signals are read a block at
+    a time, so only CLOCK_SKEW_BLOCK_SIZE datapoints are in memory
+  '''
+  reference = array('d')
+  mid = len(hostnames) / 2
+  block_length = max(1, CLOCK_SKEW_BLOCK_SIZE / len(hostnames))
+  for start in xrange(0, length, block_length):
+    blocks = [ spill.get_values(hostname, IOPS, start, block_length)
+               for hostname in hostnames ]
+    for values in izip(*blocks):
+      values = sorted(values)
+      if len(values) % 2:
+        reference.append(values[mid])
+      else:
+        reference.append((values[mid - 1] + values[mid]) / 2)
+  return reference
+
+#------------------------------------------------------------
+def estimate_clock_offsets(filelist, report_context):
+  '''
+    returns the estimated clock offsets of the hosts of the iostat files
+    in filelist, keyed by hostname, each one mapping to (seconds,
+    correlation), see ReportContext.set_clock_offsets()
+
+    Load changes (e.g. a burst of IOs from the database) are seen by all
+    hosts at the same time, so the offset of a host is the lag with the
+    highest correlation of its total IOPS with the median of the total
+    IOPS of all hosts, each normalized to a mean of 0 and standard
+    deviation of 1.  The median is not affected by a few hosts with an
+    offset, so at least 3 hosts are needed to tell which hosts have
+    one.  Hosts without a correlation of at least
+    MIN_CLOCK_SKEW_CORRELATION are not included.
+    The IOPS are resampled every sample interval (the shortest one of
+    the files) over the time the hosts have samples, and spilled to disk
+    (see SeriesSpill), so only the signals of one host are in memory
+  '''
+  # the files with samples within MAX_CLOCK_SKEW seconds of the report
+  report_start_time = report_context.report_start_time
+  report_length = timedelta_get_seconds(report_context.report_end_time - report_start_time)
+  headers = {}
+  for fname in filelist:
+    try:
+      header = _get_iostat_header(fname, report_context)
+    except Exception as e:
+      report_context.log_msg('warning', 'Unable to read file for clock skew: %s: %s' % (fname, str(e)))
+      continue
+    if (header != None and
+        timedelta_get_seconds(header[0] - report_start_time) <= report_length + MAX_CLOCK_SKEW and
+        timedelta_get_seconds(header[1] - report_start_time) >= -MAX_CLOCK_SKEW):
+      headers[fname] = header
+  clock_offsets = {}
+  if len(headers) == 0:
+    return clock_offsets
+
+  # a datapoint every step seconds, from the first to the last sample of
+  # the hosts (in the report)
+  step = max(1, min([ sample_interval for (start_time, end_time, sample_interval) in headers.values() ]))
+  first = max(-MAX_CLOCK_SKEW,
+              min([ timedelta_get_seconds(start_time - report_start_time)
+                    for (start_time, end_time, sample_interval) in headers.values() ]))
+  last = min(report_length + MAX_CLOCK_SKEW,
+             max([ timedelta_get_seconds(end_time - report_start_time)
+                   for (start_time, end_time, sample_interval) in headers.values() ]))
+  if last <= first:
+    return clock_offsets
+  length = (last - first) / step + 1
+
+  spill = SeriesSpill([ IOPS ], length)
+  try:
+    for (hostname, files) in group_by_host([ fname for fname in filelist if fname in headers ]):
+      series = spill.new_series()
+      if _get_iops_signal(files, headers, report_context, series, first, step):
+        spill.add_host(hostname, { IOPS: series })
+    hostnames = spill.hostnames()
+    if len(hostnames) < 3:
+      return clock_offsets
+
+    reference = _get_median_signal(spill, hostnames, length)
+    for hostname in hostnames:
+      (seconds, correlation) = estimate_lag(spill.get_values(hostname, IOPS, 0, length),
+                                            reference, MAX_CLOCK_SKEW, step)
+      if correlation == None or correlation < MIN_CLOCK_SKEW_CORRELATION:
+        report_context.log_msg('info', 'No clock offset for %s (correlation %s)' % (hostname, correlation))
+        continue
+      report_context.log_msg('info', 'Clock offset for %s: %d seconds (correlation %.2f)' % (hostname, seconds, correlation))
+      clock_offsets[hostname] = (seconds, correlation)
+  finally:
+    spill.close()
+  return clock_offsets
+
+#------------------------------------------------------------
+def clear_parsed_data():
+  '''
+    clears the buckets and host metadata set by parse_input_files(), e.g.
+    before parsing the next shard of hosts in fleet mode
+  '''
+  global buckets
+  global hostnames
+  if isinstance(buckets, BucketStore):
+    buckets.close()
+  buckets = {}
+  hostnames = {}
+
+#------------------------------------------------------------
+def _parse_host_files(hostname, files, host_buckets,
+                      flash_disks_user, hard_disks_user):
+  '''
+    parses the files of hostname into host_buckets in a worker process
+    (see parse_by_host() in exawutil), and returns the host metadata and
+    iostat summary of the host
+  '''
+  global buckets
+  clear_parsed_data()
+  buckets = host_buckets
+  _parse_files(files, _my_report_context, flash_disks_user, hard_disks_user)
+  if hostname not in hostnames:
+    return (None, None)
+  return (hostnames[hostname], _my_report_context.hostnames[hostname].iostat)
+
+#------------------------------------------------------------
+def _register_host(hostname, host_metadata, host_summary):
+  '''
+    adds the host metadata and iostat summary of hostname, parsed by a
+    worker process
+  '''
+  hostnames[hostname] = host_metadata
+  _my_report_context.add_hostinfo(hostname)
+  _my_report_context.hostnames[hostname].iostat = host_summary
+
 #------------------------------------------------------------
 def parse_input_files(filelist,
                       report_context,
                       flash_disks_user = DEFAULT_FLASH_DISKS,
-                      hard_disks_user = DEFAULT_HARD_DISKS):
+                      hard_disks_user = DEFAULT_HARD_DISKS,
+                      max_hosts = None):
+  '''
+    This is the main routine in this module, which parses the files
+    and populates the buckets, see _parse_files() for the parameters
+    (filelist, report_context, flash_disks_user,
+      hard_disks_user, max_hosts)
+
+    With report_context.parse_jobs > 1, the files of each host are
+    parsed by a worker process, see parse_by_host() in exawutil
+  '''
+  global buckets
+  global _my_report_context
+
+  _my_report_context = report_context
+  buckets = use_bucket_store(buckets, report_context)
+  parse_by_host(filelist, report_context, buckets,
+                lambda files, max_hosts: _parse_files(files, report_context, flash_disks_user, hard_disks_user, max_hosts),
+                lambda hostname, files, host_buckets: _parse_host_files(hostname, files, host_buckets, flash_disks_user, hard_disks_user),
+                _register_host, max_hosts)
+
+#------------------------------------------------------------
+def _parse_files(filelist,
+               report_context,
+               flash_disks_user = DEFAULT_FLASH_DISKS,
+               hard_disks_user = DEFAULT_HARD_DISKS,
+               max_hosts = None):
 
 
   '''
-    This is the main routine in this module, which parses the
-    files and populates the buckets
+    parses the files and populates the buckets, see
+    parse_input_files()
 
     PARAMETERS:
       filelist  : list of files to process, can be bz2, gz or text
@@ -602,6 +1141,8 @@ def parse_input_files(filelist,
                   if list is not in the header file of exawatcher iostat
       hard_disks_user: list of hard disks (optional); only used
                   if list is not in the header file of exawatcher stats
+      max_hosts: maximum number of hosts (optional); files of any other
+                  hosts are ignored.  Used in fleet mode to bound memory
 
     NOTES:
       flash_disks_user, hard_disks_user - uses DEFAULT if not specified
@@ -629,11 +1170,14 @@ def parse_input_files(filelist,
     had different devices in them, make sure we still calculate
     this correctly by maintaining the COUNT within the device
 
-    We also maintain a list of processed_start_times - this is based on the
+    We also maintain a set of processed_start_times - this is based on the
     hostname and 'Starting Time' string at the start of the exawatcher
     iostat file.
     If we see the same 'Starting Time' (for the same host) we skip the
     file and move onto the next file
+    Files may still overlap, so we also skip samples with a timestamp we
+    have already processed for the host (see
+    HostMetadata.is_duplicate_sample)
 
     We also check if file has data for the timeframe of interest, if not
     we skip the file
@@ -646,8 +1190,8 @@ def parse_input_files(filelist,
 
   _my_report_context = report_context
 
-  # list of file start_times we have processed - based on header in file
-  processed_start_times = []
+  # set of file start_times we have processed - based on header in file
+  processed_start_times = set()
   
   # now go through the list of files
   for fname in (filelist):
@@ -661,6 +1205,8 @@ def parse_input_files(filelist,
 
       # get hostname
       hostname = get_hostname_from_filename(fname)
+      if max_hosts != None and hostname not in hostnames and len(hostnames) >= max_hosts:
+        raise MaxHostsExceeded(fname)
 
       # first check file header to ensure this is an ExaWatcher iostat file
       header = [next(input_file) for x in xrange(EXAWATCHER_HEADER_LINES)]
@@ -684,6 +1230,8 @@ def parse_input_files(filelist,
                                           DATE_FMT_INPUT)
 
       file_end_time = get_file_end_time(file_start_time, header[EXAWATCHER_SAMPLE_INTERVAL_POSITION], header[EXAWATCHER_ARCHIVE_COUNT_POSITION])
+      # each sample is weighted by the sample interval of the file
+      sample_interval = get_sample_interval(header[EXAWATCHER_SAMPLE_INTERVAL_POSITION])
 
       # check if we have data in the file for our report interval
       if file_end_time < _my_report_context.report_start_time or file_start_time > _my_report_context.report_end_time:
@@ -694,6 +1242,8 @@ def parse_input_files(filelist,
       _my_report_context.log_msg('warning', 'Unrecognized file: %s' % (e.value))
     except DuplicateFile as e:
       _my_report_context.log_msg('warning', 'Ignoring duplicate file: %s' %(e.value))
+    except MaxHostsExceeded as e:
+      _my_report_context.log_msg('error', 'Maximum number of hosts (%d) exceeded, ignoring file: %s' % (max_hosts, e.value))
     except NoDataInFile as e:
       _my_report_context.log_msg('warning', 'No data within report interval in file: %s' % (e.value))
     except IOError as e:
@@ -714,7 +1264,7 @@ def parse_input_files(filelist,
         _my_report_context.add_hostinfo(hostname)
         
       # include in list to keep track of files processed
-      processed_start_times.append( (hostname,header[EXAWATCHER_STARTING_TIME_POSITION]) )
+      processed_start_times.add( (hostname,header[EXAWATCHER_STARTING_TIME_POSITION]) )
       hostnames[hostname].processed_files.append(fname)
 
       # get the disk list from exawatcher if available
@@ -758,6 +1308,8 @@ def parse_input_files(filelist,
       
       # initialize bucket_id
       bucket_id = -1
+      # totals across all flash/hard disks for the current sample
+      sample_totals = {}
 
       # now process the rest of the file
       for line in input_file:
@@ -772,19 +1324,32 @@ def parse_input_files(filelist,
         # newer version has mm/dd/yy hh24:mi:ss
         # or                mm/dd/yyyy hh:mi:ss AM|PM
         if tokens[0] == 'Time:' or re.match('\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}',line) or re.match('\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}',line):
-          sample_time = _parse_time_format(line,file_start_date_str, file_start_time)
+          sample_time = report_context.get_host_time(hostname,
+                          _parse_time_format(line,file_start_date_str, file_start_time))
+          # new sample, so previous sample is complete
+          _flush_sample_totals(sample_totals, hostnames[hostname], bucket_id,
+                               sample_interval)
 
           # for samples in our desired range, get the bucket_id
           if sample_time >= report_context.report_start_time and sample_time <= report_context.report_end_time:
-            bucket_id = report_context.get_bucket_id(sample_time)
-            # create bucket with hostname
-            if bucket_id not in buckets:
-              buckets[bucket_id] = { }
-            if hostname not in buckets[bucket_id]:
-              buckets[bucket_id][hostname] = {}
+            # ignore samples we already have from an overlapping file
+            if hostnames[hostname].is_duplicate_sample(sample_time, report_context):
+              bucket_id = -1
+            else:
+              bucket_id = report_context.get_bucket_id(sample_time)
+              hostnames[hostname].check_gap(sample_time, sample_interval)
+              # create bucket with hostname
+              if bucket_id not in buckets:
+                buckets[bucket_id] = { }
+              if hostname not in buckets[bucket_id]:
+                buckets[bucket_id][hostname] = {}
           else:
             bucket_id = -1
 
+          # the rest of a sample we ignore can be skipped at once
+          if bucket_id == -1 and isinstance(input_file, MappedTextFile):
+            input_file.skip_to(_SAMPLE_TIME_MARKER)
+
         elif tokens[0] == 'avg-cpu:':
           # get position of stats for this file,
           # subtract 1 since we dont' have the avg-cpu line in the actual stats
@@ -808,7 +1373,8 @@ def parse_input_files(filelist,
         elif len(tokens) == 6 and state_cpu:
           if bucket_id != -1:
             _parse_cpu(tokens,bucket_id,hostname, cpu_stat_pos,
-                       report_context.hostnames[hostname].iostat.summary_stats)
+                       report_context.hostnames[hostname].iostat.summary_stats,
+                       sample_interval)
           state_cpu = False
 
         # get stat positions for disk
@@ -836,7 +1402,13 @@ def parse_input_files(filelist,
                       (tokens[0] in file_hard_disks),
                       hostname,
                       disk_stat_pos,
-                      report_context.hostnames[hostname].iostat.summary_stats)
+                      report_context.hostnames[hostname].iostat.summary_stats,
+                      sample_totals,
+                      sample_interval)
+
+      # and the last sample in the file
+      _flush_sample_totals(sample_totals, hostnames[hostname], bucket_id,
+                               sample_interval)
     finally:
       # close the file
       if input_file != None:
@@ -863,16 +1435,28 @@ def parse_input_files(filelist,
       for disktype in [ FLASH, DISK ]:
         if disktype in bucket[host]:
           _compute_disk_bucket(bucket[host][disktype])
+          # extremes of the totals for all disks
+          if i in hostnames[host].extremes and disktype in hostnames[host].extremes[i]:
+            bucket[host][disktype][SUMMARY].update(hostnames[host].extremes[i][disktype])
+
+  # replace averages with the values to chart for the reduce_mode
+  if _my_report_context.reduce_mode != REDUCE_AVG:
+    _reduce_buckets(_my_report_context)
 
   # now calculate averages for the summary bucket
-  for host in report_context.hostnames:
+  for host in hostnames:
     summary_stats = report_context.hostnames[host].iostat.summary_stats
     if CPU in summary_stats:
       _compute_cpu_bucket(summary_stats[CPU])
     for disktype in [ FLASH, DISK ]:
       if disktype in summary_stats:
         _compute_disk_bucket(summary_stats[disktype])
+        # variability across all disks, based on per-sample totals
+        if host in hostnames and disktype in hostnames[host].variance:
+          summary_stats[disktype][SUMMARY][VAR] = hostnames[host].variance[disktype]
+          finalize_variance(summary_stats[disktype][SUMMARY])
 
+  _set_correlation_series(report_context)
   _process_rules(report_context)
 
 #------------------------------------------------------------
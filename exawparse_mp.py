@@ -28,7 +28,7 @@ import re
 from datetime import datetime,timedelta
 from glob import glob
 
-from exawutil import DEFAULT_MAX_BUCKETS, TIMESTAMP, CNT, CPU, USR, NICE, SYS, WIO, STL, IDL, BUSY, EXAWATCHER_STARTING_TIME_POSITION, EXAWATCHER_SAMPLE_INTERVAL_POSITION, EXAWATCHER_ARCHIVE_COUNT_POSITION, EXAWATCHER_MODULE_POSITION, EXAWATCHER_COLLECTION_COMMAND_POSITION, EXAWATCHER_MISC_INFO_POSITION, EXAWATCHER_HEADER_LINES, DATE_FMT_INPUT, FILE_UNKNOWN, file_type, open_file, get_file_end_time, get_hostname_from_filename, UnrecognizedFile, DuplicateFile, NoDataInFile, HostNameMismatch, ReportContext, HostMetadata
+from exawutil import DEFAULT_MAX_BUCKETS, TIMESTAMP, CNT, WEIGHT, CPU, USR, NICE, SYS, WIO, STL, IDL, BUSY, VAR, MAX, REDUCE_AVG, EXAWATCHER_STARTING_TIME_POSITION, EXAWATCHER_SAMPLE_INTERVAL_POSITION, EXAWATCHER_ARCHIVE_COUNT_POSITION, EXAWATCHER_MODULE_POSITION, EXAWATCHER_COLLECTION_COMMAND_POSITION, EXAWATCHER_MISC_INFO_POSITION, EXAWATCHER_HEADER_LINES, DATE_FMT_INPUT, FILE_UNKNOWN, file_type, open_file, get_sample_interval, init_variance, update_variance, finalize_variance, init_extremes, update_extremes, reduce_series, get_file_end_time, get_hostname_from_filename, parse_by_host, use_bucket_store, BucketStore, UnrecognizedFile, DuplicateFile, MaxHostsExceeded, NoDataInFile, HostNameMismatch, ReportContext, HostMetadata
 
 import exawrules
 
@@ -51,7 +51,18 @@ USER_THRESHOLD_MAX_CPUS=10  # and it has low %usr ...
 #     { <cpu_id|all>: { USR: <x>, NICE: <x>, SYS: <x>,
 #                       WIO: <x>, IRQ: <x>, SOFT: <x>,
 #                       STL: <x>, GUEST: <x>, IDL:<x>,
-#                       BUSY: <x>, CNT: <x> }
+#                       BUSY: <x>, CNT: <x>, WEIGHT: <x>,
+#                       VAR: { BUSY: <accumulator> } }
+#
+# each sample is weighted by the sample interval of its file, and WEIGHT
+# has the sum of the sample intervals (see exawparse_io)
+#
+# after the second pass VAR is replaced by STDDEV and CV for BUSY
+# (see finalize_variance)
+#
+# if the reduce_mode is not avg, each cpu in a bucket also has MIN/MAX
+# (see update_extremes), and after the second pass the averages are
+# replaced with the values to chart (see reduce_series)
 #
 # note, since summary is per cpu, we need
 # it should have the same structure as a bucket ...
@@ -68,6 +79,14 @@ _my_report_context = None
 
 EXAWATCHER_MPSTAT_MODULE_NAME = 'MpstatExaWatcher'
 
+# series of each host for the correlation page, keyed by name, each one
+# mapping to the stat of all cpus
+CORRELATION_SERIES = { 'cpu_busy': BUSY,
+                       'cpu_wio' : WIO }
+
+# stats in the buckets that are charted, and may need to be reduced
+REDUCE_STATS = [ USR, NICE, SYS, WIO, IRQ, SOFT, STL, GUEST, IDL, BUSY ]
+
 #------------------------------------------------------------
 # extend HostMetadata to include information about potential
 # high cpu usage on a subset of cpus
@@ -83,10 +102,14 @@ class HostMetadataMpstat(HostMetadata):
                                                          self.flag_alert)
 
 #------------------------------------------------------------
-def _init_cpustat():
-  return { USR: 0, NICE: 0, SYS: 0, WIO: 0,
-           IRQ: 0, SOFT: 0, STL: 0, GUEST: 0,
-           IDL: 0, BUSY: 0, CNT: 0 }
+def _init_cpustat(extremes = False):
+  cpu = { USR: 0, NICE: 0, SYS: 0, WIO: 0,
+          IRQ: 0, SOFT: 0, STL: 0, GUEST: 0,
+          IDL: 0, BUSY: 0, CNT: 0, WEIGHT: 0,
+          VAR: { BUSY: init_variance() } }
+  if extremes:
+    init_extremes(cpu)
+  return cpu
 
 #------------------------------------------------------------
 def _parse_time_format(tokens,base_date_str,file_start_time):
@@ -147,30 +170,42 @@ def _parse_time_format(tokens,base_date_str,file_start_time):
 
 
 #------------------------------------------------------------
-def _update_cpu_bucket(bucket, usr, nice, sys, wio, irq, soft, steal, guest, idle):
+def _update_cpu_bucket(bucket, usr, nice, sys, wio, irq, soft, steal, guest, idle, weight):
   '''
-    updates the stats for the cpu bucket
+    updates the stats for the cpu bucket, weighted by the sample interval
   '''
-  bucket[USR]  += float(usr)
-  bucket[NICE] += float(nice)
-  bucket[SYS]  += float(sys)
-  bucket[WIO]  += float(wio)
-  bucket[IRQ]  += float(irq)
-  bucket[SOFT] += float(soft)
-  bucket[STL]  += float(steal)
+  bucket[USR]  += float(usr)*weight
+  bucket[NICE] += float(nice)*weight
+  bucket[SYS]  += float(sys)*weight
+  bucket[WIO]  += float(wio)*weight
+  bucket[IRQ]  += float(irq)*weight
+  bucket[SOFT] += float(soft)*weight
+  bucket[STL]  += float(steal)*weight
   # we do not always have guest here ...
   if guest != None:
-    bucket[GUEST]+= float(guest)
+    bucket[GUEST]+= float(guest)*weight
   else:
     bucket[GUEST] = None
-  bucket[IDL]  += float(idle)
+  bucket[IDL]  += float(idle)*weight
   bucket[CNT]  += 1
+  bucket[WEIGHT] += weight
+  update_variance(bucket[VAR][BUSY], 100 - float(idle), weight)
+  if MAX in bucket:
+    for (stat, value) in [ (USR, usr), (NICE, nice), (SYS, sys), (WIO, wio),
+                           (IRQ, irq), (SOFT, soft), (STL, steal),
+                           (GUEST, guest), (IDL, idle) ]:
+      if value != None:
+        update_extremes(bucket, stat, float(value))
+    update_extremes(bucket, BUSY, 100 - float(idle))
   
 #------------------------------------------------------------
-def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary):
+def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary, weight,
+               extremes = False):
   '''
     parses the cpu line with the actual metrics
     note that position is dynamically determined based on the header line
+    weight: sample interval, to weight the sample
+    extremes: keep track of MIN/MAX in the bucket (for reduce_mode)
   '''
   cpu_id = tokens[stat_pos[CPU]]
   if cpu_id != 'all':
@@ -191,17 +226,35 @@ def _parse_cpu(tokens, bucket_id, hostname, stat_pos, summary):
   # we do not check ...
   bucket = buckets[bucket_id][hostname]
   if cpu_id not in bucket:
-    bucket[cpu_id] = _init_cpustat()
+    bucket[cpu_id] = _init_cpustat(extremes)
   if cpu_id not in summary:
     summary[cpu_id] = _init_cpustat()
 
   # update stats for the bucket
-  _update_cpu_bucket(bucket[cpu_id], usr, nice, sys, wio, irq, soft, steal, guest, idle)
+  _update_cpu_bucket(bucket[cpu_id], usr, nice, sys, wio, irq, soft, steal, guest, idle, weight)
 
   # update stats for the summary
-  _update_cpu_bucket(summary[cpu_id], usr, nice, sys, wio, irq, soft, steal, guest, idle)
+  _update_cpu_bucket(summary[cpu_id], usr, nice, sys, wio, irq, soft, steal, guest, idle, weight)
 
 
+#------------------------------------------------------------
+def _set_correlation_series(report_context):
+  '''
+    sets the CORRELATION_SERIES of each host just parsed, for the
+    correlation page (see StatFileSummary.series)
+  '''
+  num_series = report_context.get_bucket_id(report_context.report_end_time) + 1
+  for host in hostnames:
+    series = {}
+    for name in CORRELATION_SERIES:
+      series[name] = [ None ] * num_series
+    for (i, bucket) in buckets.iteritems():
+      if host not in bucket or 'all' not in bucket[host]:
+        continue
+      for (name, stat) in CORRELATION_SERIES.iteritems():
+        series[name][i] = bucket[host]['all'][stat]
+    report_context.hostnames[host].mpstat.series = series
+
 #------------------------------------------------------------
 def _flag_cpus(report_context):
   '''
@@ -220,8 +273,8 @@ def _flag_cpus(report_context):
   # . and then check if those same CPUs have low %user
   #   %usr < USER_THRESHOLD_MAX_CPUS
 
-  # process for all hosts
-  for host in report_context.hostnames:
+  # process for all hosts just parsed
+  for host in hostnames:
     # ignore multihost entry, it won't have summaries for flagging
     if report_context.multihost and host == '':
       continue
@@ -245,17 +298,80 @@ def _flag_cpus(report_context):
         elif mpstat_summary[cpu_id][IDL] <= IDLE_THRESHOLD_MAX_CPUS:
           hostnames[host].flag_warning.append(cpu_id)
 
+#------------------------------------------------------------
+def clear_parsed_data():
+  '''
+    clears the buckets and host metadata set by parse_input_files(), e.g.
+    before parsing the next shard of hosts in fleet mode
+  '''
+  global buckets
+  global hostnames
+  if isinstance(buckets, BucketStore):
+    buckets.close()
+  buckets = {}
+  hostnames = {}
+
+#------------------------------------------------------------
+def _parse_host_files(hostname, files, host_buckets):
+  '''
+    parses the files of hostname into host_buckets in a worker process
+    (see parse_by_host() in exawutil), and returns the host metadata and
+    mpstat summary of the host
+  '''
+  global buckets
+  clear_parsed_data()
+  buckets = host_buckets
+  _parse_files(files, _my_report_context)
+  if hostname not in hostnames:
+    return (None, None)
+  return (hostnames[hostname],
+          _my_report_context.hostnames[hostname].mpstat)
+
+#------------------------------------------------------------
+def _register_host(hostname, host_metadata, host_summary):
+  '''
+    adds the host metadata and mpstat summary of hostname, parsed by a
+    worker process
+  '''
+  hostnames[hostname] = host_metadata
+  _my_report_context.add_hostinfo(hostname)
+  _my_report_context.hostnames[hostname].mpstat = host_summary
+
 #------------------------------------------------------------
 def parse_input_files(filelist,
-                      report_context):
+                      report_context,
+                      max_hosts = None):
+  '''
+    This is the main routine in this module, which parses the files
+    and populates the buckets, see _parse_files() for the parameters
+    (filelist, report_context, max_hosts)
+
+    With report_context.parse_jobs > 1, the files of each host are
+    parsed by a worker process, see parse_by_host() in exawutil
+  '''
+  global buckets
+  global _my_report_context
+
+  _my_report_context = report_context
+  buckets = use_bucket_store(buckets, report_context)
+  parse_by_host(filelist, report_context, buckets,
+                lambda files, max_hosts: _parse_files(files, report_context, max_hosts),
+                _parse_host_files, _register_host, max_hosts)
+
+#------------------------------------------------------------
+def _parse_files(filelist,
+               report_context,
+               max_hosts = None):
   '''
-    This is the main routine in this module, which parses the
-    files and populates buckets and summary
+    parses the files and populates buckets and summary, see
+    parse_input_files()
 
     PARAMETERS:
       filelist: list of files to process, can be bz2, gz or text
       report_context: report context with start/end times and bucket
                       information
+      max_hosts: maximum number of hosts (optional); files of any other
+                  hosts are ignored.  Used in fleet mode to bound memory
 
     DESCRIPTION:
       This will set the following global variables
@@ -269,11 +385,14 @@ def parse_input_files(filelist,
       After parsing, we go through a second pass to compute the average
       within each bucket.
 
-      We also maintain a list of processed_start_times - this is based on
+      We also maintain a set of processed_start_times - this is based on
       the hostname and 'Starting Time' string at the start of the
       exawatcher mpstat file.
       If we see the same 'Starting Time' for the same host, we skip the
       file and move onto the next file
+      Files may still overlap, so we also skip samples with a timestamp
+      we have already processed for the host (see
+      HostMetadata.is_duplicate_sample)
 
       We also check if the file has data for the timeframe of interest, if
       not, we skip the file
@@ -284,8 +403,8 @@ def parse_input_files(filelist,
   global summary
   global hostnames
 
-  # list of file start times we have processed based on header
-  processed_start_times = []
+  # set of file start times we have processed based on header
+  processed_start_times = set()
 
   # now go through list of files
   for fname in (filelist):
@@ -298,6 +417,8 @@ def parse_input_files(filelist,
 
       # get hostname
       hostname = get_hostname_from_filename(fname)
+      if max_hosts != None and hostname not in hostnames and len(hostnames) >= max_hosts:
+        raise MaxHostsExceeded(fname)
 
       # first check file header to ensure this is ExaWatcher mpstat file
       header = [next(input_file) for x in xrange(EXAWATCHER_HEADER_LINES)]
@@ -320,6 +441,8 @@ def parse_input_files(filelist,
                                           DATE_FMT_INPUT)
 
       file_end_time = get_file_end_time(file_start_time, header[EXAWATCHER_SAMPLE_INTERVAL_POSITION], header[EXAWATCHER_ARCHIVE_COUNT_POSITION])
+      # each sample is weighted by the sample interval of the file
+      sample_interval = get_sample_interval(header[EXAWATCHER_SAMPLE_INTERVAL_POSITION])
 
       # check if we have data in the file for our report interval
       if file_end_time < report_context.report_start_time or file_start_time > report_context.report_end_time:
@@ -329,6 +452,8 @@ def parse_input_files(filelist,
       report_context.log_msg('warning', 'Unrecognized file: %s' % (e.value))
     except DuplicateFile as e:
       report_context.log_msg('warning', 'Ignoring duplicate file: %s' % (e.value))
+    except MaxHostsExceeded as e:
+      report_context.log_msg('error', 'Maximum number of hosts (%d) exceeded, ignoring file: %s' % (max_hosts, e.value))
     except NoDataInFile as e:
       report_context.log_msg('warning', 'No data within report interval in file: %s' % (e.value))
     except IOError as e:
@@ -347,7 +472,7 @@ def parse_input_files(filelist,
 
       report_context.add_hostinfo(hostname)
       
-      processed_start_times.append( (hostname, header[EXAWATCHER_STARTING_TIME_POSITION]) )
+      processed_start_times.add( (hostname, header[EXAWATCHER_STARTING_TIME_POSITION]) )
       hostnames[hostname].processed_files.append(fname)
 
         
@@ -361,6 +486,9 @@ def parse_input_files(filelist,
 
       # initialize bucket
       bucket_id = -1
+      # time of the current sample, each cpu has its own row in a sample
+      current_sample_time = None
+      duplicate_sample = False
 
       for line in input_file:
         line = line.rstrip()
@@ -399,10 +527,21 @@ def parse_input_files(filelist,
         # CPU
         elif stat_pos[CPU] != None and tokens[stat_pos[CPU]] != "CPU" and re.match('\d{2}:\d{2}:\d{2}',tokens[0]):
           # parse the time format, we need to get the date into it
-          sample_time = _parse_time_format(tokens, file_start_date_str, file_start_time)
+          sample_time = report_context.get_host_time(hostname,
+                          _parse_time_format(tokens, file_start_date_str, file_start_time))
 
           # check if this is in our time range
           if sample_time >= report_context.report_start_time and sample_time <= report_context.report_end_time:
+            # all rows of a sample share its timestamp, so only check for
+            # duplicates (from overlapping files) when the sample changes
+            if sample_time != current_sample_time:
+              current_sample_time = sample_time
+              duplicate_sample = hostnames[hostname].is_duplicate_sample(sample_time, report_context)
+              if not duplicate_sample:
+                hostnames[hostname].check_gap(sample_time, sample_interval)
+            if duplicate_sample:
+              continue
+
             # note, each sample has its own timestamp for mpstat
             bucket_id = report_context.get_bucket_id(sample_time)
             if bucket_id not in buckets:
@@ -410,7 +549,9 @@ def parse_input_files(filelist,
             if hostname not in buckets[bucket_id]:
               buckets[bucket_id][hostname] = {}
 
-            _parse_cpu(tokens, bucket_id, hostname, stat_pos, report_context.hostnames[hostname].mpstat.summary_stats)
+            _parse_cpu(tokens, bucket_id, hostname, stat_pos, report_context.hostnames[hostname].mpstat.summary_stats,
+                       sample_interval,
+                       report_context.reduce_mode != REDUCE_AVG)
             
     finally:
       if input_file != None:
@@ -426,28 +567,48 @@ def parse_input_files(filelist,
       for cpu_id in bucket[host]:
         # compute stats for bucket
         bucket_cpu = bucket[host][cpu_id]
-        if bucket_cpu[CNT] > 1:
+        if bucket_cpu[WEIGHT] > 0:
           for stat in [ USR, NICE, SYS, WIO, IRQ, SOFT, STL, GUEST, IDL ]:
             if bucket_cpu[stat] != None:
-              bucket_cpu[stat] = bucket_cpu[stat]/bucket_cpu[CNT]
+              bucket_cpu[stat] = bucket_cpu[stat]/bucket_cpu[WEIGHT]
           # busy is 100-idle
           bucket_cpu[BUSY] = 100 - bucket_cpu[IDL]
+        finalize_variance(bucket_cpu)
+
+  # replace averages with the values to chart for the reduce_mode
+  if report_context.reduce_mode != REDUCE_AVG:
+    # series keyed by (host, cpu_id), list of (bucket_id, stat)
+    series = {}
+    for i in sorted(buckets):
+      for host in buckets[i]:
+        for cpu_id in buckets[i][host]:
+          series.setdefault((host, cpu_id), []).append((i, buckets[i][host][cpu_id]))
+    for key in series:
+      reduce_series(report_context.reduce_mode, series[key], REDUCE_STATS)
+    # store the reduced stats, as the buckets may have been spilled
+    # since (see BucketStore)
+    for ((host, cpu_id), points) in series.iteritems():
+      for (i, stat) in points:
+        buckets[i][host][cpu_id] = stat
 
   # calculate summary too
-  for host in report_context.hostnames:
+  for host in hostnames:
     summary_stats = report_context.hostnames[host].mpstat.summary_stats
     for cpu_id in summary_stats:
-      if summary_stats[cpu_id][CNT] > 1:
+      if summary_stats[cpu_id][WEIGHT] > 0:
         cpu_total = 0
         for stat in [ USR, NICE, SYS, WIO, IRQ, SOFT, STL, GUEST, IDL ]:
           if summary_stats[cpu_id][stat] != None:
-            summary_stats[cpu_id][stat] = summary_stats[cpu_id][stat]/summary_stats[cpu_id][CNT]
+            summary_stats[cpu_id][stat] = summary_stats[cpu_id][stat]/summary_stats[cpu_id][WEIGHT]
             cpu_total += summary_stats[cpu_id][stat]
         # customer bug25102232: check if all values are 0
         if cpu_total > 0:
           summary_stats[cpu_id][BUSY] = 100 - summary_stats[cpu_id][IDL]
         else:
           summary_stats[cpu_id][BUSY] = 0
+      finalize_variance(summary_stats[cpu_id])
+
+  _set_correlation_series(report_context)
 
   # now try and find out if we have maxed out some cpus
   _flag_cpus(report_context)
@@ -459,9 +620,12 @@ def _process_rules(report_context):
   # list of callbacks for rules
   RULES_MPSTAT=[ exawrules.rule_mpstat_01_high_cpu,
                  exawrules.rule_mpstat_02_high_cpu_subset_alert ,
-                 exawrules.rule_mpstat_03_high_cpu_subset_warning  ]
+                 exawrules.rule_mpstat_03_high_cpu_subset_warning ,
+                 exawrules.rule_gaps_01,
+                 exawrules.rule_dup_samples_01 ]
 
-  for host in report_context.hostnames:
+  # only the hosts just parsed, other hosts may be from another shard
+  for host in hostnames:
     # skip multi-cell information
     if host == '':
       continue
@@ -471,6 +635,8 @@ def _process_rules(report_context):
       # individual rules should know how to read the tuple
       if rule == exawrules.rule_mpstat_01_high_cpu:
         info = ( IDLE_THRESHOLD_ALL_CPUS,  )
+      elif rule in (exawrules.rule_gaps_01, exawrules.rule_dup_samples_01):
+        info = ( hostnames[host], )
       else:  
         info = ( hostnames[host],  # host metadata
                  # number of cpus
@@ -42,7 +42,7 @@
 #       cpu id, cellsrvstat metric key ...)
 
 # import some constants from exawutil
-from exawutil import USR, SYS, WIO, IDL, IOPS, MBPS, AWAIT, UTIL, FLASH, DISK, SUMMARY, VALUE, FINDING_TYPE_INFO, FINDING_TYPE_SUMMARY, FINDING_TYPE_DETAIL
+from exawutil import USR, SYS, WIO, IDL, IOPS, MBPS, AWAIT, UTIL, FLASH, DISK, SUMMARY, VALUE, STDDEV, CV, FINDING_TYPE_INFO, FINDING_TYPE_SUMMARY, FINDING_TYPE_DETAIL, timedelta_get_seconds
 
 # These are findings we can process
 # NOTE: no globalization; any globalization if required should be done in the UI
@@ -62,6 +62,12 @@ FINDING_IOSTAT_MSG_05='%s: %d devices have average wait times exceeding %.2fms'
 FINDING_IOSTAT_MSG_06='%s: %d devices have average utilization exceeding %.2f%%'
 FINDING_IOSTAT_MSG_07='%s: %d devices exceeds maximum IOPs capacity of %d'
 FINDING_IOSTAT_MSG_08='%s: %d devices exceeds maximum MB/s capacity of %d'
+FINDING_IOSTAT_MSG_09='%s: Bursty IO load: %.2f average IOPs with standard deviation %.2f (coefficient of variation %.2f)'
+
+FINDING_DUP_MSG_01='Ignored %d duplicate samples from overlapping files'
+FINDING_GAP_MSG_01='Gaps in samples: %d (%d seconds without data, largest gap: %s to %s)'
+FINDING_CLOCK_SKEW_MSG_01='Clock is %d seconds ahead of the other hosts (correlation %.2f)'
+FINDING_CLOCK_SKEW_MSG_02='Clock is %d seconds ahead of the other hosts (correlation %.2f), samples aligned'
 
 FINDING_CELLSRVSTAT_MSG_01='%d memory allocation failures'
 FINDING_CELLSRVSTAT_MSG_02='%.2f MB of Smart IO passthru (%.2f eligible MB)'
@@ -70,6 +76,9 @@ FINDING_CELLSRVSTAT_MSG_03='%.2f OLTP Hit ratio on flash cache'
 # hard-coded threshold for average wait times and utilization
 RULE_IOSTAT_AWAIT_THRESHOLD={ FLASH: 10, DISK: 20 }
 RULE_IOSTAT_UTIL_THRESHOLD={ FLASH: 80, DISK: 80 }
+# coefficient of variation of IOPs, only checked if there is some activity
+RULE_IOSTAT_CV_THRESHOLD={ FLASH: 1, DISK: 1 }
+RULE_IOSTAT_CV_MIN_IOPS={ FLASH: 1000, DISK: 100 }
 
 RULE_CELLSRVSTAT_FC_HIT_RATIO=80
 
@@ -84,6 +93,38 @@ def rule_alert_01_count(summary_item, info = None):
   else:
     summary_item.add_finding(FINDING_ALERT_MSG_01, FINDING_TYPE_INFO)
 
+#------------------------------------------------------------
+def rule_gaps_01(summary_item, info):
+  # common to all stat types; first item in info is the HostMetadata
+  host_metadata = info[0]
+  if len(host_metadata.gaps) > 0:
+    gap_seconds = [ timedelta_get_seconds(end - start) for (start, end) in host_metadata.gaps ]
+    (start, end) = host_metadata.gaps[gap_seconds.index(max(gap_seconds))]
+    summary_item.add_finding(FINDING_GAP_MSG_01 % (len(host_metadata.gaps),
+                                                   sum(gap_seconds),
+                                                   start, end),
+                             FINDING_TYPE_INFO)
+
+#------------------------------------------------------------
+def rule_dup_samples_01(summary_item, info):
+  # common to all stat types; first item in info is the HostMetadata
+  host_metadata = info[0]
+  if host_metadata.dropped_samples > 0:
+    summary_item.add_finding(FINDING_DUP_MSG_01 % host_metadata.dropped_samples,
+                             FINDING_TYPE_INFO)
+
+#------------------------------------------------------------
+def rule_clock_skew_01(summary_item, info):
+  # info is the (seconds, correlation) clock offset of the host, and
+  # whether its samples are aligned by the offset
+  ((seconds, correlation), aligned) = info
+  if seconds != 0:
+    if aligned:
+      msg = FINDING_CLOCK_SKEW_MSG_02 % (seconds, correlation)
+    else:
+      msg = FINDING_CLOCK_SKEW_MSG_01 % (seconds, correlation)
+    summary_item.add_finding(msg, FINDING_TYPE_INFO)
+
 #------------------------------------------------------------
 def rule_mpstat_01_high_cpu(summary_item, info):
   mpstat_summary = summary_item.summary_stats
@@ -196,6 +237,18 @@ def rule_iostat_05_individual_disks(summary_item, info):
                                                           RULE_IOSTAT_UTIL_THRESHOLD[disktype]),
                                  FINDING_TYPE_DETAIL)        
 
+#----------------------------------------------------------------------
+def rule_iostat_06_bursty(summary_item, info = None):
+  iostat_summary = summary_item.summary_stats
+  for disktype in [ FLASH, DISK ]:
+    if disktype in iostat_summary and SUMMARY in iostat_summary[disktype] and CV in iostat_summary[disktype][SUMMARY]:
+      disk_summary = iostat_summary[disktype][SUMMARY]
+      if disk_summary[IOPS] > RULE_IOSTAT_CV_MIN_IOPS[disktype] and disk_summary[CV][IOPS] > RULE_IOSTAT_CV_THRESHOLD[disktype]:
+        summary_item.add_finding(FINDING_IOSTAT_MSG_09 % (disktype,
+                                                          disk_summary[IOPS],
+                                                          disk_summary[STDDEV][IOPS],
+                                                          disk_summary[CV][IOPS]))
+
 #------------------------------------------------------------
 def rule_cellsrvstat_01_mem_failures(summary_item, info):
   cs_summary = summary_item.summary_stats
@@ -24,14 +24,37 @@
 #
 
 import os
+import re
 import errno
+import shutil
+import hashlib
 import gzip
-from bz2 import BZ2File
+import tarfile
+import time
+import json
+import tempfile
+import marshal
+import mmap
+import zlib
+from bz2 import BZ2Decompressor
 from socket import getfqdn
 from subprocess import Popen, PIPE
+from multiprocessing import Pool
+from thread import get_ident
+from threading import Lock, Thread
+from Queue import Queue, Empty
+from cStringIO import StringIO
 from datetime import timedelta,datetime
+from collections import OrderedDict
 # from mimetypes import guess_type
 import sys
+from math import sqrt
+from operator import mul
+from itertools import imap
+from types import GeneratorType
+from array import array
+from base64 import b64encode
+from json.encoder import encode_basestring_ascii
 from logging import NOTSET,DEBUG,INFO,WARNING,ERROR,CRITICAL, traceback
 
 try:
@@ -69,8 +92,18 @@ TIMESTAMP = 'ts'
 CPU   = 'cpu'
 FLASH = 'flash'
 DISK  = 'disk'
+# id of the cluster aggregate (all hosts) series on the multi-cell pages
+CLUSTER = 'cluster'
 
 CNT  ='count' # count of samples in bucket for CPU and individual FLASH/DISKS
+# sum of the sample intervals (seconds) in bucket; the stats are
+# weighted by the sample interval, so files with different intervals
+# are averaged correctly
+WEIGHT = 'weight'
+
+# samples further apart than this number of sample intervals are
+# considered a gap in the data
+GAP_THRESHOLD = 2
 
 # keys for CPU in the bucket
 USR  = 'usr'
@@ -108,10 +141,162 @@ TITLE    = 'title'
 SUMMARY  = 'summary'
 AVG      = 'avg'
 MAX      = 'max'
+MIN      = 'min'
+
+# keys for variability of a stat - see init_variance()
+# VAR has the running accumulators while parsing, which are converted
+# to STDDEV and CV (coefficient of variation) when the bucket is computed
+VAR      = 'var'
+STDDEV   = 'stddev'
+CV       = 'cv'
+
+# number of decimals written for chart series, see series_to_json()
+# percentages are written as fractions (charts multiply by 100), so we
+# need 4 decimals to display 2 decimals in the chart
+SERIES_PRECISION_DEFAULT = 3
+SERIES_PRECISION_PCT = 4
+SERIES_PRECISION = { IOPS: 1, RPS: 1, WPS: 1,
+                     MBPS: 2, RMBPS: 2, WMBPS: 2,
+                     SVCTM: 2, AWAIT: 2,
+                     UTIL: SERIES_PRECISION_PCT,
+                     USR: SERIES_PRECISION_PCT, NICE: SERIES_PRECISION_PCT,
+                     SYS: SERIES_PRECISION_PCT, WIO: SERIES_PRECISION_PCT,
+                     STL: SERIES_PRECISION_PCT, IDL: SERIES_PRECISION_PCT,
+                     BUSY: SERIES_PRECISION_PCT }
+# non-finite values, which are not valid json
+_NAN = float('nan')
+_INF = float('inf')
 
 # maximum number of buckets - this controls chart resolution
 DEFAULT_MAX_BUCKETS = 500
 
+# buffer size for writing html files, large enough for the detail pages
+# to be written with a few system calls
+HTML_WRITE_BUFFER_SIZE = 1024*1024
+
+# compression of the html files
+# . none: html files only
+# . gzip: html files, plus a .gz of each html file (e.g. for web servers
+#         serving pre-compressed files)
+# . tar: a single <output directory>.tar.gz bundle with all html files,
+#        instead of the output directory
+COMPRESS_NONE = 'none'
+COMPRESS_GZIP = 'gzip'
+COMPRESS_TAR  = 'tar'
+COMPRESSIONS = [ COMPRESS_NONE, COMPRESS_GZIP, COMPRESS_TAR ]
+GZIP_COMPRESS_LEVEL = 6
+
+# with incremental output, the report is written to a fixed directory,
+# and pages whose input data and templates have not changed (as recorded
+# in the manifest of the directory) are not generated again
+MANIFEST_FILE = 'manifest.json'
+
+# CDN hosts of the javascript/css libraries used by the html pages.
+# With offline assets, a local copy of these laid out as <host>/<path>
+# (e.g. from wget -x <url>) is copied into the output directory as
+# ASSET_DIR_PREFIX<version>, and the pages reference that copy instead
+ASSET_CDN_HOSTS = [ 'cdnjs.cloudflare.com', 'cdn.rawgit.com' ]
+ASSET_DIR_PREFIX = 'exawchart_assets_'
+# placeholders in the html templates, see iter_template()
+_TEMPLATE_FIELD_RE = re.compile(r'%\((\w+)\)s|%%')
+
+_ASSET_URL_RE = re.compile(r'https://(%s)/' % '|'.join([ re.escape(host) for host in ASSET_CDN_HOSTS ]))
+
+# bucket alignment - determines where bucket boundaries fall
+# . start: relative to report start time (original behavior)
+# . epoch: multiples of the bucket interval since the epoch
+# . midnight: multiples of the bucket interval since midnight of the
+#             report start date
+# with epoch/midnight, reports over overlapping windows (with the same
+# bucket interval) have identical bucket boundaries
+BUCKET_ALIGN_START    = 'start'
+BUCKET_ALIGN_EPOCH    = 'epoch'
+BUCKET_ALIGN_MIDNIGHT = 'midnight'
+BUCKET_ALIGNMENTS = [ BUCKET_ALIGN_START, BUCKET_ALIGN_EPOCH,
+                      BUCKET_ALIGN_MIDNIGHT ]
+
+# reduction mode - determines which value is charted for each bucket
+# . avg: average of the samples in the bucket (original behavior)
+# . max: maximum of the samples in the bucket
+# . minmax: minimum or maximum of the samples in the bucket, whichever
+#           is further from the bucket average
+# . lttb: minimum, average or maximum of the samples in the bucket,
+#         chosen using largest-triangle-three-buckets
+# for all modes except avg, the parsers keep the MIN/MAX of the samples
+# in each bucket (see update_extremes), and then call reduce_series
+REDUCE_AVG    = 'avg'
+REDUCE_MAX    = 'max'
+REDUCE_MINMAX = 'minmax'
+REDUCE_LTTB   = 'lttb'
+REDUCE_MODES = [ REDUCE_AVG, REDUCE_MAX, REDUCE_MINMAX, REDUCE_LTTB ]
+
+# format of the chart series datapoints in the html pages
+# . json: json arrays of numbers
+# . binary: base64 encoded little-endian float32, with NaN for missing
+#           datapoints, which is decoded in the page (exawchartDecodeSeries)
+SERIES_FORMAT_JSON   = 'json'
+SERIES_FORMAT_BINARY = 'binary'
+SERIES_FORMATS = [ SERIES_FORMAT_JSON, SERIES_FORMAT_BINARY ]
+
+# script and styles shared by the pages (with the code showing each type
+# of page, the pages only have their data), which are minified from the
+# template directory into the output directory as <name>_<version><ext>,
+# with a version that changes with their contents, so they are cached by
+# the browser but not used once stale
+CHART_SCRIPT = 'exawchart.js'
+CHART_STYLE = 'exawchart.css'
+# single page viewer, written as index.html with single_page, which shows
+# the menu and the pages (with the markup of each type of page from its
+# template); the data of each page is written as a script, loaded when
+# the page is first selected, see write_template_file()
+VIEWER_TEMPLATE = 'viewer_template.html'
+# data of a page in its template, see write_template_file()
+_PAGE_DATA_RE = re.compile(r'exawchartStartPage\("(\w+)",\s*(\{.*?\})\);', re.S)
+_PAGE_BODY_RE = re.compile(r'<body[^>]*>\n(.*)</body>', re.S)
+
+# multi-cell heatmap page (a row per host, a column per bucket), which is
+# added for reports with at least this many hosts (0 for no heatmap page)
+# as the multi-cell line charts become hard to read with many hosts
+DEFAULT_HEATMAP_HOSTS = 10
+# ranking of the hosts on the multi-cell pages, which only include the
+# series of the top_hosts hosts (the others are loaded when selected)
+# . await: peak wait time
+# . util: 95th percentile of the utilization
+# . iops: total IOPS
+# for flash and hard disks
+RANK_AWAIT = 'await'
+RANK_UTIL  = 'util'
+RANK_IOPS  = 'iops'
+RANK_METRICS = [ RANK_AWAIT, RANK_UTIL, RANK_IOPS ]
+RANK_UTIL_PERCENTILE = 95
+
+# clock skew between hosts, estimated by cross-correlation of the iostat
+# IOPS of each host with the other hosts
+# . none: no estimate
+# . detect: report the estimated clock offsets as findings
+# . align: also shift the samples of each host by its offset
+CLOCK_SKEW_NONE = 'none'
+CLOCK_SKEW_DETECT = 'detect'
+CLOCK_SKEW_ALIGN = 'align'
+CLOCK_SKEW_MODES = [ CLOCK_SKEW_NONE, CLOCK_SKEW_DETECT, CLOCK_SKEW_ALIGN ]
+# largest offset (in seconds) searched for, and minimum correlation
+# for an offset to be used
+MAX_CLOCK_SKEW = 60
+MIN_CLOCK_SKEW_CORRELATION = 0.5
+
+# number of buckets of the rolling correlation on the correlation page
+# (database node and cell metrics)
+DEFAULT_CORRELATION_WINDOW = 12
+
+# estimated memory used by a bucket in memory, as a multiple of the size
+# of the marshalled bucket, see BucketStore
+BUCKET_MEMORY_FACTOR = 8
+
+# heatmap values are quantized to one byte, levels 0 .. HEATMAP_LEVELS-1,
+# with HEATMAP_MISSING for missing values, see quantize_matrix()
+HEATMAP_LEVELS = 255
+HEATMAP_MISSING = 255
+
 # default flash disks
 DEFAULT_FLASH_DISKS = [ 'sdn', 'sdo', 'sdp', 'sdq',
                 'sdr', 'sds', 'sdt', 'sdu',
@@ -195,6 +380,48 @@ class UnknownFindingType(Exception):
   def __str__(self):
     return repr(self.value)
 
+class InvalidBucketAlignment(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
+class InvalidReduceMode(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
+class InvalidSeriesFormat(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
+class InvalidCompression(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
+class InvalidRankMetric(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
+class InvalidClockSkewMode(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
+class InvalidAssetDir(Exception):
+  def __init__(self, value):
+    self.value = value
+  def __str__(self):
+    return repr(self.value)
+
 #------------------------------------------------------------
 # read-only property for classes
 def ro_property(field):
@@ -220,6 +447,25 @@ class ReportContext(object):
   template_dir = ro_property('_template_dir')
   min_bucket_interval = ro_property('_min_bucket_interval')
   hostnames = ro_property('_hostnames')
+  bucket_alignment = ro_property('_bucket_alignment')
+  bucket_start_time = ro_property('_bucket_start_time')
+  reduce_mode = ro_property('_reduce_mode')
+  series_format = ro_property('_series_format')
+  jobs = ro_property('_jobs')
+  parse_jobs = ro_property('_parse_jobs')
+  max_memory = ro_property('_max_memory')
+  compress = ro_property('_compress')
+  offline_assets = ro_property('_offline_assets')
+  detail_chunks = ro_property('_detail_chunks')
+  single_page = ro_property('_single_page')
+  incremental = ro_property('_incremental')
+  fleet = ro_property('_fleet')
+  heatmap_hosts = ro_property('_heatmap_hosts')
+  top_hosts = ro_property('_top_hosts')
+  rank_by = ro_property('_rank_by')
+  clock_skew = ro_property('_clock_skew')
+  clock_offsets = ro_property('_clock_offsets')
+  correlation_window = ro_property('_correlation_window')
 
   def __init__(self, log_level = WARNING):
     # create the logger
@@ -233,6 +479,57 @@ class ReportContext(object):
     self._min_bucket_interval = self._DEFAULT_MIN_BUCKET_INTERVAL
     self._bucket_interval = 0
     self._num_buckets = 0
+    self._bucket_alignment = BUCKET_ALIGN_START
+    # start time of bucket 0, depends on bucket alignment
+    self._bucket_start_time = datetime.utcfromtimestamp(0)
+    self._reduce_mode = REDUCE_AVG
+    self._series_format = SERIES_FORMAT_JSON
+    # number of worker processes for generating the html pages
+    self._jobs = 1
+    # number of worker processes for parsing the files, by host
+    self._parse_jobs = 1
+    # memory (in MB) for the buckets of each parser, the others are
+    # spilled to disk, see BucketStore; 0 to keep all buckets in memory
+    self._max_memory = 0
+    self._compress = COMPRESS_NONE
+    # report bundle for COMPRESS_TAR, see _add_to_tar()
+    self._tar = None
+    self._tar_lock = Lock()
+    # local copy of the CDN assets, and its directory in the output
+    self._offline_assets = None
+    self._asset_dir = None
+    # names of CHART_SCRIPT and CHART_STYLE in the output directory,
+    # keyed by their placeholder in the templates
+    self._chart_files = {}
+    # write the iostat detail data of each disk to a separate file
+    self._detail_chunks = False
+    # write the data of the pages as scripts for the single page viewer
+    self._single_page = False
+    # pages in the manifest of the output directory, and the pages
+    # generated (or reused) in this run, see get_current_pages()
+    self._incremental = False
+    self._manifest = {}
+    self._new_manifest = {}
+    self._template_hashes = {}
+    # files loaded by the pages (e.g. the detail data of a disk) written
+    # since the pages were last recorded, see write_side_file()
+    self._side_files = []
+    # in fleet mode, the files of this many hosts are parsed at a time
+    # (the hosts are processed in shards), and the series for the
+    # multi-cell pages are spilled to disk, so memory use does not grow
+    # with the number of hosts; 0 if not in fleet mode
+    self._fleet = 0
+    # minimum number of hosts for the multi-cell heatmap page
+    self._heatmap_hosts = DEFAULT_HEATMAP_HOSTS
+    # number of hosts whose series are in the multi-cell pages, ranked
+    # by rank_by; 0 for all hosts
+    self._top_hosts = 0
+    self._rank_by = RANK_IOPS
+    # estimated clock offset of each host, keyed by hostname, each one
+    # mapping to (seconds, correlation), see set_clock_offsets()
+    self._clock_skew = CLOCK_SKEW_NONE
+    self._clock_offsets = {}
+    self._correlation_window = DEFAULT_CORRELATION_WINDOW
     self._outdir = None
     self._multihost = False
     # keyed by hostname, each one mapping to a HostSummary object
@@ -243,11 +540,13 @@ class ReportContext(object):
     
 
   def __repr__(self):
-    return 'report_start_time: %s, report_end_time: %s, max_buckets: %d, bucket_interval: %d, num_buckets: %d, outdir: %s, multihost: %s, template: %s' % (self._report_start_time,
+    return 'report_start_time: %s, report_end_time: %s, max_buckets: %d, bucket_interval: %d, num_buckets: %d, bucket_alignment: %s, bucket_start_time: %s, outdir: %s, multihost: %s, template: %s' % (self._report_start_time,
                                    self._report_end_time,
                                    self._max_buckets,
                                    self._bucket_interval,
                                    self._num_buckets,
+                                   self._bucket_alignment,
+                                   self._bucket_start_time,
                                    self._outdir, 
                                    self._multihost,
                                    self._template_dir)
@@ -291,25 +590,155 @@ class ReportContext(object):
                          end_time,
                          max_buckets = DEFAULT_MAX_BUCKETS,
                          min_bucket_interval = _DEFAULT_MIN_BUCKET_INTERVAL,
-                         outdir = None):
+                         outdir = None,
+                         bucket_alignment = BUCKET_ALIGN_START,
+                         reduce_mode = REDUCE_AVG,
+                         series_format = SERIES_FORMAT_JSON,
+                         jobs = 1,
+                         parse_jobs = 1,
+                         max_memory = 0,
+                         compress = COMPRESS_NONE,
+                         offline_assets = None,
+                         detail_chunks = False,
+                         single_page = False,
+                         incremental = False,
+                         fleet = 0,
+                         heatmap_hosts = DEFAULT_HEATMAP_HOSTS,
+                         top_hosts = 0,
+                         rank_by = RANK_IOPS,
+                         clock_skew = CLOCK_SKEW_NONE,
+                         correlation_window = DEFAULT_CORRELATION_WINDOW):
 
     # perform validation check here
     if start_time == datetime.utcfromtimestamp(0) or end_time == datetime.utcfromtimestamp(0):
       raise InvalidReportTime('start_time: %s, end_time: %s' % (start_time,end_time))
+    if bucket_alignment not in BUCKET_ALIGNMENTS:
+      raise InvalidBucketAlignment(bucket_alignment)
+    if reduce_mode not in REDUCE_MODES:
+      raise InvalidReduceMode(reduce_mode)
+    if series_format not in SERIES_FORMATS:
+      raise InvalidSeriesFormat(series_format)
+    if compress not in COMPRESSIONS:
+      raise InvalidCompression(compress)
+    if offline_assets != None and not os.path.isdir(offline_assets):
+      raise InvalidAssetDir(offline_assets)
+    if rank_by not in RANK_METRICS:
+      raise InvalidRankMetric(rank_by)
+    if clock_skew not in CLOCK_SKEW_MODES:
+      raise InvalidClockSkewMode(clock_skew)
     # continue setting the attributes
     self._report_start_time = start_time
     self._report_end_time = end_time
     self._max_buckets = max_buckets
     self._min_bucket_interval = min_bucket_interval
+    self._bucket_alignment = bucket_alignment
+    self._reduce_mode = reduce_mode
+    self._series_format = series_format
+    self._jobs = max(1, jobs)
+    self._parse_jobs = max(1, parse_jobs)
+    self._max_memory = max(0, max_memory)
+    self._compress = compress
+    # the report bundle is written by this process, so pages cannot be
+    # generated by worker processes
+    if self._compress == COMPRESS_TAR and self._jobs > 1:
+      self.log_msg('warning', 'Ignoring jobs (%d) with compress %s' % (self._jobs, self._compress))
+      self._jobs = 1
+    self._offline_assets = offline_assets
+    self._detail_chunks = detail_chunks
+    self._single_page = single_page
+    self._incremental = incremental
+    self._fleet = max(0, fleet)
+    self._heatmap_hosts = max(0, heatmap_hosts)
+    self._top_hosts = max(0, top_hosts)
+    self._rank_by = rank_by
+    self._clock_skew = clock_skew
+    self._correlation_window = max(2, correlation_window)
+    # the report bundle is always written from scratch
+    if self._compress == COMPRESS_TAR and self._incremental:
+      self.log_msg('warning', 'Ignoring incremental with compress %s' % self._compress)
+      self._incremental = False
     self._bucket_interval, self._num_buckets = self._set_bucket_interval()
 
     try:
       # set the output directory
       self._outdir = self._create_outdir(outdir)
 
+      # and copy the assets (the report bundle adds them when created)
+      if self._offline_assets != None:
+        self._asset_dir = ASSET_DIR_PREFIX + self._get_assets_version()
+        if self._compress != COMPRESS_TAR:
+          if not os.path.exists(os.path.join(self._outdir, self._asset_dir)):
+            shutil.copytree(self._offline_assets,
+                            os.path.join(self._outdir, self._asset_dir))
+
+      # and the script and styles shared by the pages
+      self._write_chart_files()
+
+      if self._incremental:
+        self._manifest = self._read_manifest()
+
     except:
       raise
 
+  #------------------------------------------------------------
+  def _write_chart_files(self):
+    '''
+      writes CHART_SCRIPT and CHART_STYLE (from the template directory),
+      which the pages load, to the output directory, minified and named
+      with the hash of their contents, see write_template_file()
+    '''
+    for (name, template_name) in [ ('chartScript', CHART_SCRIPT),
+                                   ('chartStyle', CHART_STYLE) ]:
+      path = os.path.join(self._template_dir, template_name)
+      try:
+        template_file = open(path, 'r')
+        try:
+          data = template_file.read()
+        finally:
+          template_file.close()
+      except IOError as e:
+        self.log_msg('error', 'Unable to read file: %s (%s)' % (path, str(e)))
+        self._chart_files[name] = template_name
+        continue
+      if self._asset_dir != None:
+        data = self._localize_assets(data)
+      data = minify_asset(data)
+      (root, ext) = os.path.splitext(template_name)
+      filename = '%s_%s%s' % (root, hashlib.md5(data).hexdigest()[:8], ext)
+      self._write_html_chunks(filename, None, [ data ], HTML_WRITE_BUFFER_SIZE)
+      self._chart_files[name] = filename
+
+  #------------------------------------------------------------
+  def _get_assets_version(self):
+    '''
+      returns version of the offline assets, a hash of the relative
+      path and contents of each file, so a changed bundle gets a new
+      name and is not served from a stale browser cache
+    '''
+    digest = hashlib.md5()
+    for (dirpath, dirnames, filenames) in sorted(os.walk(self._offline_assets)):
+      for filename in sorted(filenames):
+        path = os.path.join(dirpath, filename)
+        digest.update('%s %d\n' % (os.path.relpath(path, self._offline_assets),
+                                   os.path.getsize(path)))
+        asset_file = open(path, 'rb')
+        try:
+          for chunk in iter(lambda: asset_file.read(HTML_WRITE_BUFFER_SIZE), ''):
+            digest.update(chunk)
+        finally:
+          asset_file.close()
+    return digest.hexdigest()[:8]
+
+  #------------------------------------------------------------
+  def _localize_assets(self, htmlstr):
+    '''
+      returns htmlstr referencing the offline assets instead of the CDNs.
+      requirejs paths are relative to baseUrl, so we set baseUrl to the
+      page directory, and all references are relative to the page
+    '''
+    htmlstr = _ASSET_URL_RE.sub(self._asset_dir + r'/\1/', htmlstr)
+    return htmlstr.replace('baseUrl: "scripts"', 'baseUrl: "."')
+
   #------------------------------------------------------------
   def get_info(self):
     '''
@@ -326,18 +755,48 @@ class ReportContext(object):
                                                   JSON_DATE_FMT),
              "reportEndTime"  : datetime.strftime(self._report_end_time,
                                                   JSON_DATE_FMT),
+             "bucketStartTime": datetime.strftime(self._bucket_start_time,
+                                                  JSON_DATE_FMT),
              "numBuckets"     : self._num_buckets,
              "bucketInterval" : self._bucket_interval }
   
   #------------------------------------------------------------
   def _set_bucket_interval(self):
+    '''
+      determines the bucket interval based on max_buckets and the start
+      time of bucket 0 based on the bucket alignment.  Note that the
+      bucket interval only depends on the report duration, so reports
+      with the same duration (and alignment) have the same buckets
+      where their windows overlap
+    '''
     time_range = timedelta_get_seconds(self._report_end_time - self._report_start_time)
     bucket_interval = self._min_bucket_interval
     while(int(time_range/bucket_interval) > self._max_buckets):
       bucket_interval += self._min_bucket_interval
+    self._bucket_start_time = self._get_bucket_start_time(bucket_interval)
+    # aligned buckets start at or before report start time, so we may
+    # need an extra bucket to cover the end of the report
+    time_range = timedelta_get_seconds(self._report_end_time - self._bucket_start_time)
     num_buckets = int(time_range/bucket_interval) + 1
     return (bucket_interval,num_buckets)
 
+  #------------------------------------------------------------
+  def _get_bucket_start_time(self, bucket_interval):
+    '''
+      returns start time of bucket 0, i.e. the latest bucket boundary at
+      or before the report start time
+    '''
+    if self._bucket_alignment == BUCKET_ALIGN_EPOCH:
+      base_time = datetime.utcfromtimestamp(0)
+    elif self._bucket_alignment == BUCKET_ALIGN_MIDNIGHT:
+      base_time = self._report_start_time.replace(hour = 0, minute = 0,
+                                                  second = 0, microsecond = 0)
+    else:
+      return self._report_start_time
+
+    offset = timedelta_get_seconds(self._report_start_time - base_time) % bucket_interval
+    return self._report_start_time - timedelta(seconds = offset)
+
   #------------------------------------------------------------
   def _create_outdir(self, outdir):
     '''
@@ -388,8 +847,12 @@ class ReportContext(object):
     # subdir name currently from time
     # TODO: add duration as well
     subdir = self._report_start_time.strftime('%Y_%m_%d_%H_%M_%S') + '_' + self._get_report_duration()
+    # incremental output reuses the same directory
+    if self._incremental:
+      return subdir
     suffix = 0
-    while os.path.exists(os.path.join(outdir,subdir + '_' + str(suffix))):
+    # also skip names used by a report bundle (see close_output)
+    while os.path.exists(os.path.join(outdir,subdir + '_' + str(suffix))) or os.path.exists(os.path.join(outdir,subdir + '_' + str(suffix) + '.tar.gz')):
       suffix += 1
     return subdir + '_' + str(suffix)
   
@@ -398,7 +861,7 @@ class ReportContext(object):
     '''
     returns bucket_id of sample_time
     '''
-    return int(timedelta_get_seconds(sample_time - self._report_start_time)/self._bucket_interval)
+    return int(timedelta_get_seconds(sample_time - self._bucket_start_time)/self._bucket_interval)
 
   #------------------------------------------------------------
   def bucket_id_to_timestamp(self,bucket_id):
@@ -410,9 +873,9 @@ class ReportContext(object):
     aligned with ExaWatcher data, then the chart will be off by 2-3 s
     '''
     if self._bucket_interval == self._min_bucket_interval:
-      bucket_time = self._report_start_time + timedelta(seconds=bucket_id*self._bucket_interval)
+      bucket_time = self._bucket_start_time + timedelta(seconds=bucket_id*self._bucket_interval)
     else:
-      bucket_time = self._report_start_time + timedelta(seconds=bucket_id*self._bucket_interval + self._bucket_interval/2)
+      bucket_time = self._bucket_start_time + timedelta(seconds=bucket_id*self._bucket_interval + self._bucket_interval/2)
     return bucket_time
 
   #------------------------------------------------------------
@@ -422,6 +885,26 @@ class ReportContext(object):
     '''
     self._multihost = value
 
+  #------------------------------------------------------------
+  def set_clock_offsets(self, clock_offsets):
+    '''
+      sets the estimated clock offsets, keyed by hostname, each one
+      mapping to (seconds, correlation): the clock of the host is
+      seconds ahead of the other hosts
+    '''
+    self._clock_offsets = clock_offsets
+
+  #------------------------------------------------------------
+  def get_host_time(self, hostname, sample_time):
+    '''
+      returns sample_time of hostname, shifted by the clock offset of the
+      host if clock_skew is align, so the samples of all hosts are in
+      the same buckets
+    '''
+    if self._clock_skew == CLOCK_SKEW_ALIGN and hostname in self._clock_offsets:
+      return sample_time - timedelta(seconds = self._clock_offsets[hostname][0])
+    return sample_time
+
   #------------------------------------------------------------
   def add_html_file(self, hostname, stattype, file_tuple, pos = None, filetype='summary' ):
     '''
@@ -451,31 +934,368 @@ class ReportContext(object):
       host_stat.add_html_file( file_tuple, pos)
 
   #------------------------------------------------------------
-  def write_html_file(self, filename, title, htmlstr):
+  def write_html_file(self, filename, title, htmlstr,
+                      buffer_size = HTML_WRITE_BUFFER_SIZE):
     '''
-      writes htmlstr into specified filename
+      writes htmlstr into specified filename in the output directory,
+      and returns the (filename, title) tuple, or (None, None) on error
       constructs filename:
         <filename_identifier>.html
+      Based on compress, we also write a .gz of the file, or add the file
+      to the report bundle instead (compressing htmlstr directly, so we
+      do not read the file again).
+      Files are written to a temporary file which is then renamed, so
+      the file is either complete or not there.  This does not change
+      the current directory, so it can be called from multiple threads
+    '''
+    if self._asset_dir != None:
+      htmlstr = self._localize_assets(htmlstr)
+    return self._write_html_chunks(filename, title, [ htmlstr ], buffer_size)
+
+  #------------------------------------------------------------
+  def write_side_file(self, filename, script):
+    '''
+      writes script into filename, a file the pages load (rather than a
+      page), and returns filename, or None on error, see write_html_file().
+      The file is recorded in the manifest with the pages, see
+      take_side_files()
+    '''
+    (filename, title) = self.write_html_file(filename, None, script)
+    self._side_files.append(filename)
+    return filename
+
+  #------------------------------------------------------------
+  def take_side_files(self):
+    '''
+      returns the list of files written by write_side_file() since the
+      last call (None for a file that was not written)
+    '''
+    side_files = self._side_files
+    self._side_files = []
+    return side_files
+
+  #------------------------------------------------------------
+  def write_template_file(self, filename, title, template_name, values,
+                          buffer_size = HTML_WRITE_BUFFER_SIZE):
+    '''
+      writes template_name (in the template directory) into filename,
+      substituting its %(name)s placeholders from values, like
+      template % values, and returns the (filename, title) tuple, or
+      (None, None) on error, see write_html_file().
+      The values can be strings, or iterables of strings (e.g. from
+      iter_series_json()), which are written to the file as they are
+      produced, so the page is not held in memory as one string.
+      The chartScript and chartStyle placeholders are the names of the
+      shared script and styles, see _write_chart_files().
+      With single_page, a page (a template with exawchartStartPage()) is
+      written as a script adding its data to the viewer instead, named
+      as filename with a .js extension, and that name is returned.
+      Raises IOError if the template cannot be read
+    '''
+    template_file = open(os.path.join(self._template_dir, template_name), 'r')
+    try:
+      template = template_file.read()
+    finally:
+      template_file.close()
+    if self._single_page:
+      match = _PAGE_DATA_RE.search(template)
+      if match != None:
+        filename = os.path.splitext(filename)[0] + '.js'
+        template = 'exawchartAddPage(%s, "%s",\n%s);\n' % (
+                     json.dumps(filename).replace('%', '%%'),
+                     match.group(1), match.group(2))
+    # the assets are only referenced by the template
+    if self._asset_dir != None:
+      template = self._localize_assets(template)
+    values = dict(values)
+    values.update(self._chart_files)
+    return self._write_html_chunks(filename, title,
+                                   iter_template(template, values),
+                                   buffer_size)
+
+  #------------------------------------------------------------
+  def get_page_templates(self):
+    '''
+      returns the markup of each type of page (the body of the templates
+      with exawchartStartPage()), as the script elements the single page
+      viewer shows the pages with, see VIEWER_TEMPLATE
+    '''
+    page_templates = []
+    for template_name in sorted(os.listdir(self._template_dir)):
+      if not template_name.endswith('_template.html'):
+        continue
+      template_file = open(os.path.join(self._template_dir, template_name), 'r')
+      try:
+        template = template_file.read()
+      finally:
+        template_file.close()
+      page_match = _PAGE_DATA_RE.search(template)
+      body_match = _PAGE_BODY_RE.search(template)
+      if page_match == None or body_match == None:
+        continue
+      # the markup has no placeholders, but may have %%
+      markup = ''.join(iter_template(body_match.group(1), {}))
+      if self._asset_dir != None:
+        markup = self._localize_assets(markup)
+      page_templates.append('<script type="text/html" id="exawchart-page-%s">\n%s</script>\n'
+                            % (page_match.group(1), markup))
+    return ''.join(page_templates)
+
+  #------------------------------------------------------------
+  def _write_html_chunks(self, filename, title, chunks, buffer_size):
+    '''
+      writes the html (an iterable of strings) into filename, see
+      write_html_file()
     '''
     output = ( None , None )
+    path = os.path.join(self._outdir, filename)
     try:
-      owd = os.getcwd()
-      os.chdir(self._outdir)
-      datafile = open(filename,'w')
-      datafile.write(htmlstr)
+      if self._compress == COMPRESS_TAR:
+        # the size of a file is needed before adding it to the bundle
+        self._add_to_tar(filename, ''.join(chunks))
+        path = self._outdir + '.tar.gz:' + filename
+      else:
+        self._write_file(filename, chunks, buffer_size,
+                         gzip_copy = (self._compress == COMPRESS_GZIP))
     except Exception as e:
-      self.log_msg('error', 'Error in writing file %s (%s)' %(self._outdir + '/' + filename, str(e)))
+      self.log_msg('error', 'Error in writing file %s (%s)' %(path, str(e)))
 
     else:
       output = (filename, title)
-      self.log_msg('info', 'Generated file: %s' % (self._outdir + '/' + filename))
-    finally:
-      datafile.close()
-      #TODO: should we set permission here
-      os.chdir(owd)
+      self.log_msg('info', 'Generated file: %s' % path)
       
     return output
 
+  #------------------------------------------------------------
+  def _write_file(self, filename, chunks, buffer_size, gzip_copy = False):
+    '''
+      writes chunks (an iterable of strings) into filename in the output
+      directory, using a temporary file (unique per process and thread)
+      which is renamed once written.  If gzip_copy, a gzip compressed
+      copy is written to filename.gz in the same pass over chunks
+    '''
+    filenames = [ filename ]
+    if gzip_copy:
+      filenames.append(filename + '.gz')
+    tmp_paths = [ os.path.join(self._outdir, '.%s.%d.%d.tmp' % (name,
+                                                                os.getpid(),
+                                                                get_ident()))
+                  for name in filenames ]
+    datafiles = []
+    try:
+      for tmp_path in tmp_paths:
+        # permissions are based on umask, same as open()
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0666)
+        datafiles.append(os.fdopen(fd, 'wb', buffer_size))
+      outputs = list(datafiles)
+      if gzip_copy:
+        # mtime of 0 so the same report gives the same file
+        outputs[1] = gzip.GzipFile(filename, 'wb', GZIP_COMPRESS_LEVEL,
+                                   datafiles[1], 0)
+      try:
+        for chunk in chunks:
+          for output in outputs:
+            output.write(chunk)
+      finally:
+        for output in reversed(outputs):
+          output.close()
+        for datafile in datafiles:
+          datafile.close()
+      for (tmp_path, name) in zip(tmp_paths, filenames):
+        os.rename(tmp_path, os.path.join(self._outdir, name))
+    except:
+      for datafile in datafiles:
+        datafile.close()
+      for tmp_path in tmp_paths:
+        if os.path.exists(tmp_path):
+          os.remove(tmp_path)
+      raise
+
+  #------------------------------------------------------------
+  def _add_to_tar(self, filename, data):
+    '''
+      adds data as filename to the report bundle, which is created on
+      the first call.  Files are under the output directory name, so
+      extracting the bundle gives the same files as without compress.
+      The bundle is written to a temporary file until close_output()
+    '''
+    tarinfo = tarfile.TarInfo(os.path.join(os.path.basename(self._outdir),
+                                           filename))
+    tarinfo.size = len(data)
+    tarinfo.mtime = int(time.time())
+    tarinfo.mode = 0644
+    with self._tar_lock:
+      if self._tar == None:
+        self._tar = tarfile.open(self._outdir + '.tar.gz.tmp', 'w:gz')
+        if self._asset_dir != None:
+          self._tar.add(self._offline_assets,
+                        os.path.join(os.path.basename(self._outdir),
+                                     self._asset_dir))
+      self._tar.addfile(tarinfo, StringIO(data))
+
+  #------------------------------------------------------------
+  def _read_manifest(self):
+    '''
+      returns the manifest of the output directory, keyed by filename,
+      or an empty manifest if there is none (or it cannot be read)
+    '''
+    path = os.path.join(self._outdir, MANIFEST_FILE)
+    if not os.path.exists(path):
+      return {}
+    try:
+      manifest_file = open(path, 'r')
+      try:
+        return json.load(manifest_file)
+      finally:
+        manifest_file.close()
+    except Exception as e:
+      self.log_msg('warning', 'Ignoring manifest %s (%s)' % (path, str(e)))
+      return {}
+
+  #------------------------------------------------------------
+  def get_fingerprint(self, filenames, *args):
+    '''
+      returns fingerprint of the input data for a page: the name, size
+      and modification time of the input files, the report options, and
+      args (any other options of the page)
+    '''
+    digest = hashlib.md5()
+    digest.update(repr((self._report_start_time, self._report_end_time,
+                        self._max_buckets, self._min_bucket_interval,
+                        self._bucket_alignment, self._reduce_mode,
+                        self._series_format, self._compress,
+                        self._asset_dir, self._detail_chunks,
+                        self._single_page,
+                        self._heatmap_hosts, self._top_hosts,
+                        self._rank_by, self._clock_skew,
+                        sorted(self._clock_offsets.items()),
+                        self._correlation_window, args)))
+    for filename in sorted(filenames):
+      try:
+        stat = os.stat(filename)
+        digest.update(repr((filename, stat.st_size, stat.st_mtime)))
+      except OSError:
+        digest.update(repr((filename, None, None)))
+    return digest.hexdigest()
+
+  #------------------------------------------------------------
+  def _get_template_hash(self, templates):
+    '''
+      returns hash of the contents of the template files, and of the
+      names of the shared script and styles they load (which change
+      with their contents)
+    '''
+    key = tuple(templates)
+    if key not in self._template_hashes:
+      digest = hashlib.md5()
+      digest.update(repr(sorted(self._chart_files.items())))
+      for template in templates:
+        template_file = open(os.path.join(self._template_dir, template), 'rb')
+        try:
+          digest.update(template_file.read())
+        finally:
+          template_file.close()
+      self._template_hashes[key] = digest.hexdigest()
+    return self._template_hashes[key]
+
+  #------------------------------------------------------------
+  def get_current_pages(self, hostname, stattype, fingerprint, templates):
+    '''
+      with incremental output, returns the list of (filename, title)
+      tuples of the pages for hostname and stattype, if these were
+      generated from the same input data (fingerprint) and templates,
+      and they (and the files they load) are still in the output
+      directory.  Otherwise returns None, and the pages need to be
+      generated again
+    '''
+    if not self._incremental:
+      return None
+    template_hash = self._get_template_hash(templates)
+    # the side files (which have no title) are checked with the pages
+    pages = [ (page['pos'], filename, page['title'])
+              for (filename, page) in self._manifest.iteritems()
+              if page['host'] == hostname and page['stattype'] == stattype ]
+    if len([ title for (pos, filename, title) in pages if title != None ]) == 0:
+      return None
+    for (pos, filename, title) in pages:
+      page = self._manifest[filename]
+      if page['fingerprint'] != fingerprint or page['template'] != template_hash:
+        return None
+      if not os.path.exists(os.path.join(self._outdir, filename)):
+        return None
+      if self._compress == COMPRESS_GZIP and not os.path.exists(os.path.join(self._outdir, filename + '.gz')):
+        return None
+    self.log_msg('info', 'Skipping unchanged %s pages for %s' % (stattype, hostname or 'all hosts'))
+    return [ (filename, title) for (pos, filename, title) in sorted(pages)
+             if title != None ]
+
+  #------------------------------------------------------------
+  def record_pages(self, hostname, stattype, fingerprint, templates,
+                   file_tuples, side_files = []):
+    '''
+      records the pages (list of (filename, title) tuples) generated for
+      hostname and stattype in the manifest, with the side_files they
+      load (see take_side_files()), see get_current_pages()
+    '''
+    # pages that were not written are generated again next time
+    if (not self._incremental or
+        None in [ filename for (filename, title) in file_tuples ] + side_files):
+      return
+    template_hash = self._get_template_hash(templates)
+    # reused pages still load the side files of the previous run
+    for (filename, page) in self._manifest.iteritems():
+      if (page['host'] == hostname and page['stattype'] == stattype and
+          page['title'] == None and page['fingerprint'] == fingerprint and
+          page['template'] == template_hash):
+        self._new_manifest[filename] = page
+    for (pos, (filename, title)) in enumerate(file_tuples):
+      self._new_manifest[filename] = { 'host': hostname,
+                                       'stattype': stattype,
+                                       'pos': pos,
+                                       'title': title,
+                                       'fingerprint': fingerprint,
+                                       'template': template_hash }
+    for filename in side_files:
+      self._new_manifest[filename] = { 'host': hostname,
+                                       'stattype': stattype,
+                                       'pos': None,
+                                       'title': None,
+                                       'fingerprint': fingerprint,
+                                       'template': template_hash }
+
+  #------------------------------------------------------------
+  def close_output(self):
+    '''
+      finishes the output after all html files have been written, i.e.
+      writes the manifest for incremental output, and for COMPRESS_TAR,
+      closes the report bundle and removes the (empty) output directory
+    '''
+    if self._incremental:
+      # keep the pages of hosts not in this run, these are still there
+      new_pages = set([ (page['host'], page['stattype'])
+                        for page in self._new_manifest.values() ])
+      manifest = dict([ (filename, page)
+                        for (filename, page) in self._manifest.iteritems()
+                        if (page['host'], page['stattype']) not in new_pages ])
+      manifest.update(self._new_manifest)
+      try:
+        self._write_file(MANIFEST_FILE,
+                         [ json.dumps(manifest, sort_keys = True, indent = 1) ],
+                         HTML_WRITE_BUFFER_SIZE)
+      except Exception as e:
+        self.log_msg('error', 'Error in writing file %s (%s)' %
+                     (os.path.join(self._outdir, MANIFEST_FILE), str(e)))
+    with self._tar_lock:
+      if self._tar != None:
+        self._tar.close()
+        self._tar = None
+        os.rename(self._outdir + '.tar.gz.tmp', self._outdir + '.tar.gz')
+        self.log_msg('info', 'Generated file: %s' % (self._outdir + '.tar.gz'))
+        try:
+          os.rmdir(self._outdir)
+        except OSError:
+          pass
+
   #------------------------------------------------------------
   def add_hostinfo(self, hostname):
     '''
@@ -516,9 +1336,61 @@ class HostMetadata(object):
   def __init__(self,hostname):
     self._name = hostname
     self.processed_files = []   # list of processed files
+    self.gaps = []              # list of (start, end) times without samples
+    self._last_sample_time = None
+    self.sample_bitmap = None   # SampleBitmap of samples processed
+    self.dropped_samples = 0    # number of duplicate samples ignored
 
   def __str__(self):
-    return 'name: %s, processed_files: %s' % (self._name, str(self.processed_files) )
+    return 'name: %s, processed_files: %s, gaps: %s, dropped_samples: %d' % (self._name, str(self.processed_files), str(self.gaps), self.dropped_samples )
+
+  def is_duplicate_sample(self, sample_time, report_context):
+    '''
+      returns True (and counts it as dropped) if we already processed a
+      sample with the same sample_time for this host, e.g. from
+      overlapping files.  sample_time should be within the report interval
+    '''
+    if self.sample_bitmap == None:
+      self.sample_bitmap = SampleBitmap(report_context.report_start_time,
+                                        report_context.report_end_time)
+    if self.sample_bitmap.test_and_set(sample_time):
+      self.dropped_samples += 1
+      return True
+    return False
+
+  def check_gap(self, sample_time, sample_interval):
+    '''
+      records a gap if sample_time is more than GAP_THRESHOLD sample
+      intervals after the previous sample.  Files are processed in order,
+      so this also detects gaps between files
+    '''
+    if self._last_sample_time != None and sample_time > self._last_sample_time:
+      if timedelta_get_seconds(sample_time - self._last_sample_time) > GAP_THRESHOLD*sample_interval:
+        self.gaps.append( (self._last_sample_time, sample_time) )
+    if self._last_sample_time == None or sample_time > self._last_sample_time:
+      self._last_sample_time = sample_time
+
+#------------------------------------------------------------
+class SampleBitmap(object):
+  '''
+    bitmap with one bit per second of the report interval, to keep track
+    of the sample times processed (ExaWatcher timestamps are in seconds)
+  '''
+  def __init__(self, start_time, end_time):
+    self._start_time = start_time
+    self._bits = bytearray(timedelta_get_seconds(end_time - start_time)/8 + 1)
+
+  def test_and_set(self, sample_time):
+    '''
+      sets the bit for sample_time, returns True if it was already set
+    '''
+    offset = timedelta_get_seconds(sample_time - self._start_time)
+    pos = offset >> 3
+    bit = 1 << (offset & 7)
+    if self._bits[pos] & bit:
+      return True
+    self._bits[pos] |= bit
+    return False
 
 #------------------------------------------------------------
 class StatFileSummary(object):
@@ -535,6 +1407,8 @@ class StatFileSummary(object):
     self.summary_stats = {}  # summary bucket
     self.findings = []       # array of findings
     self.html_files = []     # list of tuples; should this be ro property?
+    # series for the correlation page, keyed by name, indexed by bucket id
+    self.series = {}
     # summary information about number of findings
     # this is used to determine if we need a marker by the html file
     self._num_findings = { FINDING_TYPE_INFO   : 0,
@@ -729,6 +1603,255 @@ def file_type(filename, report_context):
   finally:  
     return ftype
 
+#------------------------------------------------------------
+def _split_lines(text):
+  '''
+    returns the lines of text, each with its newline, split only at a
+    newline like a file object (splitlines() also splits at a carriage
+    return)
+  '''
+  if '\r' not in text:
+    return text.splitlines(True)
+  lines = [ line + '\n' for line in text.split('\n') ]
+  if text.endswith('\n'):
+    lines.pop()
+  else:
+    lines[-1] = lines[-1][:-1]
+  return lines
+
+#------------------------------------------------------------
+class MappedTextFile(object):
+  '''
+    uncompressed text file, memory-mapped, which is read by line like a
+    file object (next() and iteration).  The lines are split from large
+    chunks of the file at once, and skip_to() moves to the next line with
+    a marker with a single search over the file, e.g. to skip the samples
+    outside the report interval
+  '''
+  _CHUNK_SIZE = 1024 * 1024
+
+  def __init__(self, filename):
+    self._file = open(filename, 'r')
+    self._size = os.fstat(self._file.fileno()).st_size
+    # an empty file cannot be mapped
+    if self._size > 0:
+      self._buffer = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+    else:
+      self._buffer = ''
+    # offset of the next chunk, and the lines of the current chunk, which
+    # starts at offset _chunk_pos
+    self._pos = 0
+    self._chunk_pos = 0
+    self._lines = []
+    # index of the last line returned
+    self._i = -1
+    # (index, offset) of a line of the current chunk, see skip_to()
+    self._walk = (0, 0)
+    self._skip = False
+    self._iter = self._iter_lines()
+
+  def __iter__(self):
+    return self._iter
+
+  def next(self):
+    return next(self._iter)
+
+  def _read_chunk(self):
+    '''
+      splits the next chunk (whole lines) of the file into lines
+    '''
+    end = self._pos + self._CHUNK_SIZE
+    if end >= self._size:
+      end = self._size
+    else:
+      end = self._buffer.find('\n', end)
+      end = self._size if end < 0 else end + 1
+    self._lines = _split_lines(self._buffer[self._pos:end])
+    self._chunk_pos = self._pos
+    self._pos = end
+    self._i = -1
+    self._walk = (0, self._chunk_pos)
+
+  def _iter_lines(self):
+    while True:
+      start = self._i + 1
+      if start >= len(self._lines):
+        if self._pos >= self._size:
+          return
+        self._read_chunk()
+        start = 0
+      self._skip = False
+      lines = self._lines
+      for self._i in xrange(start, len(lines)):
+        yield lines[self._i]
+        if self._skip:
+          break
+
+  def skip_to(self, marker):
+    '''
+      skips the lines up to the next line that contains marker, a string,
+      or where marker matches, a regular expression (compiled, e.g. with
+      re.M to match at the start of a line), so that line is the next one
+      returned.  Skips to the end of the file if there is no such line
+    '''
+    # offset of the next line, from the last line whose offset is known
+    (i, pos) = self._walk
+    pos += sum(map(len, self._lines[i:self._i + 1]))
+    i = self._i + 1
+
+    if isinstance(marker, basestring):
+      found = self._buffer.find(marker, pos)
+    else:
+      match = marker.search(self._buffer, pos)
+      found = match.start() if match != None else -1
+    if found < 0:
+      target = self._size
+    else:
+      target = self._buffer.rfind('\n', pos, found) + 1
+      target = max(pos, target)
+
+    if target < self._pos:
+      # in the current chunk
+      while pos < target:
+        pos += len(self._lines[i])
+        i += 1
+      self._walk = (i, pos)
+      self._i = i - 1
+    else:
+      self._pos = target
+      self._lines = []
+      self._i = -1
+    self._skip = True
+
+  def close(self):
+    if self._size > 0:
+      self._buffer.close()
+    self._file.close()
+
+#------------------------------------------------------------
+class ThreadedDecompressedFile(object):
+  '''
+    bz2 or gzip compressed file, read by line like a file object (next()
+    and iteration).  A background thread decompresses the file into a
+    bounded queue of large blocks, and as zlib and bz2 release the GIL,
+    the decompression overlaps with the parsing of the lines
+  '''
+  # compressed bytes read at a time, and decompressed blocks queued
+  _READ_SIZE = 256 * 1024
+  _QUEUE_BLOCKS = 8
+
+  def __init__(self, filename, filetype):
+    self._file = open(filename, 'rb')
+    self._filetype = filetype
+    self._queue = Queue(self._QUEUE_BLOCKS)
+    self._closed = False
+    self._thread = Thread(target = self._decompress)
+    self._thread.daemon = True
+    self._thread.start()
+    self._iter = self._iter_lines()
+
+  def __iter__(self):
+    return self._iter
+
+  def next(self):
+    return next(self._iter)
+
+  def _new_decompressor(self):
+    if self._filetype == FILE_BZ2:
+      return BZ2Decompressor()
+    # gzip header and trailer
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+  def _is_stream_end(self, decompressor):
+    '''
+      returns True if decompressor reached the end of its stream, i.e.
+      the data it was given is not truncated
+    '''
+    if self._filetype == FILE_BZ2:
+      # raises EOFError only after the end of the stream
+      try:
+        decompressor.decompress('')
+      except EOFError:
+        return True
+      return False
+    # zlib keeps the data given after the end of the stream as unused_data
+    # (a byte other than 0, which could complete a truncated gzip trailer)
+    try:
+      decompressor.decompress('x')
+    except zlib.error:
+      return False
+    return len(decompressor.unused_data) > 0
+
+  def _decompress(self):
+    '''
+      decompresses the file into the queue, followed by None at the end
+      of the file, or by the exception if it cannot be decompressed
+      (IOError if the file is truncated)
+    '''
+    try:
+      decompressor = self._new_decompressor()
+      # an empty file has no stream to end
+      stream_end = True
+      while not self._closed:
+        data = self._file.read(self._READ_SIZE)
+        if len(data) == 0:
+          break
+        while len(data) > 0 and not self._closed:
+          stream_end = False
+          try:
+            block = decompressor.decompress(data)
+          except EOFError:
+            # bz2 data after the end of a stream
+            decompressor = self._new_decompressor()
+            block = decompressor.decompress(data)
+          if len(block) > 0:
+            self._queue.put(block)
+          # the file can have several streams (e.g. concatenated gzip
+          # members), ignoring the zero padding after the last one
+          data = decompressor.unused_data
+          if len(data) > 0:
+            stream_end = True
+            if len(data.lstrip('\0')) == 0:
+              break
+            decompressor = self._new_decompressor()
+      if not self._closed and not stream_end and not self._is_stream_end(decompressor):
+        raise IOError('Compressed file ended before the end-of-stream marker was reached')
+    except Exception as e:
+      self._queue.put(e)
+    else:
+      self._queue.put(None)
+
+  def _iter_lines(self):
+    partial = ''
+    while True:
+      block = self._queue.get()
+      if block == None:
+        break
+      if isinstance(block, Exception):
+        raise block
+      end = block.rfind('\n') + 1
+      if end == 0:
+        partial += block
+        continue
+      for line in _split_lines(partial + block[:end]):
+        yield line
+      partial = block[end:]
+    if len(partial) > 0:
+      yield partial
+
+  def close(self):
+    '''
+      stops the background thread, which may be waiting for room in the
+      queue if the file was not read to the end
+    '''
+    self._closed = True
+    while self._thread.is_alive():
+      try:
+        self._queue.get(True, 0.1)
+      except Empty:
+        pass
+    self._file.close()
+
 #------------------------------------------------------------
 def open_file(filename, filetype):
   '''
@@ -737,10 +1860,8 @@ def open_file(filename, filetype):
   '''
   input_file = None
   try:
-    if filetype == FILE_BZ2:
-      input_file = BZ2File(filename,'r')
-    elif filetype == FILE_GZ:
-      input_file = gzip.open(filename,'r')
+    if filetype == FILE_BZ2 or filetype == FILE_GZ:
+      input_file = ThreadedDecompressedFile(filename, filetype)
     elif filetype == FILE_ZIP:
       # zip is an archive with list of files
       zflist = zipfile.ZipFile(filename,'r')
@@ -748,7 +1869,7 @@ def open_file(filename, filetype):
       input_file = None
     elif filetype == FILE_TEXT:
       # to do check for actual real text
-      input_file = open(filename,'r')
+      input_file = MappedTextFile(filename)
   except:
     raise
   finally:
@@ -762,11 +1883,166 @@ def timedelta_get_seconds(delta):
    '''
    return delta.days*86400 + delta.seconds
 
+#------------------------------------------------------------
+def init_variance():
+  '''
+    returns a new accumulator for a one-pass (Welford) computation of
+    mean and variance:
+      [ total weight, mean, weighted sum of squared differences ]
+    We use a list rather than an object so buckets remain plain
+    dictionary objects
+  '''
+  return [ 0, 0.0, 0.0 ]
+
+#------------------------------------------------------------
+def update_variance(acc, value, weight = 1):
+  '''
+    adds value, with the given weight (i.e. sample interval), to the
+    accumulator created by init_variance()
+  '''
+  acc[0] += weight
+  # the first sample is the mean, as delta*weight/acc[0] can round past
+  # the value and leave a negative sum of squares
+  if acc[0] == weight:
+    acc[1] = float(value)
+    return
+  delta = value - acc[1]
+  acc[1] += delta*weight/acc[0]
+  acc[2] += weight*delta*(value - acc[1])
+
+#------------------------------------------------------------
+def get_stddev(acc):
+  '''
+    returns the (population) standard deviation from the accumulator
+  '''
+  # the sum of squares can still be slightly negative due to rounding
+  if acc[0] > 0 and acc[2] > 0:
+    return sqrt(acc[2]/acc[0])
+  return 0.0
+
+#------------------------------------------------------------
+def get_cv(acc):
+  '''
+    returns the coefficient of variation (stddev/mean) from the
+    accumulator, 0 if the mean is 0
+  '''
+  if acc[1] != 0:
+    return get_stddev(acc)/abs(acc[1])
+  return 0.0
+
+#------------------------------------------------------------
+def finalize_variance(stat):
+  '''
+    replaces the VAR accumulators (keyed by stat name) in the stat
+    dictionary object with STDDEV and CV dictionary objects keyed by
+    the same stat names
+  '''
+  if VAR in stat:
+    accs = stat.pop(VAR)
+    stat[STDDEV] = {}
+    stat[CV] = {}
+    for name in accs:
+      stat[STDDEV][name] = get_stddev(accs[name])
+      stat[CV][name] = get_cv(accs[name])
+
+#------------------------------------------------------------
+def init_extremes(stat):
+  '''
+    adds the MIN/MAX dictionary objects to the stat dictionary object,
+    see update_extremes()
+  '''
+  stat[MIN] = {}
+  stat[MAX] = {}
+  return stat
+
+#------------------------------------------------------------
+def update_extremes(stat, name, value):
+  '''
+    keeps track of the minimum/maximum value of the samples for name
+    in stat[MIN]/stat[MAX] (created by init_extremes)
+  '''
+  if name in stat[MAX]:
+    if value > stat[MAX][name]:
+      stat[MAX][name] = value
+    elif value < stat[MIN][name]:
+      stat[MIN][name] = value
+  else:
+    stat[MIN][name] = value
+    stat[MAX][name] = value
+
+#------------------------------------------------------------
+def reduce_series(reduce_mode, series, names):
+  '''
+    overwrites the (average) values of a series of buckets with the
+    value to chart based on the reduce_mode.  This is done after
+    the averages have been computed.
+    PARAMETERS:
+      reduce_mode: one of REDUCE_MODES
+      series     : list of (bucket_id, stat) sorted by bucket_id, where
+                   stat is a dictionary object which has the average for
+                   each name, and MIN/MAX from update_extremes()
+      names      : list of keys in stat to process
+    The MIN/MAX dictionary objects are removed once done, so charts see
+    the same structure regardless of the reduce_mode
+  '''
+  if reduce_mode != REDUCE_AVG:
+    for name in names:
+      # ignore buckets without samples for this name
+      points = [ (i, stat) for (i, stat) in series if MAX in stat and name in stat[MAX] ]
+      if reduce_mode == REDUCE_MAX:
+        for (i, stat) in points:
+          stat[name] = stat[MAX][name]
+      elif reduce_mode == REDUCE_MINMAX:
+        for (i, stat) in points:
+          avg = stat[name]
+          if stat[MAX][name] - avg >= avg - stat[MIN][name]:
+            stat[name] = stat[MAX][name]
+          else:
+            stat[name] = stat[MIN][name]
+      elif reduce_mode == REDUCE_LTTB:
+        _reduce_lttb(points, name)
+
+  for (i, stat) in series:
+    stat.pop(MIN, None)
+    stat.pop(MAX, None)
+
+#------------------------------------------------------------
+def _reduce_lttb(points, name):
+  '''
+    largest-triangle-three-buckets: for each bucket, choose the min, avg
+    or max that forms the largest triangle with the point chosen for the
+    previous bucket and the average of the next bucket.  The first and
+    last buckets keep their averages
+  '''
+  if len(points) < 3:
+    return
+  (ax, ay) = (points[0][0], points[0][1][name])
+  for pos in xrange(1, len(points) - 1):
+    (bx, stat) = points[pos]
+    # next bucket has not been overwritten yet, so this is its average
+    (cx, cy) = (points[pos + 1][0], points[pos + 1][1][name])
+    # average first, so it is kept if there is a tie
+    best_area = -1
+    for by in (stat[name], stat[MIN][name], stat[MAX][name]):
+      area = abs((ax - cx)*(by - ay) - (ax - bx)*(cy - ay))
+      if area > best_area:
+        best_area = area
+        best = by
+    stat[name] = best
+    (ax, ay) = (bx, best)
+
+#------------------------------------------------------------
+def get_sample_interval(sample_interval_line):
+  '''
+    returns the sample interval (seconds) from the ExaWatcher header line
+  '''
+  return int(sample_interval_line.strip().rsplit()[-1])
+
 #------------------------------------------------------------
 def get_file_end_time(file_start_time,
                       sample_interval_line,
                       archive_count_line):
-  sample_interval = int(sample_interval_line.strip().rsplit()[-1])
+  sample_interval = get_sample_interval(sample_interval_line)
   archive_count = int(archive_count_line.strip().rsplit()[-1])
   return file_start_time + timedelta(seconds = sample_interval*archive_count)
 
@@ -857,4 +2133,790 @@ def add_start_end_times(report_context,
     xAxis.append(report_context.bucket_id_to_timestamp(last_bucket_id).strftime(JSON_DATE_FMT))
     add_empty_point(data, None)
 
+#------------------------------------------------------------
+def series_to_json(obj,
+                   precision = SERIES_PRECISION_DEFAULT,
+                   series_format = SERIES_FORMAT_JSON):
+  '''
+    returns obj as a json string, like json.dumps, but floats are written
+    with a fixed number of decimals (json.dumps writes the full repr, as
+    the C encoder ignores json.encoder.FLOAT_REPR), and without the
+    whitespace.  This is used for the chart series, which make up most
+    of each html page.
+
+    PARAMETERS:
+      obj      : dictionaries, lists, strings, numbers and None
+      precision: number of decimals, or a dictionary keyed by keys in obj
+                 (e.g. SERIES_PRECISION keyed by stat/chart type), with
+                 the number of decimals for all values under that key.
+                 Other values use SERIES_PRECISION_DEFAULT
+      series_format: SERIES_FORMAT_BINARY writes the 'items' (datapoints)
+                 of each series as { "f32": <base64 float32> } instead,
+                 see _series_items_to_binary()
+  '''
+  return ''.join(iter_series_json(obj, precision, series_format))
+
+#------------------------------------------------------------
+def iter_series_json(obj,
+                     precision = SERIES_PRECISION_DEFAULT,
+                     series_format = SERIES_FORMAT_JSON):
+  '''
+    returns an iterator over the chunks of series_to_json(obj), which are
+    produced as they are read, e.g. by write_template_file(), so the json
+    is not held in memory as one string
+  '''
+  binary = (series_format == SERIES_FORMAT_BINARY)
+  if type(precision) == dict:
+    return _iter_series_json(obj, SERIES_PRECISION_DEFAULT, precision, binary)
+  else:
+    return _iter_series_json(obj, precision, {}, binary)
+
+#------------------------------------------------------------
+def _series_items_to_json(items, precision):
+  '''
+    returns json for the 'items' (datapoints) of a series, raises
+    TypeError if items are not all numbers or None
+  '''
+  fmt = '%%.%df' % precision
+  items_json = ','.join([ 'null' if v is None else fmt % v for v in items ])
+  # nan/inf are not valid json, let the caller write them as null
+  if 'a' in items_json or 'i' in items_json:
+    raise TypeError('non-finite datapoint')
+  return '[' + items_json + ']'
+
+#------------------------------------------------------------
+def _series_items_to_binary(items):
+  '''
+    returns json for the 'items' (datapoints) of a series, packed as
+    little-endian float32 with NaN for missing datapoints, and base64
+    encoded.  The page decodes this into an array (exawchartDecodeSeries).
+    Raises TypeError if items are not all numbers or None
+  '''
+  # the values between missing datapoints are added at once
+  packed = array('f')
+  start = 0
+  try:
+    while True:
+      end = items.index(None, start)
+      packed.fromlist(items[start:end])
+      packed.append(_NAN)
+      start = end + 1
+  except ValueError:
+    packed.fromlist(items[start:])
+  if sys.byteorder != 'little':
+    packed.byteswap()
+  return '{"f32":"' + b64encode(packed.tostring()) + '"}'
+
+#------------------------------------------------------------
+def _iter_series_json(obj, precision, key_precision, binary):
+  '''
+    yields the json for obj, see series_to_json()
+  '''
+  obj_type = type(obj)
+  if obj_type == dict:
+    sep = '{'
+    for key in obj:
+      # json keys are always strings
+      if isinstance(key, basestring):
+        yield sep + encode_basestring_ascii(key) + ':'
+      else:
+        yield sep + encode_basestring_ascii(str(key)) + ':'
+      sep = ','
+      value = obj[key]
+      value_precision = key_precision.get(key, precision)
+      # fast path for datapoints, which is most of the data
+      if key == 'items' and type(value) == list:
+        try:
+          if binary:
+            chunk = _series_items_to_binary(value)
+          else:
+            chunk = _series_items_to_json(value, value_precision)
+        except TypeError:
+          pass
+        else:
+          yield chunk
+          continue
+      for chunk in _iter_series_json(value, value_precision, key_precision, binary):
+        yield chunk
+    yield '{}' if sep == '{' else '}'
+  elif obj_type == list or obj_type == tuple:
+    sep = '['
+    for value in obj:
+      yield sep
+      sep = ','
+      for chunk in _iter_series_json(value, precision, key_precision, binary):
+        yield chunk
+    yield '[]' if sep == '[' else ']'
+  elif obj_type == float:
+    # nan/inf are not valid json
+    if obj != obj or obj in (_INF, -_INF):
+      yield 'null'
+    else:
+      yield '%.*f' % (precision, obj)
+  elif obj is None:
+    yield 'null'
+  elif obj is True:
+    yield 'true'
+  elif obj is False:
+    yield 'false'
+  elif obj_type == int or obj_type == long:
+    yield str(obj)
+  elif isinstance(obj, basestring):
+    yield encode_basestring_ascii(obj)
+  else:
+    raise TypeError(repr(obj) + ' is not JSON serializable')
+
+#------------------------------------------------------------
+def estimate_lag(signal, reference, max_lag, step = 1):
+  '''
+    returns (lag, correlation) for the lag (-max_lag .. max_lag seconds)
+    with the highest correlation of signal[t + lag] and reference[t].
+    signal and reference are lists or arrays of the same length, with a
+    value every step seconds and the mean subtracted.  With step > 1, the
+    lag between the steps is interpolated (a parabola through the
+    correlations of the best step and its neighbors), and rounded to
+    seconds, with the correlation at the top of the parabola.  Ties are
+    broken by the smallest absolute lag
+  '''
+  max_steps = max_lag / step
+  correlations = {}
+  best = (0, None)
+  length = len(signal)
+  for lag in sorted(range(-max_steps, max_steps + 1), key = abs):
+    start = max(0, -lag)
+    end = min(length, length - lag)
+    if end - start <= max_steps:
+      continue
+    # slices and imap() keep the inner loops in C
+    sig = signal[start + lag:end + lag]
+    ref = reference[start:end]
+    norm = sqrt(sum(imap(mul, sig, sig)) * sum(imap(mul, ref, ref)))
+    if norm == 0:
+      continue
+    correlations[lag] = sum(imap(mul, sig, ref)) / norm
+    if best[1] == None or correlations[lag] > best[1]:
+      best = (lag, correlations[lag])
+  (lag, correlation) = best
+  if lag - 1 not in correlations or lag + 1 not in correlations:
+    return (lag*step, correlation)
+  (before, after) = (correlations[lag - 1], correlations[lag + 1])
+  curvature = before - 2*correlation + after
+  offset = 0.0
+  if curvature < 0:
+    offset = max(-0.5, min(0.5, 0.5*(before - after) / curvature))
+  # and the correlation at the top of the parabola
+  return (max(-max_lag, min(max_lag, int(round((lag + offset)*step)))),
+          min(1.0, correlation - 0.25*(before - after)*offset))
+
+#------------------------------------------------------------
+def _get_correlation(xs, ys):
+  '''
+    returns the pearson correlation coefficient of the pairs (xs[i], ys[i]),
+    None if there are fewer than 3 pairs or x or y has no variance.  the
+    sums are centered on the means, as the raw sums of squares of large
+    values with a small variance cancel out
+  '''
+  n = len(xs)
+  if n < 3:
+    return None
+  mx = sum(xs) / float(n)
+  my = sum(ys) / float(n)
+  dx = [ a - mx for a in xs ]
+  dy = [ b - my for b in ys ]
+  vx = sum(map(mul, dx, dx))
+  vy = sum(map(mul, dy, dy))
+  if vx <= 0 or vy <= 0:
+    return None
+  return max(-1.0, min(1.0, sum(map(mul, dx, dy)) / sqrt(vx*vy)))
+
+#------------------------------------------------------------
+def get_correlations(x, y, window):
+  '''
+    returns (correlation, rolling): the pearson correlation coefficient
+    of x and y, and a list with the correlation coefficient over the
+    window values up to each position.  x and y are lists of the same
+    length, with None for missing values; only the positions where
+    both have a value are used, and the rolling correlation is None
+    with fewer than half of the window
+  '''
+  valid = [ a != None and b != None for (a, b) in zip(x, y) ]
+  min_values = max(3, window / 2)
+  rolling = []
+  for end in range(1, len(valid) + 1):
+    positions = [ i for i in range(max(0, end - window), end) if valid[i] ]
+    if len(positions) < min_values:
+      rolling.append(None)
+    else:
+      rolling.append(_get_correlation([ float(x[i]) for i in positions ],
+                                      [ float(y[i]) for i in positions ]))
+  positions = [ i for i in range(len(valid)) if valid[i] ]
+  return (_get_correlation([ float(x[i]) for i in positions ],
+                           [ float(y[i]) for i in positions ]),
+          rolling)
+
+#------------------------------------------------------------
+def quantize_matrix(rows):
+  '''
+    returns a json object for a matrix (e.g. a row per host and a column
+    per bucket), with each value quantized to one byte for the heatmap
+    page, so the payload is about 4/3 bytes per value (base64):
+    { rows, columns, low, high, levels, u8 } where u8 has the levels
+    (0 for low .. levels-1 for high, HEATMAP_MISSING for missing values)
+    row after row.
+    PARAMETERS:
+      rows: list of rows, each a list (of the same length) of numbers
+            or None for missing values
+  '''
+  low = None
+  high = None
+  for row in rows:
+    for value in row:
+      if value is None:
+        continue
+      if low is None or value < low:
+        low = value
+      if high is None or value > high:
+        high = value
+  if low is None:
+    low = high = 0.0
+  scale = 0.0
+  if high > low:
+    scale = (HEATMAP_LEVELS - 1) / float(high - low)
+
+  packed = array('B')
+  for row in rows:
+    packed.extend([ HEATMAP_MISSING if value is None
+                    else int((value - low) * scale + 0.5) for value in row ])
+  return { 'rows': len(rows),
+           'columns': len(rows[0]) if len(rows) > 0 else 0,
+           'low': low,
+           'high': high,
+           'levels': HEATMAP_LEVELS,
+           'u8': b64encode(packed.tostring()) }
+
+#------------------------------------------------------------
+def group_by_host(filelist):
+  '''
+    returns list of (hostname, files) tuples, based on the hostname in
+    the filename.  Hosts are in the order of their first file in
+    filelist, and files are in the same order as in filelist
+  '''
+  hosts = []
+  host_files = {}
+  for fname in filelist:
+    hostname = get_hostname_from_filename(fname)
+    if hostname not in host_files:
+      hosts.append(hostname)
+      host_files[hostname] = []
+    host_files[hostname].append(fname)
+  return [ (hostname, host_files[hostname]) for hostname in hosts ]
+
+#------------------------------------------------------------
+def merge_buckets(buckets, host_items):
+  '''
+    merges host_items, (bucket_id, bucket) tuples with buckets keyed by
+    hostname, into buckets, e.g. the buckets of a host parsed by a worker
+    process.  The hosts in host_items should not be in buckets
+  '''
+  for (i, bucket) in host_items:
+    if i not in buckets:
+      buckets[i] = {}
+    buckets[i].update(bucket)
+
+#------------------------------------------------------------
+def shard_by_host(filelist, shard_size):
+  '''
+    returns filelist split into shards (lists of files), each with the
+    files of at most shard_size hosts, based on the hostname in the
+    filename.  Hosts are in hostname order, and files are in the same
+    order as in filelist
+  '''
+  host_files = dict(group_by_host(filelist))
+  hosts = sorted(host_files)
+  return [ sum([ host_files[host] for host in hosts[i:i + shard_size] ], [])
+           for i in range(0, len(hosts), shard_size) ]
+
+#------------------------------------------------------------
+class SeriesSpill(object):
+  '''
+    series of floats for each host, spilled to a file per host in a
+    temporary directory, so only the series of one host need to be in
+    memory (e.g. for the multi-cell pages in fleet mode).
+    Each host has the same series (keys), with length datapoints each;
+    missing datapoints are NaN.
+  '''
+  def __init__(self, keys, length):
+    self._keys = list(keys)
+    self._length = length
+    self._spill_dir = tempfile.mkdtemp(prefix = 'exawchart_spill_')
+    self._paths = {}  # keyed by hostname
+
+  def new_series(self):
+    '''
+      returns a series of NaN, to be filled in for add_host()
+    '''
+    return array('d', [ _NAN ]) * self._length
+
+  def add_host(self, hostname, series):
+    '''
+      spills the series of hostname, a dictionary keyed by key with an
+      array('d') (from new_series()) for each key
+    '''
+    path = os.path.join(self._spill_dir, '%d.dat' % len(self._paths))
+    spill_file = open(path, 'wb')
+    try:
+      for key in self._keys:
+        if key in series:
+          series[key].tofile(spill_file)
+        else:
+          self.new_series().tofile(spill_file)
+    finally:
+      spill_file.close()
+    self._paths[hostname] = path
+
+  def hostnames(self):
+    return sorted(self._paths)
+
+  def get_series(self, hostname, key):
+    '''
+      returns the series of hostname for key, as a list with None for
+      the missing datapoints
+    '''
+    # NaN is the only value not equal to itself
+    return [ v if v == v else None
+             for v in self.get_values(hostname, key, 0, self._length) ]
+
+  def get_values(self, hostname, key, start, count):
+    '''
+      returns the count datapoints from start of the series of hostname
+      for key, as an array('d') with NaN for the missing datapoints, e.g.
+      to read the series of all hosts a block at a time
+    '''
+    values = array('d')
+    count = max(0, min(count, self._length - start))
+    spill_file = open(self._paths[hostname], 'rb')
+    try:
+      spill_file.seek((self._keys.index(key) * self._length + start) *
+                      values.itemsize)
+      values.fromfile(spill_file, count)
+    finally:
+      spill_file.close()
+    return values
+
+  def close(self):
+    '''
+      removes the spilled series
+    '''
+    if self._spill_dir != None:
+      shutil.rmtree(self._spill_dir, True)
+      self._spill_dir = None
+      self._paths = {}
+
+#------------------------------------------------------------
+class BucketStore(object):
+  '''
+    buckets keyed by bucket_id, for parsers with report_context.max_memory,
+    with the part of the dictionary interface used by the parsers and
+    charts.  The most recently used buckets are kept in memory, up to
+    about max_memory MB, and the others are spilled (marshalled) to a
+    temporary file, from which they are read back (memory-mapped) when
+    used again.
+    A bucket from store[bucket_id] can be updated until other buckets are
+    used, as it may then be spilled.  flush() is called once the buckets
+    are final, so the charts (possibly in worker processes) only read them
+  '''
+  def __init__(self, max_memory, buckets = None):
+    self._max_bytes = max_memory * 1024 * 1024
+    # keyed by bucket_id, (offset, length, room) of the bucket in the
+    # spill file, None if not spilled yet
+    self._index = {}
+    # end of the spill file, and whether it was written since flushed
+    self._end = 0
+    self._unflushed = False
+    # buckets in memory, least recently used first
+    self._resident = OrderedDict()
+    self._last_id = None
+    self._last = None
+    # estimated memory used by a bucket, see BUCKET_MEMORY_FACTOR, and
+    # the uses of the buckets since it was estimated
+    self._bucket_size = 0
+    self._uses = 0
+    self._read_only = False
+    self._file = tempfile.TemporaryFile(prefix = 'exawchart_buckets_')
+    self._map = None
+    if buckets != None:
+      for (bucket_id, bucket) in buckets.iteritems():
+        self[bucket_id] = bucket
+
+  def set_max_memory(self, max_memory):
+    '''
+      changes the memory (in MB) for the buckets, e.g. while the memory is
+      shared with worker processes
+    '''
+    self._max_bytes = max_memory * 1024 * 1024
+    self._trim()
+
+  def __contains__(self, bucket_id):
+    return bucket_id in self._index
+
+  def __len__(self):
+    return len(self._index)
+
+  def __iter__(self):
+    return iter(self._index)
+
+  def keys(self):
+    return self._index.keys()
+
+  def iteritems(self):
+    for bucket_id in self._index:
+      yield (bucket_id, self[bucket_id])
+
+  def __getitem__(self, bucket_id):
+    if bucket_id == self._last_id:
+      return self._last
+    if bucket_id in self._resident:
+      bucket = self._resident.pop(bucket_id)
+    else:
+      bucket = marshal.loads(self._read(self._index[bucket_id]))
+    self._resident[bucket_id] = bucket
+    self._last_id = bucket_id
+    self._last = bucket
+    self._trim()
+    return bucket
+
+  def __setitem__(self, bucket_id, bucket):
+    if bucket_id not in self._index:
+      self._index[bucket_id] = None
+    self._resident.pop(bucket_id, None)
+    self._resident[bucket_id] = bucket
+    self._last_id = bucket_id
+    self._last = bucket
+    self._trim()
+
+  def _trim(self):
+    '''
+      spills the least recently used buckets, but never the most recently
+      used one, while the buckets in memory exceed max_memory
+    '''
+    if len(self._resident) < 2:
+      return
+    # buckets grow as they are filled (e.g. with the next host), so the
+    # size is estimated again from the least recently used one after as
+    # many uses as there are buckets in memory
+    self._uses += 1
+    if self._uses >= len(self._resident):
+      self._uses = 0
+      self._bucket_size = max(self._bucket_size, len(marshal.dumps(next(self._resident.itervalues()))) * BUCKET_MEMORY_FACTOR)
+    while len(self._resident) > 1 and len(self._resident) * self._bucket_size > self._max_bytes:
+      (bucket_id, bucket) = self._resident.popitem(last = False)
+      if not self._read_only:
+        self._write(bucket_id, bucket)
+
+  def _write(self, bucket_id, bucket):
+    '''
+      spills bucket, unless the spill file already has the same bucket.
+      The bucket is written over its previous copy if it fits in its room,
+      and a new copy gets twice the room it needs, as the buckets grow
+      while they are filled (e.g. with the next host)
+    '''
+    data = marshal.dumps(bucket)
+    self._bucket_size = max(self._bucket_size, len(data) * BUCKET_MEMORY_FACTOR)
+    location = self._index[bucket_id]
+    if location != None and location[1] == len(data) and self._read(location) == data:
+      return
+    if location != None and len(data) <= location[2]:
+      (offset, room) = (location[0], location[2])
+    else:
+      # the previous copy of the bucket (if any) is left in the file
+      (offset, room) = (self._end, 2 * len(data))
+      self._end += room
+    self._file.seek(offset)
+    self._file.write(data)
+    self._unflushed = True
+    self._index[bucket_id] = (offset, len(data), room)
+
+  def _read(self, location):
+    '''
+      returns the marshalled bucket at location in the spill file, mapping
+      the file again if it grew since it was mapped
+    '''
+    (offset, length) = location[:2]
+    if self._unflushed:
+      # the map has the data written over a previous copy once flushed
+      self._file.flush()
+      self._unflushed = False
+    if self._map == None or offset + length > len(self._map):
+      if self._map != None:
+        self._map.close()
+      self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+    return self._map[offset:offset + length]
+
+  def flush(self):
+    '''
+      spills the buckets in memory, so all buckets are in the spill file.
+      From then on the buckets are only read: the buckets dropped from
+      memory are not written again
+    '''
+    for (bucket_id, bucket) in self._resident.iteritems():
+      self._write(bucket_id, bucket)
+    self._file.flush()
+    self._unflushed = False
+    self._read_only = True
+
+  def close(self):
+    '''
+      removes the spilled buckets
+    '''
+    if self._map != None:
+      self._map.close()
+      self._map = None
+    if self._file != None:
+      self._file.close()
+      self._file = None
+    self._index = {}
+    self._resident = OrderedDict()
+    self._last_id = None
+    self._last = None
+
+#------------------------------------------------------------
+def minify_asset(text):
+  '''
+    returns text (the shared script or styles) without its comments (but
+    the first one, the copyright), blank lines and indentation.  Only
+    comments on lines of their own are removed, so code and strings are
+    left as they are, and lines are kept, so the script does not depend
+    on where semicolons are left out
+  '''
+  lines = []
+  in_comment = False
+  for line in text.splitlines():
+    line = line.strip()
+    if in_comment:
+      if '*/' in line:
+        in_comment = False
+        line = line[line.index('*/') + 2:].strip()
+      else:
+        continue
+    elif len(lines) > 0 and line.startswith('/*'):
+      if '*/' in line:
+        line = line[line.index('*/') + 2:].strip()
+      else:
+        in_comment = True
+        continue
+    if line == '' or line.startswith('//'):
+      continue
+    lines.append(line)
+  return '\n'.join(lines) + '\n'
+
+#------------------------------------------------------------
+def iter_template(template, values):
+  '''
+    returns an iterator over the chunks of template % values, for the
+    html templates, which only use %(name)s placeholders and %%.
+    A list or generator value (e.g. the chunks from iter_series_json())
+    is iterated over, so each chunk is produced only when it is needed
+  '''
+  pos = 0
+  for match in _TEMPLATE_FIELD_RE.finditer(template):
+    yield template[pos:match.start()]
+    pos = match.end()
+    name = match.group(1)
+    if name == None:
+      yield '%'
+      continue
+    value = values[name]
+    if isinstance(value, (list, GeneratorType)):
+      for chunk in value:
+        yield chunk
+    elif isinstance(value, basestring):
+      yield value
+    else:
+      yield str(value)
+  yield template[pos:]
+
+#------------------------------------------------------------
+def map_hosts(func, hostnames, jobs = 1):
+  '''
+    returns [ func(hostname) for hostname in hostnames ], in the same
+    order, using a pool of jobs worker processes if jobs > 1.
+    The workers are forked when called, so func must be a module level
+    function that gets its input (e.g. the parsed data) and the report
+    context from module globals.  Any changes func makes to those are lost, so func should
+    return what needs to be registered (e.g. the html file tuples) and
+    the caller registers it.
+  '''
+  hostnames = list(hostnames)
+  if jobs <= 1 or len(hostnames) <= 1:
+    return [ func(hostname) for hostname in hostnames ]
+
+  pool = Pool(min(jobs, len(hostnames)))
+  try:
+    return pool.map(func, hostnames, 1)
+  finally:
+    pool.close()
+    pool.join()
+
+#------------------------------------------------------------
+def imap_hosts(func, hostnames, jobs = 1):
+  '''
+    returns an iterator over func(hostname) for hostname in hostnames,
+    in the same order, like map_hosts(), but returns each result as soon
+    as it (and the ones before it) are ready, so the caller can use it
+    and drop it before the other results
+  '''
+  hostnames = list(hostnames)
+  if jobs <= 1 or len(hostnames) <= 1:
+    for hostname in hostnames:
+      yield func(hostname)
+    return
+
+  pool = Pool(min(jobs, len(hostnames)))
+  try:
+    for result in pool.imap(func, hostnames, 1):
+      yield result
+  except:
+    # e.g. the caller stopped on an error, so the other results are not needed
+    pool.terminate()
+    pool.join()
+    raise
+  pool.close()
+  pool.join()
+
+#------------------------------------------------------------
+def use_bucket_store(buckets, report_context):
+  '''
+    returns buckets (of a parser module), or a BucketStore with them if
+    report_context.max_memory is set
+  '''
+  if report_context.max_memory > 0 and not isinstance(buckets, BucketStore):
+    return BucketStore(report_context.max_memory, buckets)
+  return buckets
+
+#------------------------------------------------------------
+# input of _parse_host() in the worker processes, set by parse_by_host()
+# before they are forked
+_host_parse = None
+
+def _parse_host(hostname):
+  '''
+    parses the files of hostname in a worker process, see parse_by_host().
+    With a memory limit, the buckets of the host are kept in a BucketStore
+    and written to a temporary file, returned instead of the buckets
+  '''
+  (parse_host_files, host_files, max_memory) = _host_parse
+  if max_memory > 0:
+    host_buckets = BucketStore(max_memory)
+  else:
+    host_buckets = {}
+  try:
+    (host_metadata, host_summary) = parse_host_files(hostname,
+                                                     host_files[hostname],
+                                                     host_buckets)
+    # no files processed for the host
+    if host_metadata == None:
+      return (hostname, None, None, None)
+    if isinstance(host_buckets, BucketStore):
+      return (hostname, _write_host_buckets(host_buckets), host_metadata,
+              host_summary)
+    return (hostname, host_buckets, host_metadata, host_summary)
+  finally:
+    if isinstance(host_buckets, BucketStore):
+      host_buckets.close()
+
+def _write_host_buckets(host_buckets):
+  '''
+    writes the (bucket_id, bucket) items of host_buckets to a temporary
+    file, marshalled one at a time, and returns the filename
+  '''
+  # the buckets are only read from now on
+  host_buckets.flush()
+  (fd, filename) = tempfile.mkstemp(prefix = 'exawchart_host_')
+  host_file = os.fdopen(fd, 'wb')
+  try:
+    for item in host_buckets.iteritems():
+      marshal.dump(item, host_file)
+  finally:
+    host_file.close()
+  return filename
+
+def _iter_host_buckets(filename):
+  '''
+    returns an iterator over the (bucket_id, bucket) items written by
+    _write_host_buckets(), and removes the file at the end
+  '''
+  host_file = open(filename, 'rb')
+  try:
+    while True:
+      try:
+        yield marshal.load(host_file)
+      except EOFError:
+        break
+  finally:
+    host_file.close()
+    os.remove(filename)
+
+#------------------------------------------------------------
+def parse_by_host(filelist, report_context, buckets, parse_files,
+                  parse_host_files, register_host, max_hosts = None):
+  '''
+    parses filelist for parse_input_files() of a parser module into
+    buckets, the buckets of the module (see use_bucket_store()):
+      parse_files(filelist, max_hosts) parses the files in this process.
+    With report_context.parse_jobs > 1, the files of each host are
+    parsed by a worker process instead (files of hosts after the first
+    max_hosts ones are ignored):
+      parse_host_files(hostname, files, host_buckets) parses the files
+        into host_buckets, and returns the host metadata (None if no
+        files were processed) and summary of the host
+      register_host(hostname, host_metadata, host_summary) adds the
+        host metadata and summary to the module and report_context
+    The buckets of each host are merged as the workers return them, in
+    host order, so the result is the same as parsing all files in this
+    process.  With report_context.max_memory, the workers and this
+    process share the memory limit while parsing, and the workers
+    return their buckets through a temporary file
+  '''
+  global _host_parse
+
+  host_files = group_by_host(filelist)
+  if report_context.parse_jobs <= 1 or len(host_files[:max_hosts]) <= 1:
+    parse_files(filelist, max_hosts)
+  else:
+    if max_hosts != None:
+      for (hostname, files) in host_files[max_hosts:]:
+        for fname in files:
+          report_context.log_msg('error', 'Maximum number of hosts (%d) exceeded, ignoring file: %s' % (max_hosts, fname))
+      host_files = host_files[:max_hosts]
+
+    jobs = min(report_context.parse_jobs, len(host_files))
+    max_memory = float(report_context.max_memory) / (jobs + 1)
+    if isinstance(buckets, BucketStore):
+      buckets.set_max_memory(max_memory)
+    _host_parse = (parse_host_files, dict(host_files), max_memory)
+    host_count = 0
+    try:
+      results = imap_hosts(_parse_host,
+                           [ hostname for (hostname, files) in host_files ],
+                           jobs)
+      for (hostname, host_buckets, host_metadata, host_summary) in results:
+        if host_metadata == None:
+          continue
+        if isinstance(host_buckets, basestring):
+          merge_buckets(buckets, _iter_host_buckets(host_buckets))
+        else:
+          merge_buckets(buckets, host_buckets.iteritems())
+        register_host(hostname, host_metadata, host_summary)
+        host_count += 1
+    finally:
+      _host_parse = None
+      if isinstance(buckets, BucketStore):
+        buckets.set_max_memory(report_context.max_memory)
+
+    # determine if multiple hosts
+    if host_count > 1:
+      report_context.set_multihost(True)
 
+  # the buckets are final, see BucketStore
+  if isinstance(buckets, BucketStore):
+    buckets.flush()
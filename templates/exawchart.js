@@ -0,0 +1,3036 @@
+/* Copyright (c) 2016, Oracle and/or its affiliates. All rights reserved. */
+
+//------------------------------------------------------------
+/* script shared by the report pages, which load it after require.js.
+   It is written to the report as exawchart_<version>.js (see
+   CHART_SCRIPT in exawutil.py), so the browser parses and caches one
+   copy for all the pages.  A page only has its data, and shows it
+   with exawchartStartPage(), or the single page viewer shows the pages
+   (see exawchartStartViewer()) */
+
+requirejs.config({
+  // Path mappings for the logical module names
+  baseUrl: "scripts",
+  paths: {
+    "knockout": "https://cdnjs.cloudflare.com/ajax/libs/knockout/3.4.0/knockout-min",
+    "jquery": "https://cdnjs.cloudflare.com/ajax/libs/jquery/3.1.0/jquery.min",
+    "jqueryui": "https://cdnjs.cloudflare.com/ajax/libs/jqueryui/1.12.1/jquery-ui",
+    "jqueryui-amd": "https://cdn.rawgit.com/jquery/jquery-ui/1.12.1/ui",
+    "promise": "https://cdnjs.cloudflare.com/ajax/libs/es6-promise/3.2.1/es6-promise.min",
+    "hammerjs": "https://cdnjs.cloudflare.com/ajax/libs/hammer.js/2.0.8/hammer.min",
+    "ojdnd": "https://cdn.rawgit.com/oracle/oraclejet/2.2.0/dist/js/libs/dnd-polyfill/dnd-polyfill-1.0.0.min",
+    "ojs": "https://cdn.rawgit.com/oracle/oraclejet/2.2.0/dist/js/libs/oj/min",
+    "ojL10n": "https://cdn.rawgit.com/oracle/oraclejet/2.2.0/dist/js/libs/oj/ojL10n",
+    "ojtranslations": "https://cdn.rawgit.com/oracle/oraclejet/2.2.0/dist/js/libs/oj/resources",
+    "text": "https://cdnjs.cloudflare.com/ajax/libs/require-text/2.0.15/text.min",
+    "signals": "https://cdnjs.cloudflare.com/ajax/libs/js-signals/1.0.0/js-signals.min"
+  } ,
+  // Shim configurations for modules that do not expose AMD
+  shim: { "jqueryui-amd": { exports: "$",
+                            deps: ["jquery"]
+                          },
+          "jquery": { exports: ["jQuery", "$"] }
+        }
+});
+
+// modules loaded for all the pages, see exawchartPages
+var exawchartModules = [ "ojs/ojcore", "knockout", "jquery", "ojs/ojknockout" ];
+
+// page types, keyed by the name of their template (without
+// _template.html), each with the modules it loads and its show function,
+// which shows the page data (page) in container
+var exawchartPages = {};
+
+// the float32 datapoints are little-endian, see below
+var exawchartLittleEndian =
+  new Uint8Array(new Uint16Array([ 1 ]).buffer)[0] === 1;
+
+//------------------------------------------------------------
+/* chart datapoints may be written as base64 encoded little-endian
+   float32 ({ f32: ... }, see series_to_json in exawutil.py) with NaN
+   for missing datapoints, so decode them into arrays, with null for
+   the missing datapoints as the charts expect.  obj is decoded in
+   place (with the objects and arrays it contains), and returned */
+function exawchartDecodeSeries(obj)
+{
+  if (obj === null || typeof obj !== "object")
+    return obj;
+  if (typeof obj.f32 === "string")
+  {
+    var bytes = atob(obj.f32);
+    var buffer = new Uint8Array(bytes.length);
+    for (var i = 0; i < bytes.length; i++)
+      buffer[i] = bytes.charCodeAt(i);
+    if (!exawchartLittleEndian)
+    {
+      for (var i = 0; i < buffer.length; i += 4)
+      {
+        var swap = buffer[i];
+        buffer[i] = buffer[i + 3];
+        buffer[i + 3] = swap;
+        swap = buffer[i + 1];
+        buffer[i + 1] = buffer[i + 2];
+        buffer[i + 2] = swap;
+      }
+    }
+    // the values are read through a view on the decoded bytes
+    var values = new Float32Array(buffer.buffer);
+    var items = new Array(values.length);
+    for (var i = 0; i < values.length; i++)
+      items[i] = (values[i] === values[i]) ? values[i] : null;
+    return items;
+  }
+  for (var key in obj)
+    obj[key] = exawchartDecodeSeries(obj[key]);
+  return obj;
+}
+
+//------------------------------------------------------------
+/* loads the script at url, e.g. the series of a device or host that a
+   page loads when it is selected */
+function exawchartLoadScript(url)
+{
+  var script = document.createElement("script");
+  script.src = url;
+  document.head.appendChild(script);
+}
+
+//------------------------------------------------------------
+/* the series of a device or host that are in a separate file (see
+   write_side_file in exawutil.py) are kept here once loaded, keyed by
+   the url of the file, so they are loaded once, also when the page is
+   shown again in the single page viewer */
+var exawchartChunks = {};
+// callbacks waiting for the files being loaded, by url
+var exawchartChunkCallbacks = {};
+
+//------------------------------------------------------------
+/* calls callback with the series in the file at url, loading it first
+   if needed */
+function exawchartLoadChunk(url, callback)
+{
+  if (exawchartChunks[url] != null)
+  {
+    callback(exawchartChunks[url]);
+    return;
+  }
+  if (exawchartChunkCallbacks[url] != null)
+  {
+    exawchartChunkCallbacks[url].push(callback);
+    return;
+  }
+  exawchartChunkCallbacks[url] = [ callback ];
+  exawchartLoadScript(url);
+}
+
+//------------------------------------------------------------
+/* called by the script in the file at url, with its series (chunk) */
+function exawchartAddChunk(url, chunk)
+{
+  exawchartChunks[url] = exawchartDecodeSeries(chunk);
+  var callbacks = exawchartChunkCallbacks[url] || [];
+  delete exawchartChunkCallbacks[url];
+  for (var i = 0; i < callbacks.length; i++)
+    callbacks[i](exawchartChunks[url]);
+}
+
+//------------------------------------------------------------
+/* pads the content of the page in container, so it is not hidden by the
+   fixed header and footer, and shows it */
+function exawchartAdjustContentPadding($, container)
+{
+  // assumes elements for fixed-top, fixed-bottom and content exist
+  var topElemHeight = $(container).find('.oj-applayout-fixed-top')[0].offsetHeight;
+  var bottomElemHeight = $(container).find('.oj-applayout-fixed-bottom')[0].clientHeight;
+  var contentElem = $(container).find('.oj-applayout-content')[0];
+  $(contentElem).css( { paddingTop: topElemHeight + 'px',
+                        paddingBottom: bottomElemHeight + 'px' }).
+    addClass('oj-complete');
+}
+
+//------------------------------------------------------------
+/* shows the page data (page) in the body of a page of the given type,
+   once the modules it needs are loaded */
+function exawchartStartPage(type, page)
+{
+  require(exawchartModules.concat(exawchartPages[type].modules),
+    function (oj, ko, $)
+    {
+      $(document).ready(
+        function()
+        {
+          exawchartPages[type].show(oj, ko, $, page, document.body);
+        });
+    });
+}
+
+//------------------------------------------------------------
+/* single page viewer (see viewer_template.html), which loads the
+   framework once and shows the menu and the selected page.  The data of
+   each page is a script (see write_template_file in exawutil.py), which
+   is loaded when the page is first selected, and adds the data to
+   exawchartPageData, so the pages viewed before are shown again without
+   loading them */
+
+// data of the loaded pages, keyed by url: { type: ..., page: ... }
+var exawchartPageData = {};
+// urls of the pages being loaded
+var exawchartLoading = {};
+// time axes of the loaded pages, by length, one copy for the pages with
+// the same time axis
+var exawchartTimeAxes = {};
+// url of the page selected in the viewer
+var exawchartCurrentPage = null;
+
+//------------------------------------------------------------
+/* starts the viewer: shows the menu (of viewer.files, see the menu page)
+   and viewer.firstPage */
+function exawchartStartViewer(viewer)
+{
+  require(exawchartModules.concat(exawchartPages["menu"].modules),
+    function (oj, ko, $)
+    {
+      $(document).ready(
+        function()
+        {
+          var menu = document.getElementById("exawchart-menu");
+          $(menu).html($("#exawchart-page-menu").html());
+          exawchartPages["menu"].show(oj, ko, $,
+                                      { files: viewer.files,
+                                        reportContext: viewer.reportContext,
+                                        showPage: exawchartShowPage },
+                                      menu);
+
+          // the links to other pages (e.g. on the host summary pages) are
+          // shown in the viewer too
+          var urls = {};
+          for (var host in viewer.files)
+            for (var i = 0; i < viewer.files[host].length; i++)
+              urls[viewer.files[host][i][0]] = true;
+          $("#exawchart-content").on("click", "a[href]",
+            function(event)
+            {
+              var url = $(this).attr("href");
+              if (urls[url])
+              {
+                event.preventDefault();
+                exawchartShowPage(url);
+              }
+            });
+
+          exawchartShowPage(viewer.firstPage);
+        });
+    });
+}
+
+//------------------------------------------------------------
+/* shows the page at url in the viewer, loading its data first if needed */
+function exawchartShowPage(url)
+{
+  exawchartCurrentPage = url;
+  if (exawchartPageData[url] != null)
+    exawchartRenderPage(url);
+  else if (!exawchartLoading[url])
+  {
+    exawchartLoading[url] = true;
+    exawchartLoadScript(url);
+  }
+}
+
+//------------------------------------------------------------
+/* called by the data script of the page at url, with its type and data
+   (page), which is kept with its series decoded */
+function exawchartAddPage(url, type, page)
+{
+  delete exawchartLoading[url];
+  exawchartDecodeSeries(page);
+  if (page.xAxis instanceof Array)
+    page.xAxis = exawchartShareTimeAxis(page.xAxis);
+  exawchartPageData[url] = { type: type, page: page };
+  if (url == exawchartCurrentPage)
+    exawchartRenderPage(url);
+}
+
+//------------------------------------------------------------
+/* returns the time axis equal to xAxis of a page added before, or xAxis
+   if there is none */
+function exawchartShareTimeAxis(xAxis)
+{
+  var axes = exawchartTimeAxes[xAxis.length];
+  if (axes == null)
+    axes = exawchartTimeAxes[xAxis.length] = [];
+  for (var i = 0; i < axes.length; i++)
+  {
+    var j = 0;
+    while (j < xAxis.length && axes[i][j] === xAxis[j])
+      j++;
+    if (j == xAxis.length)
+      return axes[i];
+  }
+  axes.push(xAxis);
+  return xAxis;
+}
+
+//------------------------------------------------------------
+/* shows the loaded page at url in the content of the viewer, replacing
+   the page shown before.  The page gets a copy of its data, as the
+   pages change their data while they are shown */
+function exawchartRenderPage(url)
+{
+  var type = exawchartPageData[url].type;
+  require(exawchartModules.concat(exawchartPages[type].modules),
+    function (oj, ko, $)
+    {
+      // another page may have been selected while the modules loaded
+      if (url != exawchartCurrentPage)
+        return;
+      var content = document.getElementById("exawchart-content");
+      ko.cleanNode(content);
+      $(window).off(".exawchart");
+      $(content).empty().html($("#exawchart-page-" + type).html());
+      window.scrollTo(0, 0);
+      exawchartPages[type].show(oj, ko, $,
+                                $.extend(true, {}, exawchartPageData[url].page),
+                                content);
+    });
+}
+
+//------------------------------------------------------------
+/* Menu page, see menu_template.html */
+exawchartPages["menu"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojnavigationlist" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var Model = function()
+    {
+      var self = this;
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+      // optionChange select handler
+      self.optionChange = function(event, ui) 
+      {
+        // get data-url for the selected item and change the
+        // chart frame's src attribute
+        if (ui.option == "selection")
+        {
+          var linkItem = document.getElementById(ui.value);
+          // set chart src to the url and shift focus
+          if (linkItem.dataset.url != null && page.showPage != null)
+          {
+            // single page viewer, see exawchartStartViewer()
+            page.showPage(linkItem.dataset.url);
+          }
+          else if (linkItem.dataset.url != null)
+          { 
+            var targetFrame = parent.document.getElementById('chart');
+            targetFrame.setAttribute("src",linkItem.dataset.url);
+            targetFrame.focus();
+          }
+        }
+      }
+
+      self.htmlFiles = page.files;
+      // determine first entry
+      self.firstHost = Object.keys(self.htmlFiles).sort()[0];
+      self.reportContext = page.reportContext;
+
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+    }
+
+    //------------------------------------------------------------
+    var constructMenu = function(model)
+    {
+      var hosts = Object.keys(model.htmlFiles)
+      hosts.sort();
+      for (var i = 0; i < hosts.length; i++)
+      {
+        var hostname = hosts[i];
+        var dispName = (hostname == "" ? "All" : hostname);
+        if (i==0 && model.firstHost != dispName)
+          model.firstHost = dispName;
+
+        // now add each host as menu item
+        var hostLi = document.createElement("li");
+        $(hostLi).attr( { id: dispName,
+//                          "aria-label": dispName,
+                          class: "oj-text-sm" } );
+        // create anchor
+        var hostLiA = document.createElement("a");
+        $(hostLiA).attr( { href: "#" });
+        $(hostLiA).text(dispName);
+        // append <a> to <li> element
+        $(hostLi).append(hostLiA);
+
+        // create list for each of the files for the host
+        var hostLiUl = document.createElement("ul");
+        var labelText = "menu list for " + dispName;
+//        $(hostLiUl).attr( { "aria-label" : labelText } );
+        for (var j = 0; j < model.htmlFiles[hostname].length; j++)
+        {
+          // we should have two, we do not bother checking here ...
+          var htmlFile = model.htmlFiles[hostname][j][0];
+          var pageTitle = model.htmlFiles[hostname][j][1];
+          // create the <li data-url=""><a href="#"> entry for the file
+          var chartLi = document.createElement("li");
+          $(chartLi).attr( { id: dispName + '_' + pageTitle,
+                             "data-url": htmlFile });
+          var chartLiSpanA = document.createElement("a");
+          $(chartLiSpanA).attr( { class: "oj-text-sm",
+                              target: "chart",
+                              href: "#" } );
+          $(chartLiSpanA).text(pageTitle);
+          $(chartLi).append(chartLiSpanA);
+          // check if we need to mark this menu entry based on findings
+          if (model.htmlFiles[hostname][j].length > 2 && model.htmlFiles[hostname][j][2])
+              // add image
+            $(chartLiSpanA).append('<span><img role="image" alt="warning" style="vertical-align:middle" src="https://cdn.rawgit.com/oracle/oraclejet/2.0.2/dist/css/common/images/alertModifier_warning.png"/></span>'); 
+
+          // add list item to the host menu list
+          $(hostLiUl).append(chartLi);
+        }
+        // append entire host entry to the main menu
+        $(hostLi).append(hostLiUl);
+        $("#menu").append(hostLi);
+      }
+    }
+    //------------------------------------------------------------
+    // create model
+    var model = new Model();
+    constructMenu(model);
+
+    //------------------------------------------------------------
+
+    ko.applyBindings(model, container);
+  }
+};
+
+//------------------------------------------------------------
+/* Host summary page, see cell_summary_template.html */
+exawchartPages["cell_summary"] =
+{
+  modules: [ "promise", "ojs/ojchart", "ojs/ojcollapsible", "ojs/ojmasonrylayout", "ojs/ojlistview" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+
+      //------------------------------------------------------------
+      // supporting functions
+      //------------------------------------------------------------
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+
+      self.psecConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##/s", useGrouping: true, maximumFractionDigits: 2 });
+
+      self.mbpsConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##MB/s", useGrouping: true, maximumFractionDigits: 2 } );
+
+      // self.msConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##ms", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.usConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##us", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.gbConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##GB", useGrouping: true, maximumFractionDigits: 2 } );
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      // self.gbpsConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##GB/s", useGrouping: true, maximumFractionDigits: 2 } );
+
+      // scale down as required
+      self.gbpsConverter = {
+        format : function(value)
+        {
+          var valueString;
+          var converter;
+          if (value < 0.1)
+            valueString = self.mbpsConverter.format(value*1024);
+          else
+          {
+            converter = oj.Validation.converterFactory("number").createConverter( { pattern: '#,###,###.##GB/s', useGrouping: true, maximumFractionDigits: 2 } );
+            valueString = converter.format(value);
+          }
+          return valueString;                
+        }
+      };
+
+      // scale to us as required
+      self.msConverter = {
+        format : function(value)
+        {
+          var valueString;
+          var converter;
+          if (value < 1)
+            valueString = self.usConverter.format(value*1000);
+          else
+          {
+            converter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##ms", useGrouping: true, minimumFractionDigits: 2,  maximumFractionDigits: 2 });
+            valueString = converter.format(value);
+          }
+          return valueString;
+        }
+      }
+
+      var noFindings = [ 'No findings' ];
+      self.summary =  page.summary;
+
+      var statType;
+      // extract findings for each section
+      // this is displayed using ko foreach
+      self.findings = {};
+      for (statType in self.summary)
+      {
+        self.findings[statType] = (self.summary[statType].findings.length > 0 ? self.summary[statType].findings : noFindings);
+        // add visibility attribute based on existence of html files
+        if (statType === 'alerts') 
+          self.summary[statType]['visible'] = true; // always visible
+        else
+          self.summary[statType]['visible'] = (self.summary[statType].htmlFiles.length > 0 ? true : false);
+      }
+
+      // variability (standard deviation and coefficient of variation
+      // over the samples) of each average, to tell steady from bursty
+      // load; CV is the standard deviation relative to the average
+      self.cvConverter = oj.Validation.converterFactory("number").createConverter( { maximumFractionDigits: 2 });
+      self.numConverter = oj.Validation.converterFactory("number").createConverter( { useGrouping: true, maximumFractionDigits: 4 });
+      var formatVariability = function(label, stddev, cv, converter)
+      {
+        return label + ': stddev ' + converter.format(stddev) +
+               ', CV ' + self.cvConverter.format(cv) +
+               (cv >= 1 ? ' (bursty)' : '');
+      };
+      self.variability = { iostat: [], mpstat: [], cellsrvstat: [] };
+      var variability = self.summary.iostat.variability;
+      var iostatStats = [ [ 'iops', 'IOPs', self.psecConverter, 1 ],
+                          [ 'mbps', 'MB/s', self.mbpsConverter, 1 ],
+                          [ 'await', 'wait time', self.msConverter, 1 ],
+                          [ 'util', '%utilization', self.pctConverter, 100 ] ];
+      for (var g = 0; g < self.summary.iostat.groups.length; g++)
+      {
+        for (var s = 0; s < iostatStats.length; s++)
+        {
+          var stat = iostatStats[s][0];
+          if (variability.stddev[stat] === undefined || variability.stddev[stat][g] === null)
+            continue;
+          self.variability.iostat.push(
+            formatVariability(self.summary.iostat.groups[g] + ' ' + iostatStats[s][1],
+                              variability.stddev[stat][g] / iostatStats[s][3],
+                              variability.cv[stat][g], iostatStats[s][2]));
+        }
+      }
+      variability = self.summary.mpstat.variability;
+      if (variability.stddev !== undefined)
+        self.variability.mpstat.push(
+          formatVariability('%busy', variability.stddev.busy / 100,
+                            variability.cv.busy, self.pctConverter));
+      variability = self.summary.cellsrvstat.variability;
+      for (var key in variability)
+        self.variability.cellsrvstat.push(
+          formatVariability(variability[key].title, variability[key].stddev,
+                            variability[key].cv, self.numConverter));
+
+      // bind series and group data
+      self.seriesData = {};
+      self.groupData = {};
+      for (statType in self.summary)
+      {
+        self.groupData[statType] = ko.observableArray(self.summary[statType].groups);
+        if (statType === "mpstat")
+          self.seriesData[statType] = ko.observableArray(self.summary[statType].seriesData);
+        else
+        {
+          self.seriesData[statType] = {};
+          for (var chartType in self.summary[statType].seriesData)
+            self.seriesData[statType][chartType] = ko.observableArray(self.summary[statType].seriesData[chartType]);
+        }
+      }
+
+      self.reportContext = page.reportContext;
+
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+    };
+
+    //
+    var appendChart = function(htmlOptions, chartOptions)
+    {
+      // htmlOptions should include tags in the html - i.e.
+      // chartId, chartTileId, maxWidth
+      // chartOptions should include tags in the ojComponent 
+      // e.g. required: chartSeries, chartGroup, chartTitle, converter
+      //      optional: stack, orientation, xAxisRender, yAxisRender
+      // default hide xAxis and yAxis
+      xAxisRender = ( chartOptions.hasOwnProperty("xAxisRender") ? chartOptions.xAxisRender : 'off' ); 
+      yAxisRender = ( chartOptions.hasOwnProperty("yAxisRender") ? chartOptions.yAxisRender : 'off' ); 
+      // default unstacked
+      stack = (chartOptions.hasOwnProperty("stack") ? chartOptions.stack : "off");
+      groupTooltip = (chartOptions.hasOwnProperty("groupTooltip") ? chartOptions.groupTooltip : "off" );
+      // default orientation is vertical
+      orientation = (chartOptions.hasOwnProperty("orientation") ? chartOptions.orientation : "vertical");
+      var ojComponent = "component: 'ojChart', " +
+              "type: 'bar', " +
+              "series: " + chartOptions.chartSeries + "," +
+              "groups: " + chartOptions.chartGroups + ", " +
+              "animationOnDisplay: 'auto', animationOnDataChange: 'auto', " +
+              "orientation: '" + orientation + "', hoverBehavior: 'dim', " +
+              "selectionMode: 'single', " +
+              "stack: '" + stack + "', stackLabel: 'on', " +
+              "title: { text: '" + chartOptions.chartTitle + "', style: 'font-size:1.1em'}, " +
+              "styleDefaults: { dataLabelPosition: 'none', stackLabelStyle:'font-size:.9em;font-weight:normal;' }, " +
+              "legend: { rendered: 'off' }, " +
+              "yAxis: {tickLabel: {rendered: '" + yAxisRender + "', scaling: 'none', converter: " + chartOptions.converter + "} }, " +
+              "xAxis: { rendered: '" + xAxisRender + "'}," +
+              "valueFormats: [ " +
+              " { type: 'group', tooltipDisplay: '" + groupTooltip + "'}, " +
+              " { type: 'y', scaling: 'none', converter: " + chartOptions.converter + "}, " +
+              " { type: 'label', scaling: 'none', converter: " + chartOptions.converter + "} ]";
+
+      var divChart = document.createElement("div");
+      $(divChart).attr( { id: htmlOptions.chartId }).
+        attr('data-bind', "ojComponent: {" + ojComponent + "}");
+      if (htmlOptions.hasOwnProperty("maxWidth"))
+        $(divChart).attr('style', "max-height:140px; max-width:" + htmlOptions.maxWidth);
+      else
+        $(divChart).attr('style', "max-height:140px; max-width: 300px;");
+      // append to proper tile
+      $("#" + htmlOptions.chartTileId).append(divChart);
+
+    };
+
+    var chartModel = new ChartModel();
+    var statType; 
+    // iostat charts
+    appendChart( { chartId: 'iopsChart', chartTileId: 'iopsTile', maxWidth: '300px;' },
+      { chartSeries: 'seriesData.iostat.iops', chartGroups: 'groupData.iostat',
+        chartTitle: 'IOPs', converter: 'psecConverter',
+        stack: 'on', orientation: 'horizontal', xAxisRender: 'on',
+        groupTooltip: 'on' });
+    appendChart( { chartId: 'mbpsChart', chartTileId: 'mbpsTile', maxWidth: '300px;' },
+      { chartSeries: 'seriesData.iostat.mbps', chartGroups: 'groupData.iostat',
+        chartTitle: 'MB/s', converter: 'mbpsConverter',
+        stack: 'on', orientation: 'horizontal', xAxisRender: 'off',
+        groupTooltip: 'on' });
+    appendChart( { chartId: 'awaitChart', chartTileId: 'awaitTile', maxWidth: '150px;' },
+      { chartSeries: 'seriesData.iostat.await', chartGroups: 'groupData.iostat',
+        chartTitle: 'Wait Time', converter: 'msConverter',
+        stack: 'on', orientation: 'horizontal', xAxisRender: 'off',
+        groupTooltip: 'on' });
+    appendChart( { chartId: 'utilChart', chartTileId: 'utilTile', maxWidth: '150px;' },
+      { chartSeries: 'seriesData.iostat.util', chartGroups: 'groupData.iostat',
+        chartTitle: '%Utilization', converter: 'pctConverter',
+        stack: 'on', orientation: 'horizontal', xAxisRender: 'off',
+        groupTooltip: 'on' });
+    // mpstat chart
+    appendChart( { chartId: 'mpstatChart', chartTileId: 'mpstatTile', maxWidth: '150px;' },
+      { chartSeries: 'seriesData.mpstat', chartGroups: 'groupData.mpstat',
+        chartTitle: 'CPU Utilization', converter: 'pctConverter',
+        stack: 'on', orientation: 'vertical', xAxisRender: 'off' });
+    // cell server charts
+    appendChart( { chartId: 'fcszChart', chartTileId: 'flashCacheSizeTile', maxWidth: '300px;' },
+      { chartSeries: 'seriesData.cellsrvstat.fcsz', chartGroups: 'groupData.cellsrvstat',
+        chartTitle: 'Flash Cache Size', converter: 'gbConverter',
+        stack: 'off', orientation: 'vertical', 
+        xAxisRender: 'off', yAxisRender: 'on' });
+    appendChart( { chartId: 'fcreadsChart', chartTileId: 'flashCacheReadsTile', maxWidth: '300px;' },
+      { chartSeries: 'seriesData.cellsrvstat.fcrrq', chartGroups: 'groupData.cellsrvstat',
+        chartTitle: 'Flash Cache Reads', converter: 'psecConverter',
+        stack: 'off', orientation: 'vertical', 
+        xAxisRender: 'off', yAxisRender: 'on' });
+    appendChart( { chartId: 'fcWritesChart', chartTileId: 'flashCacheWritesTile', maxWidth: '300px;' },
+      { chartSeries: 'seriesData.cellsrvstat.fcwrq', chartGroups: 'groupData.cellsrvstat',
+        chartTitle: 'Flash Cache Writes', converter: 'psecConverter',
+        stack: 'off', orientation: 'vertical', 
+        xAxisRender: 'off', yAxisRender: 'on' });
+    appendChart( { chartId: 'sioChart', chartTileId: 'smartIOTile', maxWidth: '300px;' },
+      { chartSeries: 'seriesData.cellsrvstat.sio', chartGroups: 'groupData.cellsrvstat',
+        chartTitle: 'Smart IO', converter: 'gbpsConverter',
+        stack: 'off', orientation: 'vertical', 
+        xAxisRender: 'off', yAxisRender: 'on' });
+
+    // add links
+    var linkId;
+    for (statType in chartModel.summary)
+    {
+      linkId = '#' + statType + 'Links';
+      for (var i = 0; i < chartModel.summary[statType].htmlFiles.length; i++)
+      {
+        if (chartModel.summary[statType].htmlFiles[i][1].indexOf("IOStat") !== -1 || statType !== "iostat")
+        {
+          var htmlString = '<a class="oj-link oj-text-sm" href="' + chartModel.summary[statType].htmlFiles[i][0] + '">' +
+                  chartModel.summary[statType].htmlFiles[i][1] + '</a>&nbsp;';
+
+          $(linkId).append(htmlString);
+        }
+      }
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    $("#alertsFindingsList").addClass("exalist");
+    $("#iostatFindingsList").addClass("exalist");
+    $("#cpuFindingsList").addClass("exalist");
+    $("#cellsrvstatFindingsList").addClass("exalist");
+    $("#iostatVariabilityList").addClass("exalist");
+    $("#mpstatVariabilityList").addClass("exalist");
+    $("#cellsrvstatVariabilityList").addClass("exalist");
+
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* CPU page, see cpu_template.html */
+exawchartPages["cpu"] =
+{
+  modules: [ "ojs/ojchart" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModelCPU = function()
+    {
+      var self = this;
+
+      //------------------------------------------------------------
+      // supporting functions
+
+      /* create formatters */
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:'percent', maximumFractionDigits: 2 });
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      /* custom tooltip so we displpay all series in the tooltip */
+      self.tooltipFunction = function(dataContext)
+      {
+        // retrieve original date prior to ISO conversion, strip tz
+        var origDate = oj.IntlConverterUtils.dateToLocalIso(new Date(dataContext.group)).substring(0,19);
+        // find index in xAxis, which should correspond to other series
+        var itemPosition = xAxis.indexOf(origDate);
+        var seriesArray = self.lineSeriesValue();
+        var tooltipString = "<b>" + self.dateTimeConverter.format(origDate) + "</b><br/>";
+        for (var i = 0; i < seriesArray.length; i++)
+        {
+          // JET tooltip currently does not support styling with colors
+          tooltipString += "<b>" + seriesArray[i].name + "</b>: ";
+          tooltipString += self.pctConverter.format(seriesArray[i].items[itemPosition]) + "<br/>";
+        }
+        return tooltipString;
+      }
+
+      //------------------------------------------------------------
+      /* x-axis is datetime */
+      var xAxis = page.xAxis;
+
+      /* chart data */
+      var lineSeries = exawchartDecodeSeries(page.series);
+
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+      this.lineSeriesValue = ko.observableArray(lineSeries);
+      this.lineGroupsValue = ko.observableArray(xAxisDates);
+
+      //------------------------------------------------------------
+      // metadata - does not change no need for observable
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    // create chart model
+    var chartModel = new ChartModelCPU()
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* IOStat summary page, see iosummary_template.html */
+exawchartPages["iosummary"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojslider" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+
+      // we use these converters in the tooltips as well for consistent
+      // display
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+
+      self.psecConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##/s", useGrouping: true, maximumFractionDigits: 2 });
+
+      self.mbpsConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##MB/s", useGrouping: true, maximumFractionDigits: 2 } );
+
+      self.usConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##us", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      // scale to us as required
+      self.msConverter = {
+        format : function(value)
+        {
+          var valueString;
+          var converter;
+          if (value < 1)
+            valueString = self.usConverter.format(value*1000);
+          else
+          {
+            converter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##ms", useGrouping: true, minimumFractionDigits: 2,  maximumFractionDigits: 2 });
+            valueString = converter.format(value);
+          }
+          return valueString;
+        }
+      }
+
+      // create custom tooltip so we display all series values
+      self.tooltipFunction = function(dataContext)
+      {
+        // retrieve original date as an ISO string, strip tz
+        var origDate = oj.IntlConverterUtils.dateToLocalIso(new Date(dataContext.group)).substring(0,19);
+        // find index in xAxis, which should correspond to other series
+        // note, we cannot look for it in xAxisDates/lineGroupsValue
+        // as dates are objects, and two objects are never equal
+        var itemPosition = xAxis.indexOf(origDate);
+
+        // determine chart that is being processed
+        var seriesArray;
+        var converter;
+        var chartId = $(dataContext.component()).attr('id');
+        // get information from map
+        var chartMap = map[chartId];
+        if (chartMap != null)
+        {
+          var chartStat = chartMap.stat;
+          var chartDiskType = chartMap.dtype;
+          seriesArray = self.seriesValues[chartDiskType][chartStat]();
+          switch (chartStat)
+          {
+            case "iops":
+              converter = self.psecConverter;
+              break;
+            case "mbps":
+              converter = self.mbpsConverter;
+              break;
+            case "svctm": 
+              converter = self.msConverter;
+              break;
+            case "util": 
+              converter = self.pctConverter;
+              break;
+            default:
+              converter = new oj.IntlNumberConverter();
+              break;
+          }
+        }
+        // start building the tooltip
+        var tooltipString = "<b>" + self.dateTimeConverter.format(origDate) + "</b><br/>";
+        if (seriesArray != null)
+        {
+          for (var i = 0; i < seriesArray.length; i++)
+          {
+            var value = seriesArray[i].items[itemPosition];
+            tooltipString += "<b>" + seriesArray[i].name + "</b>: ";
+            tooltipString += converter.format(value) + "<br/>";
+          }
+        }
+        else
+        {
+          tooltipString += "<b>" + dataContext.series + "</b>: ";
+          tooltipString += converter.format(dataContext.value);
+        }
+        return tooltipString;
+      }
+
+      //------------------------------------------------------------
+      var MAX_CAPACITY_THRESHOLD = 0.80; // threshold to display max line
+
+      var xAxis = page.xAxis;
+      var data = exawchartDecodeSeries(page.series);
+      var maxCapacity = page.capacity;
+      self.diskTypes = page.diskTypes;
+
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+
+      // and start binding            
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+
+      self.seriesValues = {}
+      self.lineXAxis = {};
+      self.referenceObjects = {} ;
+      self.hasDiskType = { "flash": false, "disk": false };
+      var converter;
+      for (var dtype in data)
+      {
+        self.seriesValues[dtype] = {}
+        self.lineXAxis[dtype] = {}
+        self.referenceObjects[dtype] = {}
+        for (var stat in data[dtype])
+        {
+          // if any stat has items, we have that disktype
+          if (data[dtype][stat][0].items.length > 0)
+            self.hasDiskType[dtype] = true;
+          self.seriesValues[dtype][stat] = ko.observableArray(data[dtype][stat]);
+          // create xAxis view port as well
+          self.lineXAxis[dtype][stat] = ko.observable( 
+            {viewportMin: xAxisDates[0],
+             viewportMax: xAxisDates[xAxisDates.length-1]});
+          // check if we need to create reference object
+          if (maxCapacity != null && maxCapacity.hasOwnProperty(dtype) && maxCapacity[dtype].hasOwnProperty(stat))
+          {
+            // retrieve series for iops/mbps
+            var seriesItem = $.grep(data[dtype][stat],
+              function(e) { return e.id == stat })[0];
+            // only create reference object if max datapoint is
+            // over MAX_CAPACITY_THRESHOLD
+            if (Math.max.apply(Math, seriesItem.items) <= maxCapacity[dtype][stat]*MAX_CAPACITY_THRESHOLD)
+              continue;
+            if (stat === "iops")
+              converter = self.psecConverter;
+            else if (stat === "mbps")
+              converter = self.mbpsConverter;
+            else
+              converter = new oj.IntlNumberConverter();
+            self.referenceObjects[dtype][stat] = [ {
+              text: 'Maximum', type: 'line',
+              value: maxCapacity[dtype][stat],
+              color: '#FF0000', displayInLegend: 'off',
+              location: 'back', lineStyle: 'dotted',
+              shortDesc: 'Maximum: ' + converter.format(maxCapacity[dtype][stat]) } ];
+          }
+        }
+
+      }
+
+      //------------------------------------------------------------
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+    }
+
+    //------------------------------------------------------------
+    var updateXAxis = function(event, ui) 
+    {
+       // get stat/dtype matching the target.id
+      var target_stat = map[event.target.id].stat;
+      var target_dtype = map[event.target.id].dtype;
+      for (var dtype in chartModel.lineXAxis)
+        for (var stat in chartModel.lineXAxis[dtype])
+        {
+          if (stat !== target_stat || dtype !== target_dtype)
+          {
+            chartModel.lineXAxis[dtype][stat](
+              {viewportMin: ui["xMin"],
+               viewportMax: ui["xMax"]});
+          }
+        }
+    }
+
+    //------------------------------------------------------------
+    // function to dynamically append chart to HTML
+    // we do this dynamically so it does not leave large gaps when
+    // run on EF or compute nodes
+    var appendChart = function(chartId,dtype, stat)
+    {
+      // determine converter based on type of stat
+      var converter;
+      var chartTitle = (dtype == "flash" ? "Flash" : "Hard Disk");
+      switch (stat)
+      {
+        case "iops": converter = "psecConverter";
+                     chartTitle += " IOPs";
+                     break;
+        case "mbps": converter = "mbpsConverter";
+                     chartTitle += " MB/s";
+                     break;
+        case "svctm": converter = "msConverter";
+                      chartTitle += " Service Time";
+                      break;
+        case "util": converter = "pctConverter";
+                     chartTitle += " Utiization";
+                     break;
+      }
+      // check for reference object
+      var refObject = ( chartModel.referenceObjects.hasOwnProperty(dtype) && chartModel.referenceObjects[dtype].hasOwnProperty(stat) ?
+    'referenceObjects: referenceObjects.' + dtype + '.' + stat :
+    '');
+      // string for ojComponent binding
+      var chartType = (stat == "svctm" ? "lineWithArea" : "line"); 
+      var chartSeries = dtype + '.' + stat;
+      var ojComponent = "component: 'ojChart', "      + 
+                        "type: '" + chartType + "', " + 
+                        "series: seriesValues." + chartSeries + ", " +
+                        "groups: lineGroupsValue, "    +
+                        "animationOnDisplay: 'auto', " +
+                        "animationOnDataChange: 'auto', " +
+                        "orientation: 'vertical', " +
+                        "hoverBehavior: 'dim', " +
+                        "selectionMode: 'single', " +
+                        "timeAxisType: 'enabled', " +
+                        "title: { text: '" + chartTitle + "' }, " +
+                        "xAxis: lineXAxis." + chartSeries + ", " +
+                        "yAxis: { tickLabel: { scaling: 'none', " +
+                        " converter: " + converter + "}, " + 
+                        refObject + " }, " +
+                        "tooltip: tooltipFunction," +
+                        "zoomAndScroll: 'live', " +
+                        "overview: { rendered: 'on', height: '70px' }," +
+                        "emptyText: ' ' ";
+      // create div for the chart
+      var div_chart = document.createElement("div");
+      $(div_chart).attr( { id: chartId,
+                           class: "exachart" } );
+      $(div_chart).attr('data-bind',
+                        "ojComponent: { " + ojComponent + "}");
+
+      // append to stat row
+      var rowId = stat + "Row";
+      var colId = dtype + stat + "Col";
+      $("#" + rowId).append('<div id="' + colId + '" class="oj-flex-item"/>');
+      $("#" + colId).append(div_chart);
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model 
+    var chartModel = new ChartModel();
+
+    // dynamically add charts and create a map
+    var map = {};
+    for (var i = 0; i < chartModel.diskTypes.length; i++)
+    {
+      var dtype = chartModel.diskTypes[i];
+      for (var stat in chartModel.seriesValues[dtype])
+      {
+        var chartId = dtype + stat + "Chart";
+        map[chartId] = { "stat": stat, "dtype": dtype };
+        // add charts to HTML
+       appendChart(chartId,dtype,stat)
+      }
+    }
+
+    // add listeners for axis changes
+    for (var chart in map)
+    {
+      var htmlId = "#"+chart;
+      $(htmlId).on({"ojviewportchangeinput": updateXAxis,
+                    "ojviewportchange": updateXAxis});
+    }
+
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* IOStat detail page, see iodetail_template.html */
+exawchartPages["iodetail"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojselectcombobox" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+
+      // we use these converters in the tooltips as well for consistent
+      // display
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+
+      self.psecConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##/s", useGrouping: true, maximumFractionDigits: 2 });
+
+      self.mbpsConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##MB/s", useGrouping: true, maximumFractionDigits: 2 } );
+
+      self.usConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##us", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      // scale to us as required
+      self.msConverter = {
+        format : function(value)
+        {
+          var valueString;
+          var converter;
+          if (value < 1)
+            valueString = self.usConverter.format(value*1000);
+          else
+          {
+            converter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##ms", useGrouping: true, minimumFractionDigits: 2,  maximumFractionDigits: 2 });
+            valueString = converter.format(value);
+          }
+          return valueString;
+        }
+      }
+
+      // common private functions
+      var getConverter = function(statType)
+      {
+        var converter;
+        switch (statType)
+        {
+          case "iops": 
+            converter = self.psecConverter;
+            break;
+          case "mbps": 
+            converter = self.mbpsConverter;
+            break;
+          case "svctm": 
+          case "await":
+            converter = self.msConverter;
+            break;
+          case "util": 
+            converter = self.pctConverter;
+            break;
+          default:
+            converter = new oj.IntlNumberConverter;
+            break;
+        }
+        return converter;
+      }
+
+      // exposed helper functions
+      self.getSeriesItem = function(dtype, stat, disk_id)
+      {
+        if (disk_id == "all")
+          return data[dtype][stat];
+        else
+          return data[dtype][stat].filter(function(obj) { return obj.id == disk_id; });
+      }
+
+
+      // create custom tooltip so we display all series values
+      self.tooltipFunction = function(dataContext)
+      {
+        // retrieve original date prior to ISO conversion, strip tz
+        var origDate = oj.IntlConverterUtils.dateToLocalIso(new Date(dataContext.group)).substring(0,19);
+        // find index in xAxis, which should correspond to other series
+        // note, we cannot look for it in xAxisDates/lineGroupsValue
+        // as dates are objects, and two objects are never equal
+        var itemPosition = xAxis.indexOf(origDate);
+
+        // determine chart that is being processed
+        var seriesArray = null;
+        var refArray = null;
+        var converter;
+        var chartId = $(dataContext.component()).attr('id');
+        // note: chartId has to match html
+        var chartMap = map[chartId]
+        if (chartMap != null)
+        {
+          var chartStat = chartMap.stat;
+          var chartDiskType = chartMap.dtype;
+          seriesArray = self.seriesValues[chartDiskType][chartStat]();
+          refArray = self.yAxisData[chartDiskType][chartStat]().referenceObjects[0].items;
+          converter = getConverter(chartStat);                
+        }
+        // start building the tooltip
+        var tooltipString = "<b>" + self.dateTimeConverter.format(origDate) + "</b><br/>";
+        // determine what to display based on series
+        tooltipString += "<b>" + dataContext.series + "</b>: ";
+        tooltipString += converter.format(dataContext.value);
+        if (dataContext.series == "avg")
+        {
+          // find reference object
+          var refItem =
+    self.yAxisData[chartDiskType][chartStat]().referenceObjects[0].items[itemPosition];
+          if (refItem != null)
+          {
+            tooltipString += "<br/>";
+            tooltipString += "<b>low</b>: " + converter.format(refItem.low) + "<br/>";
+            tooltipString += "<b>high</b>: " + converter.format(refItem.high);
+          }              
+        }
+        return tooltipString;
+      }
+
+      //------------------------------------------------------------
+      var MAX_CAPACITY_THRESHOLD = 0.80; // threshold to display max line            
+      var xAxis = page.xAxis;
+
+      var data = exawchartDecodeSeries(page.series);
+
+      // disks whose series items are in a separate file, these
+      // are loaded when the disk is first selected
+      var deviceChunks = page.deviceChunks;
+
+      // call callback once the series items of the disk are loaded
+      self.loadDevice = function(dtype, disk, callback)
+      {
+        if (deviceChunks[dtype] == null || deviceChunks[dtype][disk] == null)
+        {
+          callback();
+          return;
+        }
+        exawchartLoadChunk(deviceChunks[dtype][disk],
+          function(deviceData)
+          {
+            for (var stat in deviceData)
+            {
+              var seriesItems = self.getSeriesItem(dtype, stat, disk);
+              if (seriesItems.length > 0)
+                seriesItems[0].items = deviceData[stat];
+            }
+            delete deviceChunks[dtype][disk];
+            callback();
+          });
+      }
+
+      var refObjectItems = exawchartDecodeSeries(page.seriesLoHi);
+
+      var selector = page.diskSelector;
+
+      self.diskTypes = page.diskTypes;
+
+      var maxCapacity = page.capacity;
+
+      // create reference objects for the charts
+      // this is bound to yAxis, so we need the other info
+      var yAxisItems = { 
+        flash: { iops: { tickLabel: { scaling: "none",
+                                      converter: self.psecConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             displayInLegend: "off",
+                             items: refObjectItems.flash.iops } ] },
+                 mbps: { tickLabel: { scaling: "none",
+                                      converter: self.mbpsConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.flash.mbps } ] },
+                 svctm: { tickLabel: { scaling: "none",
+                                      converter: self.msConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.flash.svctm } ] },
+                 await: { tickLabel: { scaling: "none",
+                                      converter: self.msConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.flash.await } ] },
+                 util: { tickLabel: { scaling: "none",
+                                      converter: self.pctConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.flash.util } ] } },
+        disk: { iops: { tickLabel: { scaling: "none",
+                                      converter: self.psecConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.disk.iops } ] },
+                 mbps: { tickLabel: { scaling: "none",
+                                      converter: self.mbpsConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.disk.mbps } ] },
+                 svctm: { tickLabel: { scaling: "none",
+                                      converter: self.msConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.disk.svctm } ] },
+                 await: { tickLabel: { scaling: "none",
+                                      converter: self.msConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.disk.await } ] },
+                 util: { tickLabel: { scaling: "none",
+                                      converter: self.pctConverter },
+                         referenceObjects: [
+                           { type: "area", color: "rgba(0,0,255,0.1)",
+                             location: "back",
+                             items: refObjectItems.disk.util } ] } } }
+
+      //------------------------------------------------------------
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+
+      //------------------------------------------------------------
+      // change data for 'avg' series to include shortDesc with date
+      // and low/high
+      var seriesItemArray;
+      for (var dtype in data)
+      {
+        for (var stat in data[dtype])
+        {
+          // get series 'avg'
+          seriesItemArray = self.getSeriesItem(dtype, stat, "avg");
+          if (seriesItemArray != null && seriesItemArray.length > 0)
+          {
+            var seriesItem = seriesItemArray[0];
+            // get converter based on stat type
+            var converter = getConverter(stat);
+            // reset items array
+            // note we only overwrite the item elements, we do not
+            // change the actual length of the array
+            for (var i=0; i < seriesItem.items.length; i++)
+            {
+              // get date
+              var value = seriesItem.items[i];
+              // get corresponding refobject item
+              var refItem = refObjectItems[dtype][stat][i];
+              // only add shortDesc if we actually had a refItem
+              if (refItem != null)
+              {
+                seriesItem.items[i] = { "value" : value,
+                  shortDesc: "Date: " +
+                    self.dateTimeConverter.format(xAxis[i]) + " " +
+                    "average: " + converter.format(value) + " " +
+                    "low: " + converter.format(refItem.low) + " " +
+                    "high: " + converter.format(refItem.high) };
+              }
+            }
+          }
+        }
+      }
+
+      //------------------------------------------------------------
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+
+      self.seriesValues = {}
+      self.lineXAxis = {}
+      self.yAxisData = {}
+      for (var dtype in data)
+      {
+        self.seriesValues[dtype] = {}
+        self.lineXAxis[dtype] = {}
+        self.yAxisData[dtype] = {}
+        for (var stat in data[dtype])
+        {
+          // create new arrays for seriesValues since we add/remove
+          // based on selector
+          self.seriesValues[dtype][stat] =  
+            ko.observableArray(self.getSeriesItem(dtype,stat,"avg"));
+
+          self.yAxisData[dtype][stat] = ko.observable(yAxisItems[dtype][stat]);
+          // create xAxis view port as well
+          self.lineXAxis[dtype][stat] = ko.observable( 
+            {viewportMin: xAxisDates[0],
+             viewportMax: xAxisDates[xAxisDates.length-1]});
+          // determine if we need to add max capacity line to reference
+          // yAxisItems[dtype][stat].referenceObjects array
+          if (maxCapacity != null && maxCapacity.hasOwnProperty(dtype) && maxCapacity[dtype].hasOwnProperty(stat))
+          {
+            // retrieve average series
+            var seriesItem = $.grep(data[dtype][stat],
+              function(e) { return e.id == "avg" })[0];  
+            //console.log('max: ' + Math.max.apply(Math, seriesItem.items));
+            if (Math.max.apply(Math, seriesItem.items) < maxCapacity[dtype][stat]*MAX_CAPACITY_THRESHOLD)
+              continue;
+            if (stat === "iops")
+              converter = self.psecConverter;
+            else if (stat === "mbps")
+              converter = self.mbpsConverter;
+            else
+              converter = new oj.IntlNumberConverter();
+            yAxisItems[dtype][stat].referenceObjects.push (
+              { text: 'Maximum', type: 'line',
+                value: maxCapacity[dtype][stat],
+                color: '#FF0000', displayInLegend: 'off',
+                location: 'back', lineStype: 'dotted',
+                shortDesc: 'Maximum: ' + converter.format(maxCapacity[dtype][stat]) }  );
+          }
+        }
+      }  
+
+      self.flashDiskList = selector.flash;
+      self.hardDiskList = selector.disk;            
+
+      // initialize this list based on selected seriesValues
+      self.initFlashList = ko.observableArray([]);
+      self.initHardDiskList = ko.observableArray([]);
+      for (var i=0; i < self.seriesValues.flash.iops().length; i++)
+        self.initFlashList.push(self.seriesValues.flash.iops()[i].id);
+
+      for (var i=0; i < self.seriesValues.disk.iops().length; i++)
+        self.initHardDiskList.push(self.seriesValues.disk.iops()[i].id);
+
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+    }
+
+    var arrayDiff = function(a1,a2)
+    {
+      if (typeof(a1) === "object" && typeof(a2) === "object")
+        // return a1.filter(function(i) { return a2.indexOf(i) < 0; });
+        return a1.concat(a2).filter(function(val, index, arr) {
+          return arr.indexOf(val) === arr.lastIndexOf(val);
+        });
+      else
+        return null;
+    }
+
+    //------------------------------------------------------------
+    var updateXAxis = function(event, ui) 
+    {
+       // get stat/dtype matching the target.id
+      var target_stat = map[event.target.id].stat;
+      var target_dtype = map[event.target.id].dtype;
+      for (var dtype in chartModel.lineXAxis)
+        for (var stat in chartModel.lineXAxis[dtype])
+        {
+          if (stat !== target_stat || dtype !== target_dtype)
+          {
+            chartModel.lineXAxis[dtype][stat](
+              {viewportMin: ui["xMin"],
+               viewportMax: ui["xMax"]});
+          }
+        }
+    }
+
+    //------------------------------------------------------------
+    // note we can use associated views, but it seems to be very 
+    // slow; and we also want 'All' option
+    var addDiskSeries = function(selectId, dtype, stat, disk)
+    {
+      return function()
+      {
+        // the disk may have been deselected while loading
+        if ($("#" + selectId).ojSelect("option","value").indexOf(disk) < 0)
+          return;
+        if (chartModel.seriesValues[dtype][stat]().filter(function(item) { return item.id == disk; }).length > 0)
+          return;
+        chartModel.seriesValues[dtype][stat].push(chartModel.getSeriesItem(dtype,stat,disk)[0]);
+      };
+    }
+
+    var updateDiskSeries = function(event, data)
+    {
+      var chartList;
+      var allSelected;
+      var removeAll;
+      if (event == null)
+        return;
+      if (event.target.id == "f_select")
+         chartList = [ "flashiopsChart", "flashmbpsChart", "flashsvctmChart", "flashawaitChart", "flashutilChart" ];
+      else if (event.target.id == "hd_select")
+         chartList = [ "diskiopsChart", "diskmbpsChart", "disksvctmChart", "diskawaitChart", "diskutilChart" ]; 
+
+      // add or remove?
+      var toAdd = false;
+      var diskSeries = arrayDiff(data.value, data.previousValue);
+
+      if (diskSeries != null)
+      {         
+        if (data.value.length > data.previousValue.length)
+          toAdd = true;
+        for (var chart=0; chart < chartList.length; chart++)
+        {
+          var stat = map[chartList[chart]].stat;
+          var dtype = map[chartList[chart]].dtype;
+          // normally length 1 we only select/deselect one at a time
+          for (var i = 0; i < diskSeries.length; i++)
+          {
+            var disk = diskSeries[i];
+            if (disk !== "all" && toAdd)
+            {
+              chartModel.loadDevice(dtype, disk,
+                addDiskSeries(event.target.id, dtype, stat, disk));
+            }
+            else if (disk !== "all" && !toAdd)
+            {
+              chartModel.seriesValues[dtype][stat].remove(function(item) { return item.id == disk; });
+            }
+            else if (disk === "all" && toAdd)
+            {
+              var seriesItems = chartModel.getSeriesItem(dtype,stat,disk);
+              // modifying options and firing the event handles
+              // the series
+              var options = [ "all" ]
+              for (var i = 0; i < seriesItems.length; i++) 
+              {
+                options.push(seriesItems[i].id);
+              }
+              $("#" + event.target.id).ojSelect("option","value",options.sort());
+            }
+            else if (disk === "all" && !toAdd)
+            {
+              // and reset selector to avg - only do this once
+              $("#" +event.target.id).ojSelect("option","value",["avg"]);
+            }
+          }
+        }
+        // fire an event to resize content if needed
+        $("#header").trigger('heightChange');
+      }
+
+    }
+
+    //------------------------------------------------------------
+    // append charts
+    var appendChart = function(chartId, dtype, stat)
+    {
+      // determine converter based on stat
+      var converter;
+      var chartTitle = (dtype == "flash" ? "Flash" : "Hard Disk");
+      switch (stat)
+      {
+        case "iops": converter = "psecConverter";
+                     chartTitle += " IOPs";
+                     break;
+        case "mbps": converter = "mbpsConverter";
+                     chartTitle += " MB/s";
+                     break;
+        case "svctm": converter = "msConverter";
+                      chartTitle += " Service Time";
+                      break;
+        case "await": converter = "msConverter";
+                      chartTitle += " Wait Time";
+                      break;
+        case "util": converter = "pctConverter";
+                     chartTitle += " Utiization";
+                     break;
+      }
+
+      var chartSeries = dtype + "." + stat;
+      var ojComponent = "component: 'ojChart', "      + 
+                        "type: 'line', "              +
+                        "series: seriesValues." + chartSeries + ", " +
+                        "groups: lineGroupsValue, "    +
+                        "animationOnDisplay: 'auto', " +
+                        "animationOnDataChange: 'auto', " +
+                        "orientation: 'vertical', " +
+                        "hoverBehavior: 'dim', " +
+                        "selectionMode: 'single', " +
+                        "timeAxisType: 'enabled', " +
+                        "title: { text: '" + chartTitle + "' }, " +
+                        "xAxis: lineXAxis." + chartSeries + ", " +
+                        "yAxis: yAxisData." + chartSeries + ", " +
+                        "tooltip: tooltipFunction," +
+                        "zoomAndScroll: 'live', " +
+                        "overview: { rendered: 'on', height: '70px' }," +
+                        "emptyText: ' ' ";
+
+      // create div for the chart
+      var div_chart = document.createElement("div");
+      $(div_chart).attr( { id: chartId,
+                           class: "exachart" } );
+      $(div_chart).attr('data-bind',
+                        "ojComponent: { " + ojComponent + " } ");
+
+      // append to stat row
+      var rowId = stat + "Row";
+      var colId = dtype + stat + "Col";
+      $("#" + rowId).append('<div id="' + colId + '" class="oj-flex-item"/>');
+      $("#" + colId).append(div_chart);
+    }
+
+    // append selectors 
+    var appendSelectors = function(formId, selectorId, list, initList, label)
+    {
+
+      var ojComponent = "component: 'ojSelect', "  +
+                        "multiple: true, " +
+                        "options: " + list + ", " +
+                        "value: " + initList + ", " +
+                        "rootAttributes: { style: 'width:100%' }";
+      // create form
+      var form = document.createElement("form");
+      $(form).attr( { id: formId, class: "oj-text-sm" } );
+      $(form).append('<label for="' + selectorId + '">' + label + '</label>');
+      $(form).append('<input id="' + selectorId + '" ' +
+       'data-bind="ojComponent: { ' + ojComponent + ' }"/>');
+
+      // create div
+      var selector = document.createElement("div");
+      $(selector).attr("class","oj-flex-item");
+      $(selector).append(form);
+
+      // append 
+      $("#diskSelector").append(selector);
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model 
+    var chartModel = new ChartModel();
+
+    // dynamically add charts and create map
+    var map = {}
+    for (var i = 0; i < chartModel.diskTypes.length; i++)
+    {
+      var dtype = chartModel.diskTypes[i];
+      // only add selector if we have the disk type
+      if (dtype == "flash")
+        appendSelectors("flashdisks",
+    "f_select","flashDiskList","initFlashList","Show Flash Device");
+
+      if (dtype == "disk")
+        appendSelectors("harddisks",
+    "hd_select","hardDiskList","initHardDiskList", "Show Hard Disk");
+
+        for (var stat in chartModel.seriesValues[dtype])
+        {
+          var chartId = dtype + stat + "Chart";
+          map[chartId] = { "stat" : stat, "dtype": dtype };
+          appendChart(chartId, dtype, stat);
+        }
+    }
+
+    //------------------------------------------------------------
+    // listeners
+    $("#f_select").on({"ojoptionchange": updateDiskSeries});
+    $("#hd_select").on({"ojoptionchange": updateDiskSeries});
+
+    // add listeners for axis changes
+    for (var chart in map)
+    {
+      var htmlId = "#"+chart;
+      $(htmlId).on({"ojviewportchangeinput": updateXAxis,
+                    "ojviewportchange": updateXAxis});
+    }
+
+    // add listeners to adjustContentPadding if top bar or window size
+    // changes
+    $(window).on("resize.exawchart", adjustContentPadding);
+    $("#header").on('heightChange',adjustContentPadding);
+
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* MPStat page, see mpstat_template.html */
+exawchartPages["mpstat"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojselectcombobox" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModelCPU = function()
+    {
+      var self = this;
+
+      //------------------------------------------------------------
+      // supporting functions
+      /* create formatters */
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:'percent', maximumFractionDigits: 2 });
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      self.tooltipFunction = function(dataContext)
+      {
+        // retrieve original date
+          var origDate = oj.IntlConverterUtils.dateToLocalIso(new Date(dataContext.group)).substring(0,19);
+          // find index in xAxis
+          var itemPosition = xAxis.indexOf(origDate);
+          var seriesArray = self.lineSeriesValue();
+          var tooltipString = "<b>" + self.dateTimeConverter.format(origDate) + "</b><br/>";
+          for (var i = 0; i < seriesArray.length; i++)
+          {
+            tooltipString += "<b>" + seriesArray[i].name + "</b>: ";
+            tooltipString += self.pctConverter.format(seriesArray[i].items[itemPosition]) + "<br/>";
+          }
+        return tooltipString;
+      }
+
+
+      self.tooltipCpuIdFunction = function(dataContext)
+      {
+
+        tooltipString = "<b>CPU#</b>: " + dataContext.group + "<br/>";
+        tooltipString += "<b>" + dataContext.seriesData.name + '</b>: ' + self.pctConverter.format(dataContext.value) + '<br/>';
+        // also get %busy
+        var cpuIdPosition = self.cpuIdsXAxis().indexOf(dataContext.group);
+        var seriesArray = self.cpuIdsValue();
+        var idle = seriesArray.filter(function(obj) {
+          return obj.id == 'idl';
+          })[0].items[cpuIdPosition];
+        tooltipString += '<b>%busy</b>: ' + self.pctConverter.format(1 - idle);
+        return tooltipString;
+      }
+
+      //------------------------------------------------------------
+      self.getSeries = function(cpuId)
+      {
+        var seriesItem = null;
+        if (series.hasOwnProperty(cpuId))
+          seriesItem = series[cpuId];
+        return seriesItem;
+      }
+
+
+      //------------------------------------------------------------
+      // data for first chart - utilization 
+      var xAxis = page.xAxis;
+      var series = exawchartDecodeSeries(page.series);
+      var cpuList = page.cpuList;
+      // FIXME: see how we can set dynamically ...
+//       for (var i = 0 ; i < cpuList.length; i++)
+//       {
+//         if (cpuList[i].hasOwnProperty("type"))
+//         {
+//           if (cpuList[i]['type'] === "alert")
+//             cpuList[i]['img'] = 'https://cdn.rawgit.com/oracle/oraclejet/2.0.0/dist/css/alta/images/stat_error_16.png';
+//           else if (cpuList[i]['type'] == "warning")
+//             cpuList[i]['img'] = 'https://cdn.rawgit.com/oracle/oraclejet/2.0.0/dist/css/alta/images/stat_warn_16.png'; 
+//         }
+//       }
+
+      //------------------------------------------------------------
+      // data for second chart - average cpu by cpu id
+      var cpuIds = page.cpuIds;
+      var cpuIdsSeries = exawchartDecodeSeries(page.cpuSeries);
+
+      // convert xAxis to dates 
+      var xAxisDates = [];
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+
+      // set selectors
+      self.selectList = ko.observableArray(cpuList);
+      self.initValue = ko.observable('all'); // first selection is all
+
+      // 
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+      // create new array so we do not manipulate series data
+      self.lineSeriesValue = ko.observableArray([]);
+      for (var i = 0; i < series[self.initValue()].length; i++)
+        self.lineSeriesValue.push(series[self.initValue()][i]);
+
+      self.cpuIdsXAxis = ko.observableArray(cpuIds);
+      self.cpuIdsValue = ko.observableArray(cpuIdsSeries);
+
+      //------------------------------------------------------------
+      // metadata - does not change no need for observable
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+    }
+
+
+    var addSelector = function()
+    {
+      var ojComponent = "component: 'ojCombobox', " +
+                        "list: 'cpus', "            +
+                        "value: initValue, "        +
+                        "rootAttributes: { style: 'width: 100%' }";
+      // create form
+      var form = document.createElement("form");
+      $(form).attr( { id: "cpu_form" } );
+      $(form).append('<label for="cpucombobox">CPU</label>');
+      $(form).append('<input id="cpucombobox" ' +
+       ' data-bind="ojComponent: { ' + ojComponent + ' } "/>');
+
+      // create list
+      var ul = document.createElement("ul");
+      $(ul).attr( { id: "cpus", style: "display:none" } );
+      // create list of elements
+      var item;
+      for (var i = 0; i < chartModel.selectList().length; i++)
+      {
+        // console.log('creating list ...' + i);
+        item = chartModel.selectList()[i];
+        var li = document.createElement("li");
+        $(li).attr( { 'oj-data-value': item.value });
+        // check if we need to add an img
+        if (item.hasOwnProperty('type') )
+        {
+          var img = document.createElement("img");
+          $(img).attr( { role: "image", alt: item.type, style:"vertical-align:middle" } );
+          if (item.type === "alert")
+            $(img).attr( { src: "https://cdn.rawgit.com/oracle/oraclejet/2.0.0/dist/css/alta/images/stat_error_16.png" } );
+          else if (item.type === "warning")
+            $(img).attr( { src: "https://cdn.rawgit.com/oracle/oraclejet/2.0.0/dist/css/alta/images/stat_warn_16.png" } );
+           // append image to li
+           $(li).append(img);
+        }
+        var txt = document.createTextNode(item.label);
+        $(li).append(txt);
+        // append to ul
+        $(ul).append(li)
+      }
+
+      // append to form
+      $(form).append(ul);
+      $("#cpu_selector").append(form);
+    }
+
+    var valueChangeHandler = function(event, data)
+    {
+      // new selection is data.value
+      // previous one is data.prevousValue
+      if (data.option == "value")
+      {
+        var newSeries = chartModel.getSeries(data.value);
+        // delay notification
+        chartModel.lineSeriesValue.extend( { rateLimit: 50, method: "notifyWhenChangeStop" } );
+        if (newSeries != null && data.Value != data.previousValue)
+        {
+          chartModel.lineSeriesValue.removeAll();
+          for (var i = 0; i < newSeries.length; i++)
+            chartModel.lineSeriesValue.push(newSeries[i]);
+
+        }
+      }
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create chart model
+    var chartModel = new ChartModelCPU()
+
+    // only add selectors if we have outlier cpus
+    if (chartModel.selectList().length > 1)
+    {
+      addSelector();
+      // set listeners
+      $("#cpucombobox").on({"ojoptionchange": valueChangeHandler});
+    }
+
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* CellSrvStat page, see cellsrv_template.html */
+exawchartPages["cellsrv"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojselectcombobox" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+
+      // we use these converters in the tooltips as well for consistent
+      // display
+      self.numberConverter = oj.Validation.converterFactory("number").createConverter( {useGrouping: true, maximumFractionDigits: 2 } );
+
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+
+      self.psecConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##/s", useGrouping: true, maximumFractionDigits: 2 });
+
+      self.mbpsConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##MB/s", useGrouping: true, maximumFractionDigits: 2 } );
+
+      self.msConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##ms", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.usConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##us", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      self.gbConverter = oj.Validation.converterFactory("number").createConverter( {pattern: "##,###,###.##GB", useGrouping: true, minimumFractionDigits: 2 });
+
+      // scale down as required
+      self.gbpsConverter = {
+        format : function(value)
+        {
+          var valueString;
+          var converter;
+          if (value < 0.1)
+            valueString = self.mbpsConverter.format(value*1024);
+          else
+          {
+            converter = oj.Validation.converterFactory("number").createConverter( { pattern: '#,###,###.##GB/s', useGrouping: true, maximumFractionDigits: 2 } );
+            valueString = converter.format(value);
+          }
+          return valueString;                
+        }
+      };
+
+      // create tooltip function
+      self.tooltipFunction = function(dataContext)
+      {
+        // retrieve date prior to ISO conversion
+        var origDate = oj.IntlConverterUtils.dateToLocalIso(new Date(dataContext.group)).substring(0,19);
+        // find index in xAxis, which should correspond to other series
+        var itemPosition = xAxis.indexOf(origDate);
+
+        // determine chart being processed
+        var converter;
+        // chartId is equivalent to key based on how we create charts
+        var chartId = $(dataContext.component()).attr('id');
+        // get converter
+        switch (self.chartMetadata[chartId].dispunit)
+        {
+          case "/s":   converter = self.psecConverter;
+                       break;
+          case "GB/s": converter = self.gbpsConverter;
+                       break;
+          case "GB":   converter = self.gbConverter;
+                       break;
+          case "MB/s": converter = self.mbpsConverter;
+                       break;
+          case "MB":   converter = self.mbConverter;
+                       break;
+          case "ms":   converter = self.msConverter;
+                       break;
+          case "%":   converter = self.pctConverter;
+                       break;
+          default:     converter = self.numberConverter;
+                       break;
+        }
+        // start building the tooltip
+        var seriesArray = self.seriesValues[chartId]();
+        var tooltipString = "<b>" + self.dateTimeConverter.format(origDate) + "</b><br/>";
+        for (var i = 0; i < seriesArray.length; i++)
+        {
+          tooltipString += "<b>" + seriesArray[i].name + "</b>: ";
+          tooltipString += converter.format(seriesArray[i].items[itemPosition]) + "<br/>";
+        }
+        return tooltipString;
+      }
+
+      var xAxis = page.xAxis;
+      var data = exawchartDecodeSeries(page.seriesData);
+      self.chartMetadata = page.chartMetadata;
+      self.chartOrder = page.chartOrder;
+      self.reportContext = page.reportContext;
+      //------------------------------------------------------------
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+
+      self.seriesValues = {}
+      self.lineXAxis = {}
+      self.hideAndShow = {}
+      for (var key in data)
+      {
+        self.seriesValues[key] = ko.observableArray(data[key]);
+        // create xAxis view port as well
+        self.lineXAxis[key] = ko.observable( 
+          {viewportMin: xAxisDates[0],
+           viewportMax: xAxisDates[xAxisDates.length-1]});
+        // turn on hide and show if more than 1 series in chart
+        self.hideAndShow[key] = ko.computed(function() {
+          return (data[key].length > 1 ? "withRescale" : "none");
+        }, this);
+      }  
+
+      //------------------------------------------------------------
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+    }
+
+    // function to dynamically append chart to HTML
+    // we do this based on available data
+    var appendChart = function(key, rid, cid, metadata)
+    {
+      var title = metadata.title;
+      // converter is string we add to the HTML, not the actual converter
+      var converter;
+      switch (metadata.dispunit)
+      {
+        case "/s":   converter = "psecConverter";
+                     break;
+        case "GB/s": converter = "gbpsConverter";
+                     break;
+        case "GB":   converter = "gbConverter";
+                     break;
+        case "MB/s": converter = "mbpsConverter";
+                     break;
+        case "MB":   converter = "mbConverter";
+                     break;
+        case "ms":   converter = "msConverter";
+                     break;
+        case "%":   converter = "pctConverter";
+                     break;
+        default:     converter = "numberConverter";
+                     break;
+      }
+      // string for ojComponent binding
+      var ojComponent = "component: 'ojChart', "    +
+                        "type: 'line',         "    +
+                        "series: seriesValues."     + key + ", " +
+                        "groups: lineGroupsValue, " +
+                        "hideAndShowBehavior: hideAndShow." + key + ", "+
+
+                        "animationOnDisplay: 'auto', "    +
+                        "animationOnDataChange: 'auto', " +
+                        "orientation: 'vertical', "       +
+                        "hoverBehavior: 'dim', "          +
+                        "selectionMode: 'single', "       +
+                        "timeAxisType: 'enabled', "       +
+                        "title: { text: '" + title + "' }, " +
+                        "tooltip: tooltipFunction, "         +
+                        "xAxis: lineXAxis." + key + ", "     +
+                        "yAxis: { tickLabel: "               +
+                        "         { scaling: 'none', "       +
+                        "           converter: " + converter + "} }, " +
+                        "zoomAndScroll: 'live', "            +
+                        "overview: { rendered: 'on', height: '70px' } ";
+
+      // create div chart
+      var div_chart = document.createElement("div");
+      $(div_chart).attr( { id: key,
+                           class: "exachart" } );
+      $(div_chart).attr('data-bind',
+                        "ojComponent: { " + ojComponent + "}");
+
+      var rowId = "r"+rid;
+      var colId = rowId + "c"+ cid;
+      // if first chart in row, then add row element as well
+      if (cid == 1)
+        $("#charts").append('<div id="' + rowId + '" class="oj-flex"/>');
+      $("#"+rowId).append('<div id="' + colId + '" class="oj-flex-item"/>');
+      $("#" + colId).append(div_chart);
+    }
+
+
+    //------------------------------------------------------------
+    var updateXAxis = function(event, ui)
+    {
+      // get target
+      var target_chart = event.target.id;
+      for (var key in chartModel.seriesValues)
+      {
+        if (key != target_chart)
+        {
+          chartModel.lineXAxis[key](
+            { viewportMin: ui["xMin"],
+              viewportMax: ui["xMax"] } );
+        }
+      }
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model
+    var chartModel = new ChartModel();
+
+    // now append charts in order to HTML based on model
+    var row = 0;
+    var col = 0;
+    for (var i = 0 ; i < chartModel.chartOrder.length; i++)
+    {
+      var key = chartModel.chartOrder[i];
+      if (key in chartModel.seriesValues)
+      {
+        col++;
+        appendChart(key, row, col, chartModel.chartMetadata[key]);
+        if (col == 2)
+        {
+          row++;
+          col = 0;
+        }
+      }
+    }
+
+    // set events for range selector
+    for (var key in chartModel.seriesValues)
+    {
+      $("#" + key).on({"ojviewportchangeinput" : updateXAxis,
+                      "ojviewportchange" : updateXAxis});
+    }
+
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* Alert history page, see inc_template.html */
+exawchartPages["inc"] =
+{
+  modules: [ "ojs/ojtimeline" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModelIncidents = function()
+    {
+      var self = this;
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      var seriesData = page.series;
+      // convert start/end times to local browser time first
+      var item;
+      for (var i = 0; i < seriesData.length; i++)
+      {
+        item = seriesData[i];
+        if (item.hasOwnProperty("start"))
+          item.start = oj.IntlConverterUtils.isoToLocalDate(item.start);
+        if (item.hasOwnProperty("end"))
+          item.end = oj.IntlConverterUtils.isoToLocalDate(item.end);
+      }
+
+      var series = [ { id: "s1",
+                       emptyText: "No Data",
+                       items: seriesData,
+                       label: "Incidents" } ];
+
+      self.seriesValues = ko.observableArray(series);
+
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+      // populate using json
+      var controlData = page.control;
+      // convert start/end time in controlData
+      controlData.startTime = oj.IntlConverterUtils.isoToLocalDate(controlData.startTime);
+      controlData.endTime = oj.IntlConverterUtils.isoToLocalDate(controlData.endTime);   
+
+      // set the following based on data
+      self.minorScale = controlData.minorScale;
+      self.majorScale = controlData.majorScale;
+      self.zoomOrder = controlData.zoomOrder;
+      self.start = ko.observable(controlData.startTime);
+      self.end = ko.observable(controlData.endTime);
+      self.viewportStart = ko.observable(controlData.startTime);
+      self.viewportEnd = ko.observable(controlData.endTime);
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    // create chart model
+    ko.applyBindings(new ChartModelIncidents(), container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* Multi-cell IOStat summary page, see multicell_iosummary_template.html */
+exawchartPages["multicell_iosummary"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojselectcombobox", "ojs/ojbutton" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+
+      // we use these converters in the tooltips as well for consistent
+      // display
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+
+      self.psecConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##/s", useGrouping: true, maximumFractionDigits: 2 });
+
+      self.mbpsConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "#,###,###.##MB/s", useGrouping: true, maximumFractionDigits: 2 } );
+
+      self.usConverter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##us", useGrouping: true, minimumFractionDigits: 2, maximumFractionDigits: 2 } );
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      // scale to us as required
+      self.msConverter = {
+        format : function(value)
+        {
+          var valueString;
+          var converter;
+          if (value < 1)
+            valueString = self.usConverter.format(value*1000);
+          else
+          {
+            converter = oj.Validation.converterFactory("number").createConverter( { pattern: "##,###.##ms", useGrouping: true, minimumFractionDigits: 2,  maximumFractionDigits: 2 });
+            valueString = converter.format(value);
+          }
+          return valueString;
+        }
+      }
+
+      // exposed helper functions
+      self.getSeriesItem = function(dtype, stat, host)
+      {
+        var foo =  data[dtype][stat].filter(function(obj) { return obj.id == host; });
+        return foo;
+      }
+
+      // create custom tooltip so we display all series values
+      self.tooltipFunction = function(dataContext)
+      {
+        // retrieve original date prior to ISO conversion, strip tz
+        var chartId = $(dataContext.component()).attr('id');
+        var chartStat = map[chartId].stat;
+        var converter;
+        switch (chartStat)
+        {
+            case "iops":
+              converter = self.psecConverter;
+              break;
+            case "mbps":
+              converter = self.mbpsConverter;
+              break;
+            case "svctm": 
+            case "await":
+              converter = self.msConverter;
+              break;
+            case "util": 
+              converter = self.pctConverter;
+              break;
+            default:
+              converter = new oj.IntlNumberConverter();
+              break;
+        }
+        //
+        // start building the tooltip
+        var tooltipString = "<b>" + self.dateTimeConverter.format(dataContext.group) + "</b><br/>";
+        // determine what to display based on series
+        // only display current value, not all series
+        tooltipString += "<b>" + dataContext.series + "</b>: ";
+        tooltipString += converter.format(dataContext.value);
+        return tooltipString;
+      }
+
+
+      var xAxis = page.xAxis;
+      var data = exawchartDecodeSeries(page.series);
+
+      // hosts whose series items are in a separate file, these
+      // are loaded when the host is first selected
+      var hostChunks = page.hostChunks;
+
+      // call callback once the series items of the host are loaded
+      self.loadHost = function(host, callback)
+      {
+        if (hostChunks[host] == null)
+        {
+          callback();
+          return;
+        }
+        exawchartLoadChunk(hostChunks[host],
+          function(hostData)
+          {
+            for (var dtype in hostData)
+            {
+              for (var stat in hostData[dtype])
+              {
+                var seriesItems = self.getSeriesItem(dtype, stat, host);
+                if (seriesItems.length > 0)
+                  seriesItems[0].items = hostData[dtype][stat].items;
+              }
+            }
+            delete hostChunks[host];
+            callback();
+          });
+      }
+
+      self.diskTypes = page.diskTypes;
+      self.selector = page.selector;
+      // findings for the cluster aggregate (all hosts)
+      self.findings = page.findings;
+
+      self.reportContext = page.reportContext;
+
+      //------------------------------------------------------------
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+
+      self.seriesValues = {}
+      self.lineXAxis = {}
+      for (var dtype in data)
+      {
+        self.seriesValues[dtype] = {}
+        self.lineXAxis[dtype] = {}
+        for (var stat in data[dtype])
+        {
+          // create new array since we push/remove based on selector
+          self.seriesValues[dtype][stat] =  ko.observableArray([]);
+          for (var i = 0; i < data[dtype][stat].length; i++)
+          {
+            // hosts not loaded yet are not initially selected
+            if (hostChunks[data[dtype][stat][i].id] == null)
+              self.seriesValues[dtype][stat].push(data[dtype][stat][i]);
+          }
+          // create xAxis view port as well
+          self.lineXAxis[dtype][stat] = ko.observable( 
+            {viewportMin: new Date(xAxisDates[0]),
+             viewportMax: new Date(xAxisDates[xAxisDates.length-1])});
+        }
+      }  
+
+      // set selector
+      self.initSelector = ko.observableArray([]);
+      for (var i = 0; i < self.selector.length; i++)
+      {
+        if (hostChunks[self.selector[i].value] == null)
+          self.initSelector.push(self.selector[i].value);
+      }
+
+      // initialize stacked
+      self.isAggregated = ko.observableArray([]);
+
+      self.showStacked = ko.computed(function() {
+        return (self.isAggregated().length ? "on" : "off");
+      }, this);
+      self.chartType = ko.computed(function() {
+        return (self.isAggregated().length ? "lineWithArea" : "line");
+      }, this);
+
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+    }
+    //------------------------------------------------------------
+
+    var arrayDiff = function(a1,a2)
+    {
+      if (typeof(a1) === "object" && typeof(a2) === "object")
+        // return a1.filter(function(i) { return a2.indexOf(i) < 0; });
+        return a1.concat(a2).filter(function(val, index, arr) {
+          return arr.indexOf(val) === arr.lastIndexOf(val);
+        });
+      else
+        return null;
+    }
+
+    // add the series of host to all charts
+    var addHostSeries = function(host)
+    {
+      return function()
+      {
+        // the host may have been deselected while loading
+        if ($("#selector").ojSelect("option","value").indexOf(host) < 0)
+          return;
+        for (var dtype in chartModel.seriesValues)
+        {
+          for (var stat in chartModel.seriesValues[dtype])
+          {
+            if (chartModel.seriesValues[dtype][stat]().filter(function(item) { return item.id == host; }).length > 0)
+              continue;
+            chartModel.seriesValues[dtype][stat].push(chartModel.getSeriesItem(dtype,stat,host)[0]);
+          }
+        }
+        $("#header").trigger('heightChange');
+      };
+    }
+
+    // update series to add/remove host from chart
+    var updateSeries = function(event, data)
+    {
+      var toAdd = false;
+      var diffSeries = arrayDiff(data.value, data.previousValue);
+      if (diffSeries != null)
+      {
+        if (data.value.length > data.previousValue.length)
+          toAdd = true;
+        for (var i = 0; i < diffSeries.length; i++)
+        {
+          var host = diffSeries[i];
+          // update all charts, once the series of the host are loaded
+          if (toAdd)
+          {
+            chartModel.loadHost(host, addHostSeries(host));
+            continue;
+          }
+          for (var dtype in chartModel.seriesValues)
+          {
+            for (var stat in chartModel.seriesValues[dtype])
+            {
+              chartModel.seriesValues[dtype][stat].remove(function(item) { return item.id == host; } );
+            }
+          }
+        $("#header").trigger('heightChange');
+        }
+      }
+    }
+    //------------------------------------------------------------
+    var updateXAxis = function(event, ui) 
+    {
+       // get stat/dtype matching the target.id
+      var target_stat = map[event.target.id].stat;
+      var target_dtype = map[event.target.id].dtype;
+      for (var dtype in chartModel.lineXAxis)
+        for (var stat in chartModel.lineXAxis[dtype])
+        {
+          if (stat !== target_stat || dtype !== target_dtype)
+          {
+            chartModel.lineXAxis[dtype][stat](
+              {viewportMin: ui["xMin"],
+               viewportMax: ui["xMax"]});
+          }
+        }
+    }
+
+    //------------------------------------------------------------
+    var appendChart = function(chartId, dtype, stat)
+    {
+      // determine converter based on stat
+      var converter;
+      var chartTitle = (dtype == "flash" ? "Flash" : "Hard Disk");
+      var chartType = "'line'";  // default chart type is line
+      var showStacked = "'off'"; // default unstacked
+      switch (stat)
+      {
+        case "iops": converter = "psecConverter";
+                     chartTitle += " IOPs";
+                     chartType = "chartType"; // bind based on agg
+                     showStacked = "showStacked";
+                     break;
+        case "mbps": converter = "mbpsConverter";
+                     chartTitle += " MB/s";
+                     chartType = "chartType"; // bind based on agg
+                     showStacked = "showStacked";
+                     break;
+        case "svctm": converter = "msConverter";
+                      chartTitle += " Service Time";
+                      break;
+        case "await": converter = "msConverter";
+                      chartTitle += " Wait Time";
+                      break;
+        case "util": converter = "pctConverter";
+                     chartTitle += " Utiization";
+                     break;
+      }
+      var chartSeries = dtype + "." + stat;
+      var ojComponent = "component: 'ojChart', "      + 
+                        "type: " + chartType + ", "   +
+                        "series: seriesValues." + chartSeries + ", " +
+                        "groups: lineGroupsValue, "    +
+                        "animationOnDisplay: 'auto', " +
+                        "animationOnDataChange: 'auto', " +
+                        "orientation: 'vertical', " +
+                        "hoverBehavior: 'dim', " +
+                        "selectionMode: 'single', " +
+                        "timeAxisType: 'enabled', " +
+                        "stack: " + showStacked + ", " +
+                        "title: { text: '" + chartTitle + "' }, " +
+                        "xAxis: lineXAxis." + chartSeries + ", " +
+                        "yAxis: { tickLabel: "  +
+                        "  { scaling: 'none', " +
+                        "    converter: " + converter + " } }, " +
+                        "tooltip: tooltipFunction," +
+                        "zoomAndScroll: 'live', " +
+                        "overview: { rendered: 'on', height: '70px' }," +
+                        "emptyText: ' ' ";
+      // create div for the chart
+      var div_chart = document.createElement("div");
+      $(div_chart).attr( { id: chartId,
+                           class: "exachart" } );
+      $(div_chart).attr('data-bind',
+                        "ojComponent: { " + ojComponent + " } ");
+
+      // append to stat row
+      var rowId = stat + "Row";
+      var colId = dtype + stat + "Col";
+      $("#" + rowId).append('<div id="' + colId + '" class="oj-flex-item"/>');
+      $("#" + colId).append(div_chart);
+
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model 
+    var chartModel = new ChartModel();
+
+    // dynamically add charts and create map
+    var map = {}
+    for (var i = 0; i < chartModel.diskTypes.length; i++)
+    {
+      var dtype = chartModel.diskTypes[i];
+      for (var stat in chartModel.seriesValues[dtype])
+      {
+        var chartId = dtype + stat + "Chart";
+        map[chartId] = { "stat" : stat, "dtype": dtype }
+        appendChart(chartId, dtype, stat);
+      }
+    }
+
+    //------------------------------------------------------------
+    // listeners
+    $("#selector").on({"ojoptionchange": updateSeries});
+
+    // add listeners for axis changes
+    for (var chart in map)
+    {
+      var htmlId = "#"+chart;
+      $(htmlId).on({"ojviewportchangeinput": updateXAxis,
+                    "ojviewportchange": updateXAxis});
+    }
+
+    // add listeners to adjustContentPadding
+    $(window).on("resize.exawchart", adjustContentPadding);
+    $("#header").on('heightChange',adjustContentPadding);
+
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* Multi-cell CPU page, see multicell_cpu_template.html */
+exawchartPages["multicell_cpu"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojselectcombobox" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+
+      // we use these converters in the tooltips as well for consistent
+      // display
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      self.getSeriesItem = function(host)
+      {
+        return data.filter(function(obj) { return obj.id == host; });
+      }
+
+      // create custom tooltip so we display all series values
+      self.tooltipFunction = function(dataContext)
+      {
+        // start building the tooltip
+        var tooltipString = "<b>" + self.dateTimeConverter.format(dataContext.group) + "</b><br/>";
+        tooltipString += "<b>" + dataContext.series + "</b>: ";
+        tooltipString += self.pctConverter.format(dataContext.value);
+        return tooltipString;
+      }
+
+      var xAxis = page.xAxis;
+      var data = exawchartDecodeSeries(page.series);
+      self.selector = page.selector;
+
+      // hosts whose series items are in a separate file, these
+      // are loaded when the host is first selected
+      var hostChunks = page.hostChunks;
+
+      // call callback once the series items of the host are loaded
+      self.loadHost = function(host, callback)
+      {
+        if (hostChunks[host] == null)
+        {
+          callback();
+          return;
+        }
+        exawchartLoadChunk(hostChunks[host],
+          function(hostData)
+          {
+            var seriesItems = self.getSeriesItem(host);
+            if (seriesItems.length > 0)
+              seriesItems[0].items = hostData.items;
+            delete hostChunks[host];
+            callback();
+          });
+      }
+
+      //------------------------------------------------------------
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+      // create new array since we add/remove series based on selector
+      // we do not want to change actual data
+      self.lineSeriesValue = ko.observableArray([]);
+      self.initSelector = ko.observableArray([]);
+      for (var i = 0; i < data.length; i++)
+      {
+        // hosts not loaded yet are not initially selected
+        if (hostChunks[data[i].id] != null)
+          continue;
+        self.lineSeriesValue.push(data[i]);
+        // also set all hosts initially selected
+        self.initSelector.push(data[i].id);
+      }
+
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+    }
+
+    //-----------a-------------------------------------------------
+    var arrayDiff = function(a1,a2)
+    {
+      if (typeof(a1) === "object" && typeof(a2) === "object")
+        // return a1.filter(function(i) { return a2.indexOf(i) < 0; });
+        return a1.concat(a2).filter(function(val, index, arr) {
+          return arr.indexOf(val) === arr.lastIndexOf(val);
+        });
+      else
+        return null;
+    }
+    // add the series of host to the chart
+    var addHostSeries = function(host)
+    {
+      return function()
+      {
+        // the host may have been deselected while loading
+        if ($("#selector").ojSelect("option","value").indexOf(host) < 0)
+          return;
+        if (chartModel.lineSeriesValue().filter(function(item) { return item.id == host; }).length > 0)
+          return;
+        chartModel.lineSeriesValue.push(chartModel.getSeriesItem(host)[0]);
+        $("#header").trigger('heightChange');
+      };
+    }
+
+    // we can use show/hide with associated views, but it would
+    // be inconsistent with other pages
+    function updateSeries(event, data)
+    {
+      // add or remove
+      var toAdd = false;
+      var diffSeries = arrayDiff(data.value, data.previousValue)
+      if (diffSeries != null)
+      {
+        if (data.value.length > data.previousValue.length)
+          toAdd= true;
+        // normally length of 1, but we go through it anyway
+         for (var i = 0; i < diffSeries.length; i++)
+         {
+           var host = diffSeries[i];
+           if (toAdd)
+           {
+             chartModel.loadHost(host, addHostSeries(host));
+           }
+           else
+           {
+             chartModel.lineSeriesValue.remove(function(item) { return item.id == host; });
+           }
+         }
+         $("#header").trigger('heightChange');
+       }
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model 
+    var chartModel = new ChartModel();
+
+    // listeners
+    $("#selector").on({"ojoptionchange": updateSeries});
+
+    // listeners for top height changing - window or selection
+    $(window).on("resize.exawchart", adjustContentPadding);
+    $("#header").on('heightChange',adjustContentPadding);
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};
+
+//------------------------------------------------------------
+/* Multi-cell heatmap page, see multicell_heatmap_template.html */
+exawchartPages["multicell_heatmap"] =
+{
+  modules: [ "ojs/ojselectcombobox" ],
+  show: function(oj, ko, $, page, container)
+  {
+    //------------------------------------------------------------
+    /* each heatmap is a matrix (a row per host, a column per bucket)
+       of values quantized to one byte (see quantize_matrix in
+       exawutil.py), base64 encoded as u8, so decode the levels into
+       a Uint8Array */
+    var decodeHeatmap = function(heatmap)
+    {
+      var bytes = atob(heatmap.u8);
+      heatmap.levelData = new Uint8Array(bytes.length);
+      for (var i = 0; i < bytes.length; i++)
+        heatmap.levelData[i] = bytes.charCodeAt(i);
+      delete heatmap.u8;
+      return heatmap;
+    };
+
+    // colors for levels low .. high, missing values are not drawn
+    var colorStops = [ [255, 255, 204], [253, 141, 60], [128, 0, 38] ];
+    var getColor = function(level, levels)
+    {
+      var pos = level / (levels - 1) * (colorStops.length - 1);
+      var i = Math.min(Math.floor(pos), colorStops.length - 2);
+      var frac = pos - i;
+      var rgb = [];
+      for (var c = 0; c < 3; c++)
+        rgb.push(Math.round(colorStops[i][c] + (colorStops[i+1][c] - colorStops[i][c]) * frac));
+      return "rgb(" + rgb.join(",") + ")";
+    };
+
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+
+      // we use these converters in the tooltips as well for consistent
+      // display
+      self.pctConverter = oj.Validation.converterFactory("number").createConverter( { style:"percent", maximumFractionDigits: 2 });
+      self.numberConverter = oj.Validation.converterFactory("number").createConverter( { maximumFractionDigits: 2 });
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      var xAxis = page.xAxis;
+      self.hosts = page.hosts;
+      self.heatmaps = page.heatmaps;
+
+      // selector for the heatmap to display
+      self.selector = [];
+      for (var i = 0; i < self.heatmaps.length; i++)
+      {
+        decodeHeatmap(self.heatmaps[i]);
+        self.selector.push( { value: self.heatmaps[i].id,
+                              label: self.heatmaps[i].label } );
+      }
+      self.initSelector = ko.observableArray(self.heatmaps.length > 0 ? [ self.heatmaps[0].id ] : []);
+      self.heatmap = self.heatmaps.length > 0 ? self.heatmaps[0] : null;
+
+      //------------------------------------------------------------
+      // convert strings to dates - otherwise chrome gets confused
+      self.xAxisDates = [];
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        self.xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+      self.legendLow = ko.observable("");
+      self.legendHigh = ko.observable("");
+
+      // value of a level, levels are spread evenly over low .. high
+      self.getValue = function(heatmap, level)
+      {
+        if (heatmap.high <= heatmap.low)
+          return heatmap.low;
+        return heatmap.low + level * (heatmap.high - heatmap.low) / (heatmap.levels - 1);
+      };
+
+      self.formatValue = function(heatmap, value)
+      {
+        if (heatmap.pct)
+          return self.pctConverter.format(value);
+        return self.numberConverter.format(value);
+      };
+
+      //------------------------------------------------------------
+      // layout of the canvas: host labels on the left, and a cell
+      // per host/bucket, with rows at least 1 pixel high
+      var labelWidth = 100;
+      self.getLayout = function(canvas)
+      {
+        var heatmap = self.heatmap;
+        var width = $(canvas).parent().width() - labelWidth;
+        var rowHeight = Math.max(1, Math.min(20, Math.floor(600 / Math.max(1, heatmap.rows))));
+        return { left: labelWidth,
+                 rowHeight: rowHeight,
+                 cellWidth: width / Math.max(1, heatmap.columns),
+                 width: width,
+                 height: rowHeight * heatmap.rows };
+      };
+
+      self.draw = function()
+      {
+        var canvas = document.getElementById("heatmap");
+        var heatmap = self.heatmap;
+        if (heatmap === null)
+          return;
+        var layout = self.getLayout(canvas);
+        canvas.width = layout.left + layout.width;
+        canvas.height = layout.height;
+        var ctx = canvas.getContext("2d");
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+
+        // one color per level, so cells can be drawn in one pass
+        var colors = [];
+        for (var level = 0; level < heatmap.levels; level++)
+          colors.push(getColor(level, heatmap.levels));
+
+        for (var row = 0; row < heatmap.rows; row++)
+        {
+          var y = row * layout.rowHeight;
+          for (var col = 0; col < heatmap.columns; col++)
+          {
+            var level = heatmap.levelData[row * heatmap.columns + col];
+            if (level >= heatmap.levels)
+              continue;
+            var x = layout.left + Math.floor(col * layout.cellWidth);
+            ctx.fillStyle = colors[level];
+            ctx.fillRect(x, y, Math.ceil(layout.cellWidth), layout.rowHeight);
+          }
+          // only label the hosts if the rows are high enough
+          if (layout.rowHeight >= 10)
+          {
+            ctx.fillStyle = "#333333";
+            ctx.font = Math.min(12, layout.rowHeight - 1) + "px sans-serif";
+            ctx.textBaseline = "middle";
+            ctx.fillText(self.hosts[row].label, 2, y + layout.rowHeight / 2, layout.left - 4);
+          }
+        }
+        self.legendLow(self.formatValue(heatmap, heatmap.low));
+        self.legendHigh(self.formatValue(heatmap, heatmap.high));
+      };
+
+      // display host, time and value of the cell under the mouse
+      self.showTooltip = function(event)
+      {
+        var canvas = document.getElementById("heatmap");
+        var tooltip = $("#tooltip");
+        var heatmap = self.heatmap;
+        if (heatmap === null)
+          return;
+        var layout = self.getLayout(canvas);
+        var offset = $(canvas).offset();
+        var x = event.pageX - offset.left - layout.left;
+        var row = Math.floor((event.pageY - offset.top) / layout.rowHeight);
+        var col = Math.floor(x / layout.cellWidth);
+        if (x < 0 || row < 0 || row >= heatmap.rows ||
+            col < 0 || col >= heatmap.columns)
+        {
+          tooltip.hide();
+          return;
+        }
+        var level = heatmap.levelData[row * heatmap.columns + col];
+        var tooltipString = "<b>" + self.dateTimeConverter.format(self.xAxisDates[col]) + "</b><br/>";
+        tooltipString += "<b>" + self.hosts[row].label + "</b>: ";
+        if (level >= heatmap.levels)
+          tooltipString += "-";
+        else
+          tooltipString += self.formatValue(heatmap, self.getValue(heatmap, level));
+        tooltip.html(tooltipString);
+        tooltip.css( { left: (event.pageX - offset.left + 12) + "px",
+                       top: (event.pageY - offset.top + 12) + "px" }).show();
+      };
+
+    }
+
+    //------------------------------------------------------------
+    function updateHeatmap(event, data)
+    {
+      if (data.option != "value" || data.value.length == 0)
+        return;
+      for (var i = 0; i < chartModel.heatmaps.length; i++)
+      {
+        if (chartModel.heatmaps[i].id == data.value[0])
+          chartModel.heatmap = chartModel.heatmaps[i];
+      }
+      chartModel.draw();
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model 
+    var chartModel = new ChartModel();
+
+    // listeners
+    $("#selector").on({"ojoptionchange": updateHeatmap});
+    $("#heatmap").on("mousemove", chartModel.showTooltip);
+    $("#heatmap").on("mouseleave", function() { $("#tooltip").hide(); });
+
+    // listeners for top height changing - window or selection
+    $(window).on("resize.exawchart", function() { adjustContentPadding(); chartModel.draw(); });
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+    chartModel.draw();
+  }
+};
+
+//------------------------------------------------------------
+/* Multi-cell correlation page, see multicell_correlation_template.html */
+exawchartPages["multicell_correlation"] =
+{
+  modules: [ "ojs/ojchart", "ojs/ojselectcombobox" ],
+  show: function(oj, ko, $, page, container)
+  {
+    var ChartModel = function()
+    {
+      var self = this;
+      // ------------------------------------------------------------
+      // supporting functions
+      // ------------------------------------------------------------
+      self.numberConverter = oj.Validation.converterFactory("number").createConverter( { maximumFractionDigits: 2 });
+
+      self.dateTimeConverter = oj.Validation.converterFactory("datetime").createConverter( { formatType: "datetime", dateFormat: "short",  timeFormat: "medium"} );
+
+      self.tooltipFunction = function(dataContext)
+      {
+        var tooltipString = "<b>" + self.dateTimeConverter.format(dataContext.group) + "</b><br/>";
+        tooltipString += "<b>" + dataContext.series + "</b>: ";
+        tooltipString += self.numberConverter.format(dataContext.value);
+        return tooltipString;
+      }
+
+      var xAxis = page.xAxis;
+      // metrics: average of each metric over the database nodes or
+      // cells; pairs: rolling correlation of a database node (x)
+      // and cell (y) metric, and the overall correlation (r)
+      var data = exawchartDecodeSeries(page.series);
+      var hosts = page.hosts;
+      self.selector = page.selector;
+      self.correlationWindow = page.correlationWindow;
+      self.dbNodes = hosts.db.join(", ");
+      self.cells = hosts.cell.join(", ");
+
+      var getMetric = function(id)
+      {
+        return data.metrics.filter(function(obj) { return obj.id == id; })[0];
+      }
+
+      //------------------------------------------------------------
+      // convert strings to dates - otherwise chrome gets confused
+      var xAxisDates = []
+      for (var i = 0; i < xAxis.length; i++)
+      {
+        // display all dates in browser timezone, note we do not
+        // have tz information in the data
+        xAxisDates.push(oj.IntlConverterUtils.isoToLocalDate(xAxis[i]));
+      }
+      self.lineGroupsValue = ko.observableArray(xAxisDates);
+      self.metricSeriesValue = ko.observableArray([]);
+      self.correlationSeriesValue = ko.observableArray([]);
+      self.correlation = ko.observable("");
+      self.initSelector = ko.observableArray([]);
+
+      // show the metrics and correlation of a pair
+      self.showPair = function(pairId)
+      {
+        var pair = data.pairs.filter(function(obj) { return obj.id == pairId; })[0];
+        if (pair == null)
+          return;
+        var x = getMetric(pair.x);
+        var y = getMetric(pair.y);
+        self.metricSeriesValue([ { name: x.name, items: x.items },
+                                 { name: y.name, items: y.items,
+                                   assignedToY2: "on" } ]);
+        self.correlationSeriesValue([ { name: "correlation", items: pair.items } ]);
+        self.correlation(pair.r == null ? "n/a" : self.numberConverter.format(pair.r));
+      }
+
+      if (self.selector.length > 0)
+      {
+        self.initSelector.push(self.selector[0].value);
+        self.showPair(self.selector[0].value);
+      }
+
+      self.reportContext = page.reportContext;
+      // format dates for display
+      self.reportStartTime = self.dateTimeConverter.format(self.reportContext.reportStartTime);
+      self.reportEndTime = self.dateTimeConverter.format(self.reportContext.reportEndTime);
+
+    }
+
+    function updatePair(event, data)
+    {
+      if (data.option == "value" && data.value.length > 0)
+      {
+        chartModel.showPair(data.value[0]);
+        $("#header").trigger('heightChange');
+      }
+    }
+
+    function adjustContentPadding()
+    {
+      exawchartAdjustContentPadding($, container);
+    }
+
+    //------------------------------------------------------------
+    // create model 
+    var chartModel = new ChartModel();
+
+    // listeners
+    $("#selector").on({"ojoptionchange": updatePair});
+
+    // listeners for top height changing - window or selection
+    $(window).on("resize.exawchart", adjustContentPadding);
+    $("#header").on('heightChange',adjustContentPadding);
+    ko.applyBindings(chartModel, container);
+    adjustContentPadding();
+  }
+};